@@ -1,6 +1,6 @@
 """Agents module initialization"""
 
-from .base_agent import BaseAgent, AgentInput, AgentOutput
+from .base_agent import BaseAgent, AgentInput, AgentResult
 from .research_agent import ResearchAgent
 from .news_agent import NewsAgent
 from .financial_agent import FinancialAgent
@@ -11,7 +11,7 @@ from .orchestrator import AgentOrchestrator
 __all__ = [
     "BaseAgent",
     "AgentInput",
-    "AgentOutput",
+    "AgentResult",
     "ResearchAgent",
     "NewsAgent",
     "FinancialAgent",
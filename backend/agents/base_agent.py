@@ -4,33 +4,89 @@ All specialized agents inherit from this base class
 """
 
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
 from typing import Dict, Any, Optional, List
 from datetime import datetime
+import functools
 import logging
-from pydantic import BaseModel, Field
+import time
+
+from core.metrics import (
+    AGENT_EXECUTIONS,
+    AGENT_EXECUTION_SECONDS,
+    AGENT_SUBCALL_SECONDS,
+    AGENT_CONFIDENCE
+)
+from core.tracing import start_span
+from core.loop_monitor import activity
+from services.latency_stats import get_latency_stats, AGENT
 
 logger = logging.getLogger(__name__)
 
 
-class AgentInput(BaseModel):
-    """Standard input for agents"""
-    company_name: str = Field(..., description="Target company name")
-    context: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Additional context")
-    timeframe_days: int = Field(default=30, description="Data collection timeframe in days")
-    priority: str = Field(default="medium", description="Priority level: low, medium, high")
+@dataclass(slots=True)
+class AgentInput:
+    """
+    Standard input for agents
+
+    Built by the orchestrator from an already-validated API request, so it is a
+    plain dataclass; the context dict is passed by reference, not copied.
+    """
+    company_name: str
+    context: Optional[Dict[str, Any]] = field(default_factory=dict)
+    timeframe_days: int = 30
+    priority: str = "medium"  # low, medium, high
+
 
+@dataclass(slots=True)
+class AgentResult:
+    """
+    Standard output from agents, as passed between agents and the orchestrator
 
-class AgentOutput(BaseModel):
-    """Standard output from agents"""
-    agent_name: str = Field(..., description="Name of the agent")
-    status: str = Field(..., description="Status: success, partial, error")
-    data: Dict[str, Any] = Field(default_factory=dict, description="Collected data")
-    insights: List[str] = Field(default_factory=list, description="Key insights")
-    confidence_score: float = Field(default=0.0, ge=0.0, le=1.0, description="Confidence in data quality")
-    execution_time_ms: int = Field(..., description="Execution time in milliseconds")
-    timestamp: datetime = Field(default_factory=datetime.now)
+    No validation or copying happens here: the values come from the agents
+    themselves, and only API requests are validated.
+    """
+    agent_name: str
+    status: str  # success, partial, error
+    data: Dict[str, Any] = field(default_factory=dict)
+    insights: List[str] = field(default_factory=list)
+    confidence_score: float = 0.0
+    execution_time_ms: int = 0
+    timestamp: datetime = field(default_factory=datetime.now)
     error_message: Optional[str] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow dict for responses and storage; data and insights are shared, not copied"""
+        return {
+            "agent_name": self.agent_name,
+            "status": self.status,
+            "data": self.data,
+            "insights": self.insights,
+            "confidence_score": self.confidence_score,
+            "execution_time_ms": self.execution_time_ms,
+            "timestamp": self.timestamp,
+            "error_message": self.error_message
+        }
+
+
+def subcall(func):
+    """Record the duration of an agent's data-collection step"""
+    call = func.__name__.lstrip("_")
+    
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            with start_span(f"{self.name}.{call}"), activity(self.name, call):
+                result = await func(self, *args, **kwargs)
+            status = "success"
+            return result
+        finally:
+            AGENT_SUBCALL_SECONDS.observe(time.perf_counter() - start, self.name, call, status)
+    
+    return wrapper
+
 
 class BaseAgent(ABC):
     """Base class for all agents"""
@@ -41,7 +97,7 @@ class BaseAgent(ABC):
         self.logger = logging.getLogger(f"agent.{name}")
     
     @abstractmethod
-    async def execute(self, input_data: AgentInput) -> AgentOutput:
+    async def execute(self, input_data: AgentInput) -> AgentResult:
         """
         Execute the agent's main task
         
@@ -49,10 +105,35 @@ class BaseAgent(ABC):
             input_data: Standardized input data
             
         Returns:
-            AgentOutput: Standardized output with results
+            AgentResult: Standardized output with results
         """
         pass
     
+    async def run(self, input_data: AgentInput) -> AgentResult:
+        """Execute the agent inside a trace span and record latency, outcome and confidence metrics"""
+        start = time.perf_counter()
+        with start_span(f"agent.{self.name}", attributes={"agent.name": self.name}) as span, activity(self.name):
+            try:
+                output = await self.execute(input_data)
+            except Exception:
+                AGENT_EXECUTIONS.inc(self.name, "exception")
+                AGENT_EXECUTION_SECONDS.observe(time.perf_counter() - start, self.name, "exception")
+                get_latency_stats().record(AGENT, self.name, time.perf_counter() - start, False)
+                raise
+            span.set_attributes({
+                "agent.status": output.status,
+                "agent.confidence": output.confidence_score
+            })
+            if output.error_message:
+                span.set_attribute("agent.error", output.error_message)
+        
+        AGENT_EXECUTIONS.inc(self.name, output.status)
+        AGENT_EXECUTION_SECONDS.observe(time.perf_counter() - start, self.name, output.status)
+        get_latency_stats().record(AGENT, self.name, time.perf_counter() - start, output.status == "success")
+        if output.status == "success":
+            AGENT_CONFIDENCE.observe(output.confidence_score, self.name)
+        return output
+    
     def _create_output(
         self,
         status: str,
@@ -61,14 +142,14 @@ class BaseAgent(ABC):
         confidence_score: float,
         execution_time_ms: int,
         error_message: Optional[str] = None
-    ) -> AgentOutput:
+    ) -> AgentResult:
         """Helper to create standardized output"""
-        return AgentOutput(
+        return AgentResult(
             agent_name=self.name,
             status=status,
             data=data,
             insights=insights,
-            confidence_score=confidence_score,
+            confidence_score=min(max(confidence_score, 0.0), 1.0),
             execution_time_ms=execution_time_ms,
             error_message=error_message
         )
@@ -79,10 +160,13 @@ class BaseAgent(ABC):
             raise ValueError("Company name is required")
         return True
     
-    def log_execution(self, input_data: AgentInput, output: AgentOutput):
+    def log_execution(self, input_data: AgentInput, output: AgentResult):
         """Log agent execution"""
         self.logger.info(
-            f"Agent '{self.name}' executed for {input_data.company_name} "
-            f"- Status: {output.status}, Time: {output.execution_time_ms}ms, "
-            f"Confidence: {output.confidence_score:.2f}"
+            "Agent '%s' executed for %s - Status: %s, Time: %sms, Confidence: %.2f",
+            self.name,
+            input_data.company_name,
+            output.status,
+            output.execution_time_ms,
+            output.confidence_score
         )
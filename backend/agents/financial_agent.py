@@ -4,12 +4,17 @@ Collects and analyzes financial data including stock performance, funding, and r
 """
 
 import asyncio
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import time
 from datetime import datetime, timedelta
 import random
 
-from agents.base_agent import BaseAgent, AgentInput, AgentOutput
+from agents.base_agent import BaseAgent, AgentInput, AgentResult, subcall
+from services.market_data_service import get_market_data_service
+from services.data_sources_service import get_data_sources_service
+from services.symbol_index import get_symbol_index
+from core.metrics import record_cache_lookup
+from core.tracing import current_span
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,18 +28,23 @@ class FinancialAgent(BaseAgent):
             name="FinancialAgent",
             description="Gathers stock performance, funding rounds, and financial reports"
         )
+        self.market_data = get_market_data_service()
+        self.data_sources = get_data_sources_service()
+        self.symbol_index = get_symbol_index()
     
-    async def execute(self, input_data: AgentInput) -> AgentOutput:
+    async def execute(self, input_data: AgentInput) -> AgentResult:
         """Execute financial data collection"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             await self.validate_input(input_data)
             
-            self.logger.info(f"Collecting financial data for {input_data.company_name}")
+            self.logger.info("Collecting financial data for %s", input_data.company_name)
             
             # Collect financial data
-            stock_data = await self._fetch_stock_data(input_data.company_name)
+            context = input_data.context or {}
+            ticker = context.get("ticker") or self._resolve_ticker(input_data.company_name)
+            stock_data = await self._fetch_stock_data(input_data.company_name, ticker)
             funding_info = await self._fetch_funding_info(input_data.company_name)
             financial_metrics = await self._fetch_financial_metrics(input_data.company_name)
             
@@ -49,7 +59,7 @@ class FinancialAgent(BaseAgent):
             # Generate insights
             insights = self._generate_insights(data)
             
-            execution_time = int((time.time() - start_time) * 1000)
+            execution_time = int((time.perf_counter() - start_time) * 1000)
             
             output = self._create_output(
                 status="success",
@@ -63,8 +73,8 @@ class FinancialAgent(BaseAgent):
             return output
             
         except Exception as e:
-            execution_time = int((time.time() - start_time) * 1000)
-            self.logger.error(f"Error in FinancialAgent: {str(e)}")
+            execution_time = int((time.perf_counter() - start_time) * 1000)
+            self.logger.error("Error in FinancialAgent: %s", e)
             
             return self._create_output(
                 status="error",
@@ -75,8 +85,20 @@ class FinancialAgent(BaseAgent):
                 error_message=str(e)
             )
     
-    async def _fetch_stock_data(self, company_name: str) -> Dict[str, Any]:
+    def _resolve_ticker(self, company_name: str) -> Optional[str]:
+        """Best ticker for a company from the local symbol index, if confident"""
+        if not self.symbol_index:
+            return None
+        return self.symbol_index.best(company_name)
+    
+    @subcall
+    async def _fetch_stock_data(self, company_name: str, ticker: Optional[str] = None) -> Dict[str, Any]:
         """Fetch stock market data (if publicly traded)"""
+        if ticker:
+            stock_data = await self._fetch_ticker_data(ticker)
+            if stock_data:
+                return stock_data
+        
         await asyncio.sleep(0.5)
         
         # In production: Use Yahoo Finance, Alpha Vantage, or similar
@@ -111,6 +133,55 @@ class FinancialAgent(BaseAgent):
             "52_week_low": round(current_price * 0.75, 2)
         }
     
+    async def _fetch_ticker_data(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Stock data for a known ticker, from stored history when available"""
+        # Reads (and may re-map) the price files, so it stays off the event loop
+        analytics = (await asyncio.to_thread(self.market_data.portfolio_analytics, [ticker])).get(ticker.upper())
+        if analytics and analytics["stale"]:
+            # Stored history stopped updating; a live quote beats an old close
+            analytics = None
+        record_cache_lookup("price_history", analytics is not None)
+        current_span().set_attribute("cache.price_history.hit", analytics is not None)
+        
+        if analytics:
+            # Served entirely from the local price store - no API round trip
+            current = analytics["last_close"]
+            return_1d = analytics["return_1d"]
+            # A -100% day (a close of 0) leaves nothing to divide back from
+            previous = current / (1 + return_1d) if return_1d is not None and return_1d != -1.0 else None
+            return {
+                "status": "public",
+                "ticker": ticker.upper(),
+                "current_price": current,
+                "previous_close": round(previous, 2) if previous else None,
+                "change": round(current - previous, 2) if previous else None,
+                "change_percent": round(return_1d * 100, 2) if return_1d is not None else None,
+                "return_1m": analytics["return_1m"],
+                "return_1y": analytics["return_1y"],
+                "volatility_1y": analytics["volatility_1y"],
+                "52_week_high": analytics["week_52_high"],
+                "52_week_low": analytics["week_52_low"],
+                "as_of": analytics["as_of"],
+                "source": "price_history"
+            }
+        
+        quote = await self.data_sources.get_stock_data(ticker)
+        if not quote:
+            return None
+        
+        return {
+            "status": "public",
+            "ticker": quote["symbol"],
+            "current_price": quote["price"],
+            "change": quote["change"],
+            "change_percent": quote["change_percent"],
+            "volume": quote["volume"],
+            "as_of": quote["latest_trading_day"],
+            "source": "live_quote",
+            "provenance": quote["provenance"]
+        }
+    
+    @subcall
     async def _fetch_funding_info(self, company_name: str) -> Dict[str, Any]:
         """Fetch funding and investment information"""
         await asyncio.sleep(0.4)
@@ -149,6 +220,7 @@ class FinancialAgent(BaseAgent):
             ]
         }
     
+    @subcall
     async def _fetch_financial_metrics(self, company_name: str) -> Dict[str, Any]:
         """Fetch key financial metrics"""
         await asyncio.sleep(0.3)
@@ -5,7 +5,7 @@ using LLM (OpenAI GPT-4 or similar)
 """
 
 import asyncio
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import time
 from datetime import datetime
 import json
@@ -15,8 +15,10 @@ import sys
 # Add parent directory to path to import services
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from agents.base_agent import BaseAgent, AgentInput, AgentOutput
+from agents.base_agent import BaseAgent, AgentInput, AgentResult, subcall
 from services.llm_service import get_llm_service
+from services.vector_index import get_vector_index, Retrieval, RetrievedInsight, SECTIONS
+from core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,55 +33,87 @@ class InsightSynthesizerAgent(BaseAgent):
             description="Synthesizes data from multiple agents into actionable insights"
         )
         self.llm_service = get_llm_service()
-        self.use_llm = self.llm_service.client is not None
+        self.use_llm = self.llm_service.available
+        vector_index = get_vector_index()
+        self.vector_index = vector_index if settings.VECTOR_INDEX_ENABLED and vector_index.available else None
     
-    async def execute(self, input_data: AgentInput) -> AgentOutput:
+    async def execute(self, input_data: AgentInput) -> AgentResult:
         """
         Execute insight synthesis
-        Note: This method expects combined_data in the context
+        Note: This method expects combined_data in the context; "reuse_prior": False
+        (a refresh) always writes new sections instead of reusing a prior synthesis
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
-            self.logger.info(f"Synthesizing insights for {input_data.company_name}")
+            self.logger.info("Synthesizing insights for %s", input_data.company_name)
             
             # Get combined data from all agents (passed via context)
             combined_data = input_data.context.get("agent_outputs", {}) if input_data.context else {}
+            reuse_prior = input_data.context.get("reuse_prior", True) if input_data.context else True
             
             if not combined_data:
                 raise ValueError("No agent outputs provided for synthesis")
             
-            # Generate executive summary using LLM
-            executive_summary = await self._generate_executive_summary(
-                input_data.company_name,
-                combined_data
-            )
-            
-            # Generate talking points
-            talking_points = await self._generate_talking_points(combined_data)
-            
-            # Generate action items
-            action_items = await self._generate_action_items(combined_data)
+            # Prior briefs and insights for this and similar companies
+            retrieval = await self._retrieve_prior(input_data.company_name, combined_data)
+            prior = retrieval.prior if retrieval else None
+            context = retrieval.context if retrieval else []
             
-            # Identify opportunities and risks
-            opportunities = await self._identify_opportunities(combined_data)
-            risks = await self._identify_risks(combined_data)
+            if reuse_prior and prior is not None and prior.similarity >= settings.SYNTHESIS_REUSE_SIMILARITY:
+                # Near-identical situation: the earlier sections still apply as written
+                sections = prior.sections
+            else:
+                prior = None
+                
+                # Generate executive summary using LLM
+                executive_summary = await self._generate_executive_summary(
+                    input_data.company_name,
+                    combined_data,
+                    context
+                )
+                
+                # Generate talking points
+                talking_points = await self._generate_talking_points(combined_data)
+                
+                # Generate action items
+                action_items = await self._generate_action_items(combined_data)
+                
+                # Identify opportunities and risks
+                opportunities = await self._identify_opportunities(combined_data)
+                risks = await self._identify_risks(combined_data)
+                
+                sections = {
+                    "executive_summary": executive_summary,
+                    "talking_points": talking_points,
+                    "action_items": action_items,
+                    "opportunities": opportunities,
+                    "risks": risks
+                }
+                if self.vector_index is not None:
+                    self.vector_index.add_in_background(input_data.company_name, combined_data, sections)
             
             # Compile synthesized data
             data = {
-                "executive_summary": executive_summary,
-                "talking_points": talking_points,
-                "action_items": action_items,
-                "opportunities": opportunities,
-                "risks": risks,
+                **{section: sections.get(section) for section in SECTIONS},
                 "meeting_preparation_score": self._calculate_prep_score(combined_data),
-                "last_updated": datetime.now().isoformat()
+                "last_updated": datetime.now().isoformat(),
+                "retrieval": {
+                    "reused": prior is not None,
+                    "reused_similarity": round(prior.similarity, 4) if prior else None,
+                    "reused_from": datetime.fromtimestamp(prior.saved_at).isoformat() if prior else None,
+                    "context": [
+                        {"company": item.company, "agent": item.agent, "insight": item.text,
+                         "similarity": round(item.similarity, 4)}
+                        for item in context
+                    ]
+                }
             }
             
             # Generate meta-insights
             insights = self._generate_meta_insights(data)
             
-            execution_time = int((time.time() - start_time) * 1000)
+            execution_time = int((time.perf_counter() - start_time) * 1000)
             
             output = self._create_output(
                 status="success",
@@ -93,8 +127,8 @@ class InsightSynthesizerAgent(BaseAgent):
             return output
             
         except Exception as e:
-            execution_time = int((time.time() - start_time) * 1000)
-            self.logger.error(f"Error in InsightSynthesizerAgent: {str(e)}")
+            execution_time = int((time.perf_counter() - start_time) * 1000)
+            self.logger.error("Error in InsightSynthesizerAgent: %s", e)
             
             return self._create_output(
                 status="error",
@@ -105,15 +139,29 @@ class InsightSynthesizerAgent(BaseAgent):
                 error_message=str(e)
             )
     
+    @subcall
+    async def _retrieve_prior(self, company_name: str, combined_data: Dict[str, Any]) -> Optional[Retrieval]:
+        """Closest earlier synthesis for this company and the nearest past insights"""
+        if self.vector_index is None:
+            return None
+        return await self.vector_index.retrieve(
+            company_name,
+            combined_data,
+            top_k=settings.RETRIEVAL_TOP_K,
+            max_age_seconds=settings.SYNTHESIS_REUSE_MAX_AGE_HOURS * 3600
+        )
+    
+    @subcall
     async def _generate_executive_summary(
         self,
         company_name: str,
-        combined_data: Dict[str, Any]
+        combined_data: Dict[str, Any],
+        context: Optional[List[RetrievedInsight]] = None
     ) -> str:
         """Generate executive summary using LLM or template"""
         
         if self.use_llm:
-            return await self._generate_llm_summary(company_name, combined_data)
+            return await self._generate_llm_summary(company_name, combined_data, context or [])
         else:
             # Fallback template for demo
             await asyncio.sleep(0.4)
@@ -122,7 +170,8 @@ class InsightSynthesizerAgent(BaseAgent):
     async def _generate_llm_summary(
         self,
         company_name: str,
-        combined_data: Dict[str, Any]
+        combined_data: Dict[str, Any],
+        context: List[RetrievedInsight]
     ) -> str:
         """Generate executive summary using LLM"""
         
@@ -145,6 +194,13 @@ Focus on:
 
 Be specific, data-driven, and action-oriented. Format with clear sections using markdown."""
 
+        # Earlier findings for this company or similar ones, so the brief builds on them
+        prior_context = ""
+        if context:
+            prior_context = "\n**Prior Context (earlier briefs, this and similar companies):**\n" + "\n".join(
+                f"• [{item.company}] {item.text}" for item in context
+            ) + "\n"
+        
         user_prompt = f"""Generate an executive summary for a sales meeting with {company_name}.
 
 **Research Intelligence:**
@@ -158,7 +214,7 @@ Be specific, data-driven, and action-oriented. Format with clear sections using
 
 **Social Media Sentiment:**
 {chr(10).join(f"• {insight}" for insight in social_insights[:6])}
-
+{prior_context}
 Create a comprehensive executive brief that a sales rep can use to prepare for a meeting. 
 Keep it under 400 words but information-dense."""
 
@@ -171,7 +227,7 @@ Keep it under 400 words but information-dense."""
             )
             return response
         except Exception as e:
-            logger.error(f"LLM generation failed: {e}")
+            logger.error("LLM generation failed: %s", e)
             return self._generate_template_summary(company_name, combined_data)
     
     def _generate_template_summary(
@@ -215,6 +271,7 @@ _Note: Configure OPENAI_API_KEY or ANTHROPIC_API_KEY in .env for AI-powered pers
         
         return summary
     
+    @subcall
     async def _generate_talking_points(self, combined_data: Dict[str, Any]) -> List[str]:
         """Generate key talking points for the meeting"""
         
@@ -271,7 +328,7 @@ Return only a JSON array of 5-7 talking point strings."""
             return [p for p in points if len(p) > 20][:7]
             
         except Exception as e:
-            logger.error(f"LLM talking points failed: {e}")
+            logger.error("LLM talking points failed: %s", e)
             return self._get_template_talking_points()
     
     def _get_template_talking_points(self) -> List[str]:
@@ -286,6 +343,7 @@ Return only a JSON array of 5-7 talking point strings."""
             "Your CTO's Microsoft background suggests appreciation for enterprise-grade solutions"
         ]
     
+    @subcall
     async def _generate_action_items(self, combined_data: Dict[str, Any]) -> List[Dict[str, str]]:
         """Generate recommended action items"""
         await asyncio.sleep(0.2)
@@ -318,6 +376,7 @@ Return only a JSON array of 5-7 talking point strings."""
             }
         ]
     
+    @subcall
     async def _identify_opportunities(self, combined_data: Dict[str, Any]) -> List[Dict[str, str]]:
         """Identify sales opportunities"""
         await asyncio.sleep(0.2)
@@ -349,6 +408,7 @@ Return only a JSON array of 5-7 talking point strings."""
             }
         ]
     
+    @subcall
     async def _identify_risks(self, combined_data: Dict[str, Any]) -> List[Dict[str, str]]:
         """Identify potential risks"""
         await asyncio.sleep(0.2)
@@ -4,7 +4,8 @@ Monitors and collects industry news, company announcements, and market trends
 """
 
 import asyncio
-from typing import Dict, Any, List
+from contextlib import aclosing
+from typing import Dict, Any, List, Optional
 import time
 from datetime import datetime, timedelta
 import os
@@ -13,13 +14,23 @@ import sys
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from agents.base_agent import BaseAgent, AgentInput, AgentOutput
-from services.data_sources_service import get_data_sources_service
+from agents.base_agent import BaseAgent, AgentInput, AgentResult, subcall
+from services.data_sources_service import get_data_sources_service, NewsQuotaUsage
+from services.news_ranking_service import get_news_ranking_service
+from services.sentiment_timeseries import get_sentiment_store
+from services.resilience import LIVE, FALLBACK
+from core.config import settings
+from core.process_pool import get_process_pool
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _article_key(article: Dict[str, Any]) -> str:
+    # Ranking may run in another process, so articles come back as copies
+    return article.get("url") or article.get("title") or ""
+
+
 class NewsAgent(BaseAgent):
     """Agent for collecting and analyzing news"""
     
@@ -29,20 +40,26 @@ class NewsAgent(BaseAgent):
             description="Monitors industry news, company announcements, and press releases"
         )
         self.data_sources = get_data_sources_service()
+        self.ranker = get_news_ranking_service()
+        self.sentiment_store = get_sentiment_store()
     
-    async def execute(self, input_data: AgentInput) -> AgentOutput:
+    async def execute(self, input_data: AgentInput) -> AgentResult:
         """Execute news collection for target company"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             await self.validate_input(input_data)
             
-            self.logger.info(f"Collecting news for {input_data.company_name}")
+            self.logger.info("Collecting news for %s", input_data.company_name)
             
             # Collect news from different sources
+            news_quota = NewsQuotaUsage()
             company_news = await self._fetch_company_news(
                 input_data.company_name,
-                input_data.timeframe_days
+                input_data.timeframe_days,
+                input_data.context or {},
+                news_quota,
+                batch=input_data.priority == "low"
             )
             industry_news = await self._fetch_industry_news(input_data.company_name)
             press_releases = await self._fetch_press_releases(input_data.company_name)
@@ -53,13 +70,18 @@ class NewsAgent(BaseAgent):
                 "industry_news": industry_news,
                 "press_releases": press_releases,
                 "total_articles": len(company_news) + len(industry_news),
+                "news_quota": news_quota.to_dict(),
+                "sentiment_trend": self.sentiment_store.summary(
+                    input_data.company_name,
+                    input_data.timeframe_days
+                ),
                 "last_updated": datetime.now().isoformat()
             }
             
             # Generate insights
             insights = self._generate_insights(data)
             
-            execution_time = int((time.time() - start_time) * 1000)
+            execution_time = int((time.perf_counter() - start_time) * 1000)
             
             output = self._create_output(
                 status="success",
@@ -73,8 +95,8 @@ class NewsAgent(BaseAgent):
             return output
             
         except Exception as e:
-            execution_time = int((time.time() - start_time) * 1000)
-            self.logger.error(f"Error in NewsAgent: {str(e)}")
+            execution_time = int((time.perf_counter() - start_time) * 1000)
+            self.logger.error("Error in NewsAgent: %s", e)
             
             return self._create_output(
                 status="error",
@@ -85,15 +107,45 @@ class NewsAgent(BaseAgent):
                 error_message=str(e)
             )
     
-    async def _fetch_company_news(self, company_name: str, days: int) -> List[Dict[str, Any]]:
-        """Fetch news articles mentioning the company"""
+    @subcall
+    async def _fetch_company_news(
+        self,
+        company_name: str,
+        days: int,
+        context: Dict[str, Any],
+        usage: Optional[NewsQuotaUsage] = None,
+        batch: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Fetch news articles mentioning the company, best matches first"""
         
         # Try to fetch real news from NewsAPI
         try:
-            articles = await self.data_sources.search_company_news(company_name, days)
+            if batch:
+                # Low-priority work shares OR queries with other companies to save quota
+                articles = await self.data_sources.search_company_news_coalesced(
+                    company_name, days, aliases=context.get("aliases") or []
+                )
+                ranked = await get_process_pool().run_sized(
+                    len(articles),
+                    self.ranker.rank,
+                    articles,
+                    company_name,
+                    context.get("aliases") or [],
+                    [context["industry"]] if context.get("industry") else [],
+                    settings.NEWS_TOP_K
+                )
+            else:
+                ranked = await self._stream_ranked_news(company_name, days, context, usage)
             
-            if articles and len(articles) > 0:
-                # Use real data
+            if ranked:
+                self.sentiment_store.ingest(company_name, (
+                    {
+                        "id": article.get("url") or article.get("title"),
+                        "timestamp": article.get("published_at"),
+                        "score": article.get("sentiment")
+                    }
+                    for _, article in ranked
+                ))
                 return [{
                     "title": article.get("title", ""),
                     "source": article.get("source", "Unknown"),
@@ -101,11 +153,12 @@ class NewsAgent(BaseAgent):
                     "url": article.get("url", ""),
                     "summary": article.get("description", ""),
                     "sentiment": "positive" if article.get("sentiment", 0) > 0.2 else "neutral" if article.get("sentiment", 0) > -0.2 else "negative",
-                    "relevance_score": 0.85
-                } for article in articles[:10]]
+                    "relevance_score": round(score, 3),
+                    "provenance": article.get("provenance", LIVE)
+                } for score, article in ranked]
             
         except Exception as e:
-            logger.warning(f"Failed to fetch real news, using mock data: {e}")
+            logger.warning("Failed to fetch real news, using mock data: %s", e)
         
         # Fallback to mock data
         await asyncio.sleep(0.6)
@@ -117,7 +170,8 @@ class NewsAgent(BaseAgent):
                 "url": "https://economictimes.com/article/12345",
                 "summary": f"{company_name} is expanding operations to Singapore and Malaysia, targeting enterprise customers in fintech sector.",
                 "sentiment": "positive",
-                "relevance_score": 0.95
+                "relevance_score": 0.95,
+                "provenance": FALLBACK
             },
             {
                 "title": f"{company_name} Partners with Microsoft Azure for Cloud Services",
@@ -126,7 +180,8 @@ class NewsAgent(BaseAgent):
                 "url": "https://techcrunch.com/article/67890",
                 "summary": "Strategic partnership announced to enhance cloud infrastructure and AI capabilities.",
                 "sentiment": "positive",
-                "relevance_score": 0.88
+                "relevance_score": 0.88,
+                "provenance": FALLBACK
             },
             {
                 "title": f"{company_name} Launches New AI Analytics Platform",
@@ -135,7 +190,8 @@ class NewsAgent(BaseAgent):
                 "url": "https://yourstory.com/article/24680",
                 "summary": "New product launch aimed at mid-market enterprises with advanced analytics capabilities.",
                 "sentiment": "positive",
-                "relevance_score": 0.92
+                "relevance_score": 0.92,
+                "provenance": FALLBACK
             },
             {
                 "title": f"Industry Report: {company_name} Gains Market Share in BFSI Sector",
@@ -144,10 +200,72 @@ class NewsAgent(BaseAgent):
                 "url": "https://business-standard.com/article/13579",
                 "summary": "Analyst report shows 15% market share growth in banking and financial services sector.",
                 "sentiment": "positive",
-                "relevance_score": 0.85
+                "relevance_score": 0.85,
+                "provenance": FALLBACK
             }
         ]
     
+    async def _stream_ranked_news(
+        self,
+        company_name: str,
+        days: int,
+        context: Dict[str, Any],
+        usage: Optional[NewsQuotaUsage]
+    ) -> List[tuple]:
+        """
+        Rank streamed articles page by page, keeping only the running top-k
+        
+        Memory stays bounded by top_k plus one page. Once top_k articles are
+        held, the stream is abandoned after the first page that changes
+        nothing in them (NewsAPI returns best matches first, so later pages
+        rarely do), or as soon as all of them clear the high-relevance
+        threshold.
+        """
+        top_k = settings.NEWS_TOP_K
+        page_size = settings.NEWS_FETCH_PAGE_SIZE
+        aliases = context.get("aliases") or []
+        industry_terms = [context["industry"]] if context.get("industry") else []
+        
+        pool = get_process_pool()
+        ranked: List[tuple] = []
+        buffer: List[Dict[str, Any]] = []
+        
+        async def merge():
+            # Scoring is pure CPU work; only a large merge is worth shipping to the process pool
+            candidates = [article for _, article in ranked] + buffer
+            buffer.clear()
+            return await pool.run_sized(
+                len(candidates), self.ranker.rank, candidates, company_name, aliases, industry_terms, top_k
+            )
+        
+        stream = self.data_sources.stream_company_news(
+            company_name,
+            days,
+            max_articles=settings.NEWS_STREAM_MAX_ARTICLES,
+            time_budget_seconds=settings.NEWS_STREAM_TIME_BUDGET_SECONDS,
+            page_size=page_size,
+            max_concurrency=settings.NEWS_STREAM_CONCURRENCY,
+            usage=usage
+        )
+        async with aclosing(stream):
+            async for article in stream:
+                buffer.append(article)
+                if len(buffer) < page_size:
+                    continue
+                previous = {_article_key(article) for _, article in ranked}
+                ranked = await merge()
+                if len(ranked) < top_k:
+                    continue
+                stable = {_article_key(article) for _, article in ranked} == previous
+                strong = sum(1 for score, _ in ranked if score >= settings.NEWS_HIGH_RELEVANCE_THRESHOLD)
+                if stable or strong >= top_k:
+                    break
+        
+        if buffer:
+            ranked = await merge()
+        return ranked
+    
+    @subcall
     async def _fetch_industry_news(self, company_name: str) -> List[Dict[str, Any]]:
         """Fetch relevant industry news"""
         await asyncio.sleep(0.4)
@@ -173,6 +291,7 @@ class NewsAgent(BaseAgent):
             }
         ]
     
+    @subcall
     async def _fetch_press_releases(self, company_name: str) -> List[Dict[str, Any]]:
         """Fetch company press releases"""
         await asyncio.sleep(0.3)
@@ -3,18 +3,24 @@ Agent Orchestrator
 Coordinates multiple agents and manages their execution
 """
 
+import math
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import time
 from datetime import datetime
 import logging
 
-from agents.base_agent import AgentInput, AgentOutput
+from agents.base_agent import AgentInput, AgentResult
 from agents.research_agent import ResearchAgent
 from agents.news_agent import NewsAgent
 from agents.financial_agent import FinancialAgent
 from agents.social_media_agent import SocialMediaAgent
 from agents.insight_synthesizer import InsightSynthesizerAgent
+from services.insight_store import get_insight_store
+from services.latency_stats import get_latency_stats, deadline_var, AGENT
+from core.config import settings
+from core.metrics import AGENT_PLAN_DECISIONS
+from core.tracing import traced, current_span
 
 logger = logging.getLogger(__name__)
 
@@ -28,30 +34,60 @@ class AgentOrchestrator:
         self.financial_agent = FinancialAgent()
         self.social_media_agent = SocialMediaAgent()
         self.insight_synthesizer = InsightSynthesizerAgent()
+        self.insight_store = get_insight_store()
+        
+        # Data collection agents by output key
+        self.data_agents = {
+            "research": self.research_agent,
+            "news": self.news_agent,
+            "financial": self.financial_agent,
+            "social_media": self.social_media_agent
+        }
         
         self.logger = logging.getLogger("orchestrator")
     
+    @traced("orchestrator.gather_insights")
     async def gather_insights(
         self,
         company_name: str,
         context: Optional[Dict[str, Any]] = None,
         timeframe_days: int = 30,
-        priority: str = "medium"
+        priority: str = "medium",
+        reuse_cached: bool = True,
+        deadline_seconds: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Orchestrate all agents to gather comprehensive insights
         
+        Data agents whose last output is still fresh (see _plan) are not
+        re-run; their cached output is merged in and synthesis runs over the
+        combination. The result's "freshness" says which parts were which.
+        
+        The rest run slowest first within a deadline (AGENT_TIMEOUT_SECONDS by
+        default); OPTIONAL_AGENTS that will not fit are skipped or cancelled
+        rather than holding up the response (see _run_agents).
+        
         Args:
             company_name: Name of the target company
             context: Additional context for agents
             timeframe_days: Data collection timeframe
             priority: Priority level (low, medium, high)
+            reuse_cached: Set False to run every agent regardless of cached outputs
+            deadline_seconds: Time budget for the whole request
             
         Returns:
             Dict containing all agent outputs and synthesized insights
         """
-        start_time = time.time()
-        self.logger.info(f"🚀 Starting insight gathering for {company_name}")
+        start_time = time.perf_counter()
+        deadline = time.monotonic() + (deadline_seconds or settings.AGENT_TIMEOUT_SECONDS)
+        # Upstream calls made on behalf of this request cap their timeouts at the deadline
+        deadline_token = deadline_var.set(deadline)
+        self.logger.info("🚀 Starting insight gathering for %s", company_name)
+        current_span().set_attributes({
+            "company.name": company_name,
+            "priority": priority,
+            "timeframe_days": timeframe_days
+        })
         
         try:
             # Create input for agents
@@ -62,30 +98,39 @@ class AgentOrchestrator:
                 priority=priority
             )
             
+            # Context changes what agents collect, so outputs gathered without it do not apply
+            cached = self._plan(company_name, timeframe_days) if reuse_cached and not context else {}
+            to_run = [name for name in self.data_agents if name not in cached]
+            current_span().set_attribute("agents.reused", ",".join(cached))
+            
             # Execute data collection agents in parallel
-            self.logger.info("[DATA] Executing data collection agents...")
-            research_output, news_output, financial_output, social_output = await asyncio.gather(
-                self.research_agent.execute(agent_input),
-                self.news_agent.execute(agent_input),
-                self.financial_agent.execute(agent_input),
-                self.social_media_agent.execute(agent_input),
-                return_exceptions=True
+            self.logger.info(
+                "[DATA] Executing data collection agents: %s (cached: %s)",
+                ", ".join(to_run) or "none", ", ".join(cached) or "none"
             )
+            outputs, dropped = await self._run_agents(to_run, agent_input, deadline)
+            collected_at = time.time()
             
             # Handle any exceptions
             agent_outputs = {}
-            for name, output in [
-                ("research", research_output),
-                ("news", news_output),
-                ("financial", financial_output),
-                ("social_media", social_output)
-            ]:
+            freshness = {}
+            for name, (output, output_collected_at) in cached.items():
+                agent_outputs[name] = output
+                freshness[name] = {
+                    "source": "cached",
+                    "collected_at": output_collected_at,
+                    "age_seconds": round(collected_at - output_collected_at)
+                }
+            for name, decision in dropped.items():
+                agent_outputs[name] = None
+                freshness[name] = {"source": decision, "collected_at": None, "age_seconds": None}
+            for name, output in outputs.items():
+                freshness[name] = {"source": "fresh", "collected_at": collected_at, "age_seconds": 0}
                 if isinstance(output, Exception):
-                    self.logger.error(f"Error in {name} agent: {str(output)}")
+                    self.logger.error("Error in %s agent: %s", name, output)
                     agent_outputs[name] = None
-                elif output and isinstance(output, AgentOutput):
-                    # Use model_dump for Pydantic v2, dict for v1
-                    agent_outputs[name] = output.model_dump() if hasattr(output, 'model_dump') else output.dict()
+                elif isinstance(output, AgentResult):
+                    agent_outputs[name] = output.to_dict()
                 else:
                     agent_outputs[name] = None
             
@@ -93,15 +138,16 @@ class AgentOrchestrator:
             self.logger.info("[SYNTHESIS] Synthesizing insights...")
             synthesis_input = AgentInput(
                 company_name=company_name,
-                context={"agent_outputs": agent_outputs},
+                # A refresh asks for new writing too, not just new data
+                context={"agent_outputs": agent_outputs, "reuse_prior": reuse_cached and not context},
                 timeframe_days=timeframe_days,
                 priority=priority
             )
             
-            synthesis_output = await self.insight_synthesizer.execute(synthesis_input)
+            synthesis_output = await self.insight_synthesizer.run(synthesis_input)
             
             # Calculate total execution time
-            total_time = int((time.time() - start_time) * 1000)
+            total_time = int((time.perf_counter() - start_time) * 1000)
             
             # Compile final result
             result = {
@@ -109,17 +155,22 @@ class AgentOrchestrator:
                 "status": "success",
                 "timestamp": datetime.now().isoformat(),
                 "execution_time_ms": total_time,
-                "agent_outputs": agent_outputs,
-                "synthesis": synthesis_output.dict() if hasattr(synthesis_output, 'dict') else synthesis_output,
+                "timeframe_days": timeframe_days,
+                "agent_outputs": {name: agent_outputs.get(name) for name in self.data_agents},
+                "freshness": freshness,
+                "synthesis": synthesis_output.to_dict(),
                 "summary": self._create_summary(agent_outputs, synthesis_output)
             }
             
-            self.logger.info(f"[SUCCESS] Insight gathering completed in {total_time}ms")
+            await self.insight_store.save(result)
+            
+            self.logger.info("[SUCCESS] Insight gathering completed in %sms", total_time)
             return result
             
         except Exception as e:
-            total_time = int((time.time() - start_time) * 1000)
-            self.logger.error(f"❌ Error in orchestration: {str(e)}")
+            total_time = int((time.perf_counter() - start_time) * 1000)
+            self.logger.error("❌ Error in orchestration: %s", e)
+            current_span().set_attribute("error", str(e))
             
             return {
                 "company_name": company_name,
@@ -128,14 +179,82 @@ class AgentOrchestrator:
                 "execution_time_ms": total_time,
                 "error": str(e)
             }
+        finally:
+            deadline_var.reset(deadline_token)
     
+    async def _run_agents(
+        self,
+        names: List[str],
+        agent_input: AgentInput,
+        deadline: float
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Run data agents slowest first, dropping optional ones the deadline cannot fit
+        
+        Agents are started in order of their expected latency (unknown counts
+        as slowest), so the long upstream calls go out, and queue for rate-limit
+        slots, first. Collection gets the time left before the deadline less
+        what synthesis usually takes. An optional agent expected to overrun it
+        is not started; one still running when it runs out is cancelled.
+        Essential agents are always awaited; their upstream timeouts are
+        already capped by the deadline.
+        
+        Returns:
+            (outputs, dropped): result or exception per agent that finished, and
+            "skipped" or "cancelled" per optional agent that was dropped
+        """
+        stats = get_latency_stats()
+        budget = deadline - time.monotonic() - (stats.expected(AGENT, self.insight_synthesizer.name) or 0.0)
+        order = sorted(
+            names,
+            key=lambda name: stats.expected(AGENT, self.data_agents[name].name) or math.inf,
+            reverse=True
+        )
+        
+        dropped: Dict[str, str] = {}
+        for name in order:
+            expected = stats.expected(AGENT, self.data_agents[name].name)
+            if name in settings.OPTIONAL_AGENTS and expected is not None and expected > budget:
+                dropped[name] = "skipped"
+        
+        tasks = {
+            name: asyncio.create_task(self.data_agents[name].run(agent_input))
+            for name in order if name not in dropped
+        }
+        started = time.perf_counter()
+        try:
+            if tasks:
+                await asyncio.wait(tasks.values(), timeout=max(budget, 0.0))
+            for name, task in tasks.items():
+                if not task.done() and name in settings.OPTIONAL_AGENTS:
+                    task.cancel()
+                    dropped[name] = "cancelled"
+                    # Only a lower bound, but without it a habitually slow agent would never be skipped
+                    stats.record(AGENT, self.data_agents[name].name, time.perf_counter() - started, False)
+            results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        finally:
+            # Reached with tasks still running only if this request was cancelled
+            for task in tasks.values():
+                task.cancel()
+        
+        for name in order:
+            decision = dropped.get(name, "run")
+            AGENT_PLAN_DECISIONS.inc(self.data_agents[name].name, decision)
+            if decision != "run":
+                self.logger.warning("[DATA] %s agent %s to meet the deadline", name, decision)
+        
+        outputs = {name: result for name, result in zip(tasks, results) if name not in dropped}
+        return outputs, dropped
+    
+    @traced("orchestrator.quick_brief")
     async def quick_brief(self, company_name: str) -> Dict[str, Any]:
         """
         Generate a quick brief (faster, less comprehensive)
         Only runs essential agents
         """
-        start_time = time.time()
-        self.logger.info(f"⚡ Generating quick brief for {company_name}")
+        start_time = time.perf_counter()
+        self.logger.info("⚡ Generating quick brief for %s", company_name)
+        current_span().set_attribute("company.name", company_name)
         
         try:
             agent_input = AgentInput(
@@ -146,11 +265,11 @@ class AgentOrchestrator:
             
             # Run only essential agents
             research_output, news_output = await asyncio.gather(
-                self.research_agent.execute(agent_input),
-                self.news_agent.execute(agent_input)
+                self.research_agent.run(agent_input),
+                self.news_agent.run(agent_input)
             )
             
-            total_time = int((time.time() - start_time) * 1000)
+            total_time = int((time.perf_counter() - start_time) * 1000)
             
             return {
                 "company_name": company_name,
@@ -158,13 +277,14 @@ class AgentOrchestrator:
                 "type": "quick_brief",
                 "timestamp": datetime.now().isoformat(),
                 "execution_time_ms": total_time,
-                "research": research_output.dict() if hasattr(research_output, 'dict') else research_output,
-                "news": news_output.dict() if hasattr(news_output, 'dict') else news_output
+                "research": research_output.to_dict(),
+                "news": news_output.to_dict()
             }
             
         except Exception as e:
-            total_time = int((time.time() - start_time) * 1000)
-            self.logger.error(f"Error in quick brief: {str(e)}")
+            total_time = int((time.perf_counter() - start_time) * 1000)
+            self.logger.error("Error in quick brief: %s", e)
+            current_span().set_attribute("error", str(e))
             return {
                 "company_name": company_name,
                 "status": "error",
@@ -172,7 +292,43 @@ class AgentOrchestrator:
                 "error": str(e)
             }
     
-    def _create_summary(self, agent_outputs: Dict[str, Any], synthesis: Any) -> Dict[str, Any]:
+    def _plan(self, company_name: str, timeframe_days: int) -> Dict[str, Tuple[Dict[str, Any], float]]:
+        """
+        Cached outputs still fresh enough to skip their agents
+        
+        Walks the company's stored results newest first and takes, per agent,
+        the latest successful output collected for the same timeframe. It is
+        reused while younger than the agent's AGENT_MAX_AGE_SECONDS entry
+        (CACHE_TTL_HOURS for agents without one). Age counts from when the
+        output was collected, not from when a later result reused it.
+        
+        Returns:
+            Agent key -> (output, collected_at) for the agents to skip
+        """
+        if not settings.ENABLE_CACHING:
+            return {}
+        
+        now = time.time()
+        plan: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        for entry in self.insight_store.history_entries(company_name, self.insight_store.history_limit):
+            if entry.result.get("timeframe_days") != timeframe_days:
+                continue
+            outputs = entry.result.get("agent_outputs") or {}
+            freshness = entry.result.get("freshness") or {}
+            for name in self.data_agents:
+                output = outputs.get(name)
+                if name in plan or not output or output.get("status") != "success":
+                    continue
+                output_collected_at = (freshness.get(name) or {}).get("collected_at", entry.saved_at)
+                max_age = settings.AGENT_MAX_AGE_SECONDS.get(name, settings.CACHE_TTL_HOURS * 3600)
+                if now - output_collected_at < max_age:
+                    plan[name] = (output, output_collected_at)
+        
+        for name in plan:
+            AGENT_PLAN_DECISIONS.inc(self.data_agents[name].name, "reuse")
+        return plan
+    
+    def _create_summary(self, agent_outputs: Dict[str, Any], synthesis: AgentResult) -> Dict[str, Any]:
         """Create a high-level summary of results"""
         
         # Count successful agents
@@ -185,12 +341,10 @@ class AgentOrchestrator:
             if output and output.get("insights"):
                 all_insights.extend(output["insights"][:2])  # Top 2 from each
         
-        synthesis_data = synthesis.dict() if hasattr(synthesis, 'dict') else synthesis
-        
         return {
             "data_completeness": f"{successful_agents}/{total_agents} agents successful",
             "top_insights": all_insights[:5],
-            "preparation_score": synthesis_data.get("data", {}).get("meeting_preparation_score", {}),
+            "preparation_score": synthesis.data.get("meeting_preparation_score", {}),
             "ready_for_meeting": successful_agents >= 3
         }
     
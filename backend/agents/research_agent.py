@@ -8,7 +8,7 @@ from typing import Dict, Any, List
 import time
 from datetime import datetime
 
-from agents.base_agent import BaseAgent, AgentInput, AgentOutput
+from agents.base_agent import BaseAgent, AgentInput, AgentResult, subcall
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,14 +23,14 @@ class ResearchAgent(BaseAgent):
             description="Gathers company background, products, services, and key personnel"
         )
     
-    async def execute(self, input_data: AgentInput) -> AgentOutput:
+    async def execute(self, input_data: AgentInput) -> AgentResult:
         """Execute research on target company"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             await self.validate_input(input_data)
             
-            self.logger.info(f"Starting research for {input_data.company_name}")
+            self.logger.info("Starting research for %s", input_data.company_name)
             
             # Simulate API calls and web scraping
             company_info = await self._gather_company_info(input_data.company_name)
@@ -48,7 +48,7 @@ class ResearchAgent(BaseAgent):
             # Generate insights
             insights = self._generate_insights(data)
             
-            execution_time = int((time.time() - start_time) * 1000)
+            execution_time = int((time.perf_counter() - start_time) * 1000)
             
             output = self._create_output(
                 status="success",
@@ -62,8 +62,8 @@ class ResearchAgent(BaseAgent):
             return output
             
         except Exception as e:
-            execution_time = int((time.time() - start_time) * 1000)
-            self.logger.error(f"Error in ResearchAgent: {str(e)}")
+            execution_time = int((time.perf_counter() - start_time) * 1000)
+            self.logger.error("Error in ResearchAgent: %s", e)
             
             return self._create_output(
                 status="error",
@@ -74,6 +74,7 @@ class ResearchAgent(BaseAgent):
                 error_message=str(e)
             )
     
+    @subcall
     async def _gather_company_info(self, company_name: str) -> Dict[str, Any]:
         """Gather basic company information"""
         # Simulate API call delay
@@ -92,6 +93,7 @@ class ResearchAgent(BaseAgent):
             "funding": "Series B - $45M raised"
         }
     
+    @subcall
     async def _identify_decision_makers(self, company_name: str) -> List[Dict[str, Any]]:
         """Identify key decision-makers"""
         await asyncio.sleep(0.3)
@@ -125,6 +127,7 @@ class ResearchAgent(BaseAgent):
             }
         ]
     
+    @subcall
     async def _research_offerings(self, company_name: str) -> Dict[str, Any]:
         """Research company's products and services"""
         await asyncio.sleep(0.4)
@@ -9,7 +9,12 @@ import time
 from datetime import datetime, timedelta
 import random
 
-from agents.base_agent import BaseAgent, AgentInput, AgentOutput
+from agents.base_agent import BaseAgent, AgentInput, AgentResult, subcall
+from services.rate_limiter import get_rate_limiter, lane_for, RateLimitExceeded
+from services.data_sources_service import get_data_sources_service, score_sentiment
+from services.sentiment_timeseries import get_sentiment_store
+from core.config import settings
+from core.process_pool import get_process_pool
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,20 +28,29 @@ class SocialMediaAgent(BaseAgent):
             name="SocialMediaAgent",
             description="Tracks LinkedIn, Twitter/X activity and engagement metrics"
         )
+        self.rate_limiter = get_rate_limiter()
+        self.data_sources = get_data_sources_service()
+        self.sentiment_store = get_sentiment_store()
     
-    async def execute(self, input_data: AgentInput) -> AgentOutput:
+    async def execute(self, input_data: AgentInput) -> AgentResult:
         """Execute social media monitoring"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             await self.validate_input(input_data)
             
-            self.logger.info(f"Monitoring social media for {input_data.company_name}")
+            self.logger.info("Monitoring social media for %s", input_data.company_name)
             
             # Collect social media data
-            linkedin_data = await self._fetch_linkedin_data(input_data.company_name)
-            twitter_data = await self._fetch_twitter_data(input_data.company_name)
-            sentiment_analysis = await self._analyze_sentiment(input_data.company_name)
+            lane = lane_for(input_data.priority)
+            linkedin_data = await self._fetch_linkedin_data(input_data.company_name, lane)
+            twitter_data = await self._fetch_twitter_data(input_data.company_name, lane)
+            sentiment_analysis = await self._analyze_sentiment(
+                input_data.company_name,
+                input_data.timeframe_days,
+                linkedin_data,
+                twitter_data
+            )
             
             # Compile data
             data = {
@@ -49,7 +63,7 @@ class SocialMediaAgent(BaseAgent):
             # Generate insights
             insights = self._generate_insights(data)
             
-            execution_time = int((time.time() - start_time) * 1000)
+            execution_time = int((time.perf_counter() - start_time) * 1000)
             
             output = self._create_output(
                 status="success",
@@ -63,8 +77,8 @@ class SocialMediaAgent(BaseAgent):
             return output
             
         except Exception as e:
-            execution_time = int((time.time() - start_time) * 1000)
-            self.logger.error(f"Error in SocialMediaAgent: {str(e)}")
+            execution_time = int((time.perf_counter() - start_time) * 1000)
+            self.logger.error("Error in SocialMediaAgent: %s", e)
             
             return self._create_output(
                 status="error",
@@ -75,8 +89,11 @@ class SocialMediaAgent(BaseAgent):
                 error_message=str(e)
             )
     
-    async def _fetch_linkedin_data(self, company_name: str) -> Dict[str, Any]:
+    @subcall
+    async def _fetch_linkedin_data(self, company_name: str, lane: str) -> Dict[str, Any]:
         """Fetch LinkedIn company data"""
+        if settings.LINKEDIN_ACCESS_TOKEN:
+            await self._pace("linkedin", lane)
         await asyncio.sleep(0.6)
         
         # In production: Use LinkedIn API or scraping
@@ -121,8 +138,11 @@ class SocialMediaAgent(BaseAgent):
             }
         }
     
-    async def _fetch_twitter_data(self, company_name: str) -> Dict[str, Any]:
+    @subcall
+    async def _fetch_twitter_data(self, company_name: str, lane: str) -> Dict[str, Any]:
         """Fetch Twitter/X data"""
+        if settings.TWITTER_BEARER_TOKEN:
+            await self._pace("twitter", lane)
         await asyncio.sleep(0.5)
         
         # In production: Use Twitter API v2
@@ -158,18 +178,51 @@ class SocialMediaAgent(BaseAgent):
             }
         }
     
-    async def _analyze_sentiment(self, company_name: str) -> Dict[str, Any]:
-        """Analyze overall social media sentiment"""
-        await asyncio.sleep(0.3)
+    async def _pace(self, provider: str, lane: str) -> bool:
+        """Wait for a rate-limit slot before a real API call; False when over budget"""
+        try:
+            await self.rate_limiter.acquire(provider, lane)
+            return True
+        except RateLimitExceeded as e:
+            self.logger.warning("%s - using cached profile data", e)
+            return False
+    
+    @subcall
+    async def _analyze_sentiment(
+        self,
+        company_name: str,
+        timeframe_days: int,
+        linkedin_data: Dict[str, Any],
+        twitter_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Analyze overall social media sentiment
+        
+        Only posts not seen before are scored; the rolling windows and trends
+        come from the company's sentiment time series.
+        """
+        posts = [
+            ("linkedin", post) for post in linkedin_data.get("company_page", {}).get("recent_posts", [])
+        ] + [
+            ("twitter", tweet) for tweet in twitter_data.get("recent_tweets", [])
+        ]
+        mentions = [
+            {
+                # Content identifies a post; demo timestamps move with every call
+                "id": f"{platform}:{post.get('content', '')}",
+                "timestamp": post.get("date"),
+                "text": post.get("content", "")
+            }
+            for platform, post in posts
+        ]
+        unscored = [mention for mention in self.sentiment_store.unseen(company_name, mentions) if mention["text"]]
+        scores = await get_process_pool().map(score_sentiment, [mention["text"] for mention in unscored])
+        for mention, score in zip(unscored, scores):
+            mention["score"] = score
+        self.sentiment_store.ingest(company_name, mentions)
         
         return {
-            "overall_sentiment": "Positive",
-            "sentiment_score": 0.72,  # -1 to 1 scale
-            "sentiment_breakdown": {
-                "positive": 68,
-                "neutral": 25,
-                "negative": 7
-            },
+            **self.sentiment_store.summary(company_name, timeframe_days),
             "trending_topics": [
                 "AI Innovation",
                 "Cloud Partnership",
@@ -190,7 +243,16 @@ class SocialMediaAgent(BaseAgent):
         twitter = data.get("twitter", {})
         
         insights.append(f"📱 Strong social presence: Active on LinkedIn (4.2% engagement) and Twitter")
-        insights.append("😊 Positive brand sentiment: 72% sentiment score with 68% positive mentions")
+        if sentiment.get("mentions"):
+            insights.append(
+                f"😊 {sentiment['overall_sentiment']} brand sentiment: {sentiment['sentiment_score']:.2f} score "
+                f"with {sentiment['sentiment_breakdown']['positive']}% positive mentions "
+                f"over {sentiment['timeframe_days']} days"
+            )
+            trend = sentiment.get("trends", {}).get("30d", {})
+            if trend.get("score_delta") is not None:
+                direction = "improving" if trend["score_delta"] > 0 else "softening" if trend["score_delta"] < 0 else "steady"
+                insights.append(f"📊 Sentiment {direction} month over month ({trend['score_delta']:+.2f})")
         insights.append("🔥 Recent activity spike: Announcement and product launch driving engagement")
         insights.append("👥 Aggressive hiring: 45 open positions indicates growth phase")
         insights.append("🌟 Verified social accounts with engaged follower base")
@@ -0,0 +1,29 @@
+"""
+Shared API dependencies
+"""
+
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException, Request
+
+from agents.orchestrator import AgentOrchestrator
+from core.config import settings
+
+
+def get_orchestrator(request: Request) -> AgentOrchestrator:
+    """The orchestrator created once in the application lifespan"""
+    return request.app.state.orchestrator
+
+
+def is_admin(x_admin_token: Optional[str]) -> bool:
+    """True when the token matches the configured ADMIN_TOKEN"""
+    return bool(settings.ADMIN_TOKEN) and bool(x_admin_token) and secrets.compare_digest(
+        x_admin_token, settings.ADMIN_TOKEN
+    )
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Reject requests without a valid X-Admin-Token header (admin endpoints are off when unset)"""
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
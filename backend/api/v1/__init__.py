@@ -2,9 +2,10 @@
 API v1 Router
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from .endpoints import insights, companies, agents, health
+from api.deps import require_admin
+from .endpoints import insights, companies, agents, health, admin
 
 router = APIRouter()
 
@@ -12,3 +13,4 @@ router.include_router(health.router, prefix="/health", tags=["Health"])
 router.include_router(insights.router, prefix="/insights", tags=["Insights"])
 router.include_router(companies.router, prefix="/companies", tags=["Companies"])
 router.include_router(agents.router, prefix="/agents", tags=["Agents"])
+router.include_router(admin.router, prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
@@ -0,0 +1,110 @@
+"""
+Admin API Endpoints
+Profiling output, event-loop stalls, prefetch status, latency stats and market data refreshes (requires X-Admin-Token)
+"""
+
+import os
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+
+from core.profiling import get_profile_store, get_continuous_sampler, Profile
+from core.loop_monitor import get_loop_monitor
+from services.prefetch import get_prefetch_manager
+from services.latency_stats import get_latency_stats
+from services.market_data_service import get_market_data_service
+
+router = APIRouter()
+
+
+def _render(profile: Profile, format: str):
+    if format == "svg":
+        return Response(content=profile.flamegraph_svg(), media_type="image/svg+xml")
+    if format == "folded":
+        return PlainTextResponse(profile.folded())
+    return {"success": True, "data": profile.summary()}
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """Recent request profiles recorded by this worker, newest first"""
+    return {"success": True, "data": get_profile_store().list()}
+
+
+@router.get("/profiles/continuous")
+async def continuous_profile(
+    format: str = Query(default="json", pattern="^(json|svg|folded)$"),
+    reset: bool = False
+):
+    """
+    Hot stacks aggregated across all traffic since start (or the last reset)
+    
+    - **format**: json (top functions), svg (flamegraph) or folded (for flamegraph.pl/speedscope)
+    - **reset**: Clear the aggregate after reading it
+    """
+    sampler = get_continuous_sampler()
+    if sampler is None:
+        raise HTTPException(status_code=404, detail="Continuous profiling is disabled (PROFILING_CONTINUOUS_HZ)")
+    profile = sampler.profile()
+    if reset:
+        sampler.reset()
+    return _render(profile, format)
+
+
+@router.get("/loop")
+async def loop_stalls(recent: int = Query(default=10, ge=0, le=50)):
+    """
+    Event-loop lag percentiles and the most recent blocking calls, newest first
+    
+    Each stall carries the loop thread's stack while it was blocked and the
+    request id, agent and sub-call it ran under.
+    """
+    return {"success": True, "data": get_loop_monitor().snapshot(recent)}
+
+
+@router.get("/prefetch")
+async def prefetch_status():
+    """Speculative prefetches in flight, the hourly budget and the hit rate"""
+    return {"success": True, "data": get_prefetch_manager().snapshot()}
+
+
+@router.get("/latency")
+async def latency_stats():
+    """Weighted latency and success rate per agent and upstream source, with current source timeouts"""
+    return {"success": True, "data": get_latency_stats().snapshot()}
+
+
+@router.get("/market-data")
+async def market_data_status():
+    """Whether the periodic price refresh runs, and what the last refresh did"""
+    return {"success": True, "data": get_market_data_service().snapshot()}
+
+
+@router.post("/market-data/refresh")
+async def refresh_market_data():
+    """
+    Refresh price history and quotes for every tracked company now
+    
+    Tickers come from the symbol index; companies it cannot resolve with
+    confidence are listed in `unresolved`.
+    """
+    return {"success": True, "data": await get_market_data_service().refresh_tracked()}
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = Query(default="json", pattern="^(json|svg|folded)$")
+):
+    """
+    A stored request profile
+    
+    - **format**: json (top functions), svg (flamegraph) or folded (for flamegraph.pl/speedscope)
+    """
+    profile = get_profile_store().get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Profile {profile_id} not found on worker {os.getpid()}; profiles are kept per worker"
+        )
+    return _render(profile, format)
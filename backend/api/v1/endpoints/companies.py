@@ -3,10 +3,19 @@ Companies API Endpoints
 Manage company information and tracking
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Depends, Query
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
+import time
+
+from agents.orchestrator import AgentOrchestrator
+from api.deps import get_orchestrator
+from core.http_cache import conditional_response
+from core.serialization import dumps, json_array
+from services.company_store import get_company_store
+from services.insight_store import get_insight_store, company_key
+from services.prefetch import get_prefetch_manager, CREATED, TRACKED, TYPEAHEAD
 
 router = APIRouter()
 
@@ -28,57 +37,141 @@ class CompanyCreate(BaseModel):
     tracked: bool = False
 
 
-# In-memory storage (replace with database in production)
-companies_db: List[Company] = []
-
-
 @router.post("/", response_model=Company)
-async def create_company(company: CompanyCreate):
+async def create_company(company: CompanyCreate, orchestrator: AgentOrchestrator = Depends(get_orchestrator)):
     """
-    Add a new company to track
+    Add a new company to track (replaces an existing entry with the same name)
+    
+    Insights for the new company are prefetched in the background, since a
+    brief request usually follows within seconds.
     """
     new_company = Company(**company.dict())
-    companies_db.append(new_company)
+    await get_company_store().put(new_company.model_dump())
+    get_prefetch_manager().prefetch(orchestrator, new_company.name, CREATED)
     
     return new_company
 
 
 @router.get("/", response_model=List[Company])
-async def list_companies(tracked_only: bool = False):
+async def list_companies(request: Request, tracked_only: bool = False):
     """
     List all companies
     
+    Supports `If-None-Match` revalidation via the returned ETag.
+    
     - **tracked_only**: If true, only return tracked companies
     """
-    if tracked_only:
-        return [c for c in companies_db if c.tracked]
-    return companies_db
+    store = get_company_store()
+    if not tracked_only:
+        return conditional_response(request, json_array(await store.list_encoded()))
+    companies = [c for c in await store.list() if c.get("tracked")]
+    return conditional_response(request, dumps(companies))
+
+
+@router.get("/search")
+async def search_companies(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(default=10, ge=1, le=50),
+    orchestrator: AgentOrchestrator = Depends(get_orchestrator)
+):
+    """
+    Type-ahead search over company names
+    
+    Prefix matches rank before substring matches. Once the query is at least
+    three characters and a single company is the clear match (the only one,
+    or an exact name), its insights are prefetched.
+    """
+    query = company_key(q)
+    prefix, contains = [], []
+    for company in await get_company_store().list():
+        key = company_key(company["name"])
+        if key.startswith(query):
+            prefix.append(company)
+        elif query in key:
+            contains.append(company)
+    matches = (sorted(prefix, key=lambda c: len(c["name"])) + contains)[:limit]
+    
+    prefetched = None
+    if len(query) >= 3 and matches:
+        exact = company_key(matches[0]["name"]) == query
+        if exact or len(matches) == 1:
+            prefetched = matches[0]["name"]
+            get_prefetch_manager().prefetch(orchestrator, prefetched, TYPEAHEAD)
+    
+    return {"success": True, "data": matches, "prefetched": prefetched}
 
 
-@router.get("/{company_name}")
-async def get_company(company_name: str):
+@router.get("/analytics/financial")
+async def get_financial_analytics(tracked_only: bool = True):
+    """
+    Portfolio financial analytics across companies
+    
+    Computes growth rates, funding recency, burn proxies and peer percentiles
+    for every company in one vectorized pass over the latest stored
+    FinancialAgent outputs. Companies without insights yet are listed in
+    `missing`.
+    
+    - **tracked_only**: If true, only include tracked companies
+    """
+    # pandas is only needed here, so it stays out of the startup import path
+    from services.financial_analytics_service import compute_financial_analytics
+    
+    start_time = time.perf_counter()
+    
+    companies = [c for c in await get_company_store().list() if c.get("tracked") or not tracked_only]
+    names = [c["name"] for c in companies]
+    rows = get_insight_store().financial_rows(names)
+    
+    analytics = compute_financial_analytics(
+        rows,
+        industries={c["name"]: c["industry"] for c in companies if c.get("industry")}
+    )
+    covered = {company_key(row["company_name"]) for row in rows}
+    
+    return {
+        "success": True,
+        "data": {
+            **analytics,
+            "missing": [name for name in names if company_key(name) not in covered],
+            "computed_in_ms": round((time.perf_counter() - start_time) * 1000, 2)
+        }
+    }
+
+
+@router.get("/{company_name}", response_model=Company)
+async def get_company(company_name: str, request: Request):
     """
     Get details for a specific company
+    
+    Supports `If-None-Match` revalidation via the returned ETag.
     """
-    company = next((c for c in companies_db if c.name.lower() == company_name.lower()), None)
+    company = await get_company_store().get(company_name)
     
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
-    return company
+    return conditional_response(request, dumps(company))
 
 
 @router.put("/{company_name}/track")
-async def track_company(company_name: str, tracked: bool = True):
+async def track_company(
+    company_name: str,
+    tracked: bool = True,
+    orchestrator: AgentOrchestrator = Depends(get_orchestrator)
+):
     """
-    Enable/disable tracking for a company
+    Enable/disable tracking for a company (enabling prefetches its insights)
     """
-    company = next((c for c in companies_db if c.name.lower() == company_name.lower()), None)
+    store = get_company_store()
+    company = await store.get(company_name)
     
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
-    company.tracked = tracked
+    company["tracked"] = tracked
+    await store.put(company)
+    if tracked:
+        get_prefetch_manager().prefetch(orchestrator, company["name"], TRACKED)
     
     return {
         "success": True,
@@ -91,12 +184,9 @@ async def delete_company(company_name: str):
     """
     Remove a company from the system
     """
-    global companies_db
-    initial_count = len(companies_db)
-    companies_db = [c for c in companies_db if c.name.lower() != company_name.lower()]
-    
-    if len(companies_db) == initial_count:
+    if not await get_company_store().delete(company_name):
         raise HTTPException(status_code=404, detail="Company not found")
+    get_prefetch_manager().cancel(company_name)
     
     return {
         "success": True,
@@ -5,6 +5,9 @@ Health Check Endpoints
 from fastapi import APIRouter
 from datetime import datetime
 
+from core.startup import STARTUP
+from services.rate_limiter import get_rate_limiter
+
 router = APIRouter()
 
 
@@ -33,5 +36,16 @@ async def detailed_health():
             "cache": "not_configured",
             "llm": "not_configured"
         },
-        "uptime": "N/A"
+        "uptime": STARTUP.uptime_seconds,
+        "startup": STARTUP.snapshot()
+    }
+
+
+@router.get("/rate-limits")
+async def rate_limits():
+    """Remaining per-minute and daily budget, queue depth and throttling per provider"""
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "providers": get_rate_limiter().snapshot()
     }
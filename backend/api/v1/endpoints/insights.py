@@ -3,20 +3,29 @@ Insights API Endpoints
 Main endpoint for generating company insights
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Header, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
+from contextlib import nullcontext
 from datetime import datetime
+from urllib.parse import quote
 import logging
+import os
 
 from agents.orchestrator import AgentOrchestrator
+from api.deps import is_admin, get_orchestrator
+from core.config import settings
+from core.http_cache import conditional_response
+from core.profiling import RequestProfiler
+from core.serialization import dumps, envelope, json_array, json_object
+from services.insight_store import get_insight_store
+from services.quick_brief_service import get_quick_brief_service
+from services.prefetch import get_prefetch_manager
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Initialize orchestrator
-orchestrator = AgentOrchestrator()
-
 
 class InsightRequest(BaseModel):
     """Request model for generating insights"""
@@ -24,6 +33,10 @@ class InsightRequest(BaseModel):
     timeframe_days: int = Field(default=30, description="Data collection timeframe in days", ge=1, le=90)
     priority: str = Field(default="medium", description="Priority level", pattern="^(low|medium|high)$")
     context: Optional[Dict[str, Any]] = Field(default=None, description="Additional context")
+    deadline_ms: Optional[int] = Field(
+        default=None, ge=1000, le=600000,
+        description="Time budget; optional agents that cannot fit are skipped (default AGENT_TIMEOUT_SECONDS)"
+    )
 
 
 class QuickBriefRequest(BaseModel):
@@ -32,7 +45,14 @@ class QuickBriefRequest(BaseModel):
 
 
 @router.post("/generate")
-async def generate_insights(request: InsightRequest):
+async def generate_insights(
+    request: InsightRequest,
+    http_request: Request,
+    profile: bool = False,
+    refresh: bool = False,
+    x_admin_token: Optional[str] = Header(default=None),
+    orchestrator: AgentOrchestrator = Depends(get_orchestrator)
+):
     """
     Generate comprehensive insights for a company
     
@@ -51,33 +71,85 @@ async def generate_insights(request: InsightRequest):
         "priority": "high"
     }
     ```
+    
+    With ENABLE_CACHING on, insights generated for the same company and
+    timeframe within CACHE_TTL_HOURS are returned from the store without re-running
+    the agents; pass `?refresh=true` to force fresh collection. Otherwise a
+    new run still reuses each agent's last output while it is younger than
+    its AGENT_MAX_AGE_SECONDS policy; `freshness` in the response marks every
+    agent output as "fresh" or "cached" with its age.
+    
+    Set `deadline_ms` to bound the run: agents start slowest first, and the
+    optional ones (financial and social media by default) are marked
+    "skipped" or "cancelled" in `freshness` when they cannot finish in time.
+    
+    Admins can add `?profile=true` with an `X-Admin-Token` header to run the
+    request under the sampling profiler; the response then includes the top
+    functions and a link to the flamegraph.
     """
+    if profile and not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Profiling requires an admin token")
+    
+    store = get_insight_store()
+    message = f"Successfully generated insights for {request.company_name}"
+    
+    # Cache hit: the stored bytes go out untouched inside a spliced envelope
+    if not (refresh or profile or request.context) and settings.ENABLE_CACHING:
+        # A prefetch already running for this company finishes sooner than a new run
+        prefetcher = get_prefetch_manager()
+        await prefetcher.join(request.company_name, request.timeframe_days)
+        cached = store.latest_entry(request.company_name, settings.CACHE_TTL_HOURS * 3600)
+        if cached is not None and cached.result.get("timeframe_days") == request.timeframe_days:
+            prefetcher.record_use(request.company_name, cached)
+            logger.info("Serving cached insights for %s", request.company_name)
+            return conditional_response(http_request, envelope(cached.encoded, message=message, cached=True))
+    
     try:
-        logger.info(f"Generating insights for {request.company_name}")
+        logger.info("Generating insights for %s", request.company_name)
         
-        result = await orchestrator.gather_insights(
-            company_name=request.company_name,
-            context=request.context or {},
-            timeframe_days=request.timeframe_days,
-            priority=request.priority
-        )
+        profiler = RequestProfiler(settings.PROFILING_SAMPLE_INTERVAL_MS / 1000) if profile else None
+        with profiler or nullcontext():
+            result = await orchestrator.gather_insights(
+                company_name=request.company_name,
+                context=request.context or {},
+                timeframe_days=request.timeframe_days,
+                priority=request.priority,
+                reuse_cached=not refresh,
+                deadline_seconds=request.deadline_ms / 1000 if request.deadline_ms else None
+            )
         
         if result.get("status") == "error":
             raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
         
-        return {
-            "success": True,
-            "data": result,
-            "message": f"Successfully generated insights for {request.company_name}"
-        }
+        # The store encoded the result when saving it; reuse those bytes
+        stored = store.latest_entry(request.company_name)
+        data = stored.encoded if stored is not None and stored.result is result else dumps(result)
+        
+        extra = {}
+        if profiler is not None:
+            # Profiles stay in this worker's memory, so the URL only resolves here
+            extra["profile"] = {
+                **profiler.profile.summary(),
+                "flamegraph_url": f"/api/v1/admin/profiles/{profiler.profile.id}?format=svg",
+                "worker_pid": os.getpid(),
+                "note": "Stored only on the worker that served this request (worker_pid); "
+                        "other workers answer 404 for this URL"
+            }
+        return conditional_response(http_request, envelope(data, message=message, cached=False, **extra))
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error generating insights: {str(e)}")
+        logger.error("Error generating insights: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/quick-brief")
-async def generate_quick_brief(request: QuickBriefRequest):
+async def generate_quick_brief(
+    request: QuickBriefRequest,
+    http_request: Request,
+    orchestrator: AgentOrchestrator = Depends(get_orchestrator)
+):
     """
     Generate a quick brief (faster, less comprehensive)
     
@@ -90,42 +162,100 @@ async def generate_quick_brief(request: QuickBriefRequest):
         "company_name": "Acme Corp"
     }
     ```
+    
+    Answers within QUICK_BRIEF_BUDGET_MS with the best brief available:
+    `tier` is "live" (fresh), "cached" (an earlier quick brief), "historical"
+    (from the last full insights) or "pending" (nothing yet). When `upgrading`
+    is true a refresh is running; follow `upgrade_url` (server-sent events) or
+    poll GET /quick-brief/{company_name} to pick up the next `version`.
     """
     try:
-        logger.info(f"Generating quick brief for {request.company_name}")
-        
-        result = await orchestrator.quick_brief(company_name=request.company_name)
+        logger.info("Generating quick brief for %s", request.company_name)
         
-        if result.get("status") == "error":
-            raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+        service = get_quick_brief_service()
+        entry = await service.brief(request.company_name, orchestrator.quick_brief)
+        upgrading = service.upgrading(request.company_name)
         
-        return {
-            "success": True,
-            "data": result,
-            "message": f"Successfully generated quick brief for {request.company_name}"
-        }
+        return conditional_response(http_request, envelope(
+            entry.envelope_data(upgrading),
+            message=f"Quick brief for {request.company_name} ({entry.tier})",
+            upgrade_url=f"/api/v1/insights/quick-brief/{quote(request.company_name)}/stream?after={entry.version}"
+            if upgrading else None
+        ))
         
     except Exception as e:
-        logger.error(f"Error generating quick brief: {str(e)}")
+        logger.error("Error generating quick brief: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/quick-brief/{company_name}")
+async def get_quick_brief(company_name: str, request: Request):
+    """
+    The stored quick brief for a company, without starting a refresh
+    
+    The ETag changes with every new version, so polling with `If-None-Match`
+    costs an empty 304 until the upgrade lands.
+    """
+    service = get_quick_brief_service()
+    entry = service.stored(company_name) or service.historical(company_name)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="No quick brief for this company yet")
+    return conditional_response(request, envelope(entry.envelope_data(service.upgrading(company_name))))
+
+
+@router.get("/quick-brief/{company_name}/stream")
+async def stream_quick_brief(company_name: str, after: int = 0):
+    """
+    Server-sent events: one `brief` event with the first version newer than
+    `after`, or a `timeout` event after QUICK_BRIEF_STREAM_TIMEOUT_SECONDS
+    """
+    service = get_quick_brief_service()
+    
+    async def events():
+        # Flush headers right away so proxies and browsers see an open stream
+        yield b": waiting\n\n"
+        entry = await service.watch(company_name, after, settings.QUICK_BRIEF_STREAM_TIMEOUT_SECONDS)
+        if entry is None:
+            yield b"event: timeout\ndata: {}\n\n"
+        else:
+            yield b"event: brief\ndata: " + entry.envelope_data(service.upgrading(company_name)) + b"\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/latest/{company_name}")
+async def get_latest_insights(company_name: str, request: Request):
+    """
+    Get the most recent insights for a company without generating new ones
+    
+    Meant for polling: responses carry an ETag, and a request with a matching
+    `If-None-Match` gets an empty 304 until the insights change.
+    """
+    entry = get_insight_store().latest_entry(company_name)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="No insights generated for this company yet")
+    return conditional_response(request, envelope(entry.encoded))
+
+
 @router.get("/history/{company_name}")
-async def get_insight_history(company_name: str, limit: int = 10):
+async def get_insight_history(company_name: str, request: Request, limit: int = 10):
     """
     Get historical insights for a company
     
-    Returns previously generated insights to avoid redundant API calls
+    Returns previously generated insights, newest first, to avoid redundant API calls.
+    Supports `If-None-Match` like /latest.
     """
-    # TODO: Implement database storage and retrieval
-    return {
-        "success": True,
-        "data": {
-            "company_name": company_name,
-            "history": [],
-            "message": "History feature coming soon - requires database implementation"
-        }
-    }
+    entries = get_insight_store().history_entries(company_name, max(0, min(limit, 50)))
+    data = json_object(
+        company_name=company_name,
+        count=len(entries),
+        history=json_array(entry.encoded for entry in entries)
+    )
+    return conditional_response(request, envelope(data))
 
 
 @router.delete("/cache/{company_name}")
@@ -135,8 +265,9 @@ async def clear_cache(company_name: str):
     
     Forces fresh data collection on next request
     """
-    # TODO: Implement cache clearing
+    cleared = await get_insight_store().clear(company_name)
     return {
         "success": True,
-        "message": f"Cache cleared for {company_name} (when caching is implemented)"
+        "cleared": cleared,
+        "message": f"Cache cleared for {company_name}" if cleared else f"No cached insights for {company_name}"
     }
@@ -0,0 +1 @@
+"""Benchmarks for AI Sales Insight"""
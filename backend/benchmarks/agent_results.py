@@ -0,0 +1,158 @@
+"""
+Agent Result Benchmark
+Per-request cost of passing agent results as pydantic models versus slotted dataclasses
+
+Replays the orchestrator's hand-offs for one gather_insights call (four agent
+results, the synthesis input and output, the summary) with payloads shaped
+like real agent data, and reports CPU time and allocations per request.
+
+Run from the backend directory:
+    python -m benchmarks.agent_results [iterations]
+"""
+
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from agents.base_agent import AgentInput, AgentResult
+
+
+# The pre-dataclass models, kept here as the baseline
+class LegacyAgentInput(BaseModel):
+    company_name: str = Field(...)
+    context: Optional[Dict[str, Any]] = Field(default_factory=dict)
+    timeframe_days: int = Field(default=30)
+    priority: str = Field(default="medium")
+
+
+class LegacyAgentOutput(BaseModel):
+    agent_name: str = Field(...)
+    status: str = Field(...)
+    data: Dict[str, Any] = Field(default_factory=dict)
+    insights: List[str] = Field(default_factory=list)
+    confidence_score: float = Field(default=0.0, ge=0.0, le=1.0)
+    execution_time_ms: int = Field(...)
+    timestamp: datetime = Field(default_factory=datetime.now)
+    error_message: Optional[str] = None
+
+
+AGENTS = ("research", "news", "financial", "social_media")
+
+
+def _payload(agent: str) -> Dict[str, Any]:
+    """Nested data roughly the size of one agent's output"""
+    return {
+        "company": "Acme Corp",
+        "articles": [
+            {
+                "title": f"{agent} headline {i}",
+                "source": "Example News",
+                "url": f"https://example.com/{agent}/{i}",
+                "published_at": "2025-01-01T00:00:00Z",
+                "sentiment": {"score": 0.1 * (i % 5), "label": "Neutral"},
+                "topics": ["funding", "product", "hiring"]
+            }
+            for i in range(20)
+        ],
+        "metrics": {f"metric_{i}": i * 1.5 for i in range(30)},
+        "meeting_preparation_score": {"score": 72, "factors": ["news", "financials"]}
+    }
+
+
+PAYLOADS = {agent: _payload(agent) for agent in AGENTS}
+INSIGHTS = [f"Insight {i}" for i in range(5)]
+
+
+def legacy_request():
+    agent_input = LegacyAgentInput(company_name="Acme Corp", context={}, timeframe_days=30, priority="high")
+    outputs = {
+        agent: LegacyAgentOutput(
+            agent_name=agent, status="success", data=PAYLOADS[agent], insights=INSIGHTS,
+            confidence_score=0.8, execution_time_ms=120
+        ).model_dump()
+        for agent in AGENTS
+    }
+    synthesis_input = LegacyAgentInput(
+        company_name=agent_input.company_name, context={"agent_outputs": outputs},
+        timeframe_days=agent_input.timeframe_days, priority=agent_input.priority
+    )
+    synthesis = LegacyAgentOutput(
+        agent_name="synthesizer", status="success", data=PAYLOADS["research"], insights=INSIGHTS,
+        confidence_score=0.9, execution_time_ms=300
+    )
+    return {
+        "agent_outputs": synthesis_input.context["agent_outputs"],
+        "synthesis": synthesis.dict(),
+        "summary": synthesis.dict().get("data", {}).get("meeting_preparation_score", {})
+    }
+
+
+def dataclass_request():
+    agent_input = AgentInput(company_name="Acme Corp", context={}, timeframe_days=30, priority="high")
+    outputs = {
+        agent: AgentResult(
+            agent_name=agent, status="success", data=PAYLOADS[agent], insights=INSIGHTS,
+            confidence_score=0.8, execution_time_ms=120
+        ).to_dict()
+        for agent in AGENTS
+    }
+    synthesis_input = AgentInput(
+        company_name=agent_input.company_name, context={"agent_outputs": outputs},
+        timeframe_days=agent_input.timeframe_days, priority=agent_input.priority
+    )
+    synthesis = AgentResult(
+        agent_name="synthesizer", status="success", data=PAYLOADS["research"], insights=INSIGHTS,
+        confidence_score=0.9, execution_time_ms=300
+    )
+    return {
+        "agent_outputs": synthesis_input.context["agent_outputs"],
+        "synthesis": synthesis.to_dict(),
+        "summary": synthesis.data.get("meeting_preparation_score", {})
+    }
+
+
+def measure(func: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    for _ in range(min(iterations, 100)):
+        func()
+
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    cpu = time.process_time() - start
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [func() for _ in range(100)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    del kept
+
+    return {
+        "cpu_us": cpu / iterations * 1e6,
+        "blocks": sum(stat.count_diff for stat in stats) / 100,
+        "bytes": sum(stat.size_diff for stat in stats) / 100
+    }
+
+
+def main(iterations: int = 20000):
+    results = {
+        "pydantic": measure(legacy_request, iterations),
+        "dataclass": measure(dataclass_request, iterations)
+    }
+    print(f"{'':10} {'CPU us/request':>15} {'allocations':>12} {'bytes':>10}")
+    for name, result in results.items():
+        print(f"{name:10} {result['cpu_us']:15.1f} {result['blocks']:12.0f} {result['bytes']:10.0f}")
+    baseline, current = results["pydantic"], results["dataclass"]
+    print(
+        f"\nCPU {100 * (1 - current['cpu_us'] / baseline['cpu_us']):.0f}% lower, "
+        f"{100 * (1 - current['bytes'] / baseline['bytes']):.0f}% fewer retained bytes per request"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
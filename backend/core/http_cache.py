@@ -0,0 +1,136 @@
+"""
+HTTP Cache
+Content-hash ETags, conditional GET and compression with cached precompressed variants
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from core.metrics import record_cache_lookup
+from core.serialization import JSON_MEDIA_TYPE
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip only
+    brotli = None
+
+# Clients may keep a copy but must revalidate it with If-None-Match every time
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_for(body: bytes) -> str:
+    """
+    Weak validator derived from the uncompressed body
+
+    Weak, so the gzip and brotli variants of one document share it (RFC 9110
+    allows weak comparison for If-None-Match).
+    """
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred supported content-coding: brotli when available, then gzip"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+class CompressedVariants:
+    """
+    LRU of compressed bodies keyed by (ETag, encoding)
+
+    Polled documents are compressed once and then served from here until they
+    change, which gives them a new ETag.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._variants: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag: str, encoding: str, body: bytes) -> bytes:
+        key = (etag, encoding)
+        with self._lock:
+            compressed = self._variants.get(key)
+            if compressed is not None:
+                self._variants.move_to_end(key)
+        record_cache_lookup("compressed_response", compressed is not None)
+        if compressed is not None:
+            return compressed
+
+        compressed = _compress(body, encoding)
+        with self._lock:
+            self._variants[key] = compressed
+            while len(self._variants) > self.max_entries:
+                self._variants.popitem(last=False)
+        return compressed
+
+
+# Singleton instance
+_compressed_variants = None
+
+
+def get_compressed_variants() -> CompressedVariants:
+    """Get or create compressed variant cache singleton"""
+    global _compressed_variants
+    if _compressed_variants is None:
+        from core.config import settings
+        _compressed_variants = CompressedVariants(settings.RESPONSE_COMPRESSION_CACHE_SIZE)
+    return _compressed_variants
+
+
+def conditional_response(request: Request, body: bytes, media_type: str = JSON_MEDIA_TYPE) -> Response:
+    """
+    Encoded body with an ETag, answering If-None-Match with 304 on GET/HEAD
+
+    Bodies of at least RESPONSE_COMPRESSION_MIN_BYTES are compressed for
+    clients that accept it, reusing a cached variant when one exists.
+    """
+    from core.config import settings
+
+    etag = etag_for(body)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if request.method in ("GET", "HEAD") and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if len(body) >= settings.RESPONSE_COMPRESSION_MIN_BYTES:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding is not None:
+            body = get_compressed_variants().get(etag, encoding, body)
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
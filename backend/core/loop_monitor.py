@@ -0,0 +1,251 @@
+"""
+Loop Monitor
+Event-loop lag measurement and blocking-call capture with request and agent attribution
+"""
+
+import sys
+import time
+import asyncio
+import threading
+import traceback
+import contextvars
+import logging
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from core.metrics import REGISTRY
+from core.logging_config import request_id_var
+
+logger = logging.getLogger(__name__)
+
+
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "event_loop_lag_seconds", "How late the loop heartbeat woke up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+LOOP_LAG_QUANTILE = REGISTRY.gauge(
+    "event_loop_lag_quantile_seconds", "Loop lag percentiles over the recent window", ("quantile",)
+)
+LOOP_STALLS = REGISTRY.counter(
+    "event_loop_stalls_total", "Times the loop was blocked past the threshold", ("agent", "call")
+)
+
+LAG_QUANTILES = (0.5, 0.95, 0.99)
+
+# (agent, sub-call) the current task is working for, set by BaseAgent.run and @subcall
+activity_var: contextvars.ContextVar[Tuple[Optional[str], Optional[str]]] = contextvars.ContextVar(
+    "activity", default=(None, None)
+)
+
+
+@contextmanager
+def activity(agent: str, call: Optional[str] = None):
+    """Attribute loop stalls inside the block to an agent (and sub-call)"""
+    token = activity_var.set((agent, call))
+    try:
+        yield
+    finally:
+        activity_var.reset(token)
+
+
+def _format_stack(frame, limit: int) -> List[str]:
+    """Innermost-last "file:line in function" lines for a frame"""
+    return [
+        f"{summary.filename}:{summary.lineno} in {summary.name}"
+        for summary in traceback.extract_stack(frame, limit=limit)
+    ]
+
+
+class LoopStall:
+    """One period the loop was blocked, captured while it was still blocked"""
+
+    __slots__ = ("started_at", "blocked_ms", "lag_ms", "request_id", "agent", "call", "task", "stack")
+
+    def __init__(self, blocked_ms: float, request_id: Optional[str], agent: Optional[str],
+                 call: Optional[str], task: Optional[str], stack: List[str]):
+        self.started_at = datetime.now().isoformat()
+        self.blocked_ms = blocked_ms
+        # Filled in when the heartbeat finally runs and the full stall is known
+        self.lag_ms: Optional[float] = None
+        self.request_id = request_id
+        self.agent = agent
+        self.call = call
+        self.task = task
+        self.stack = stack
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class LoopMonitor:
+    """
+    Heartbeat on the event loop plus a watchdog thread that catches it blocked
+
+    The heartbeat sleeps for `interval` and records how late it woke. The
+    watchdog notices a heartbeat overdue by more than `threshold` while the
+    loop is still stuck, so the loop thread's stack at that moment is the
+    offending call. Tasks are created through a factory that keeps their
+    contexts, which lets the watchdog read the request id and agent of the
+    task that is running.
+    """
+
+    def __init__(self, interval_ms: float = 50.0, threshold_ms: float = 100.0,
+                 max_stalls: int = 50, window: int = 1200, stack_limit: int = 40):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.stack_limit = stack_limit
+        self.stalls: Deque[LoopStall] = deque(maxlen=max_stalls)
+        self._lags: Deque[float] = deque(maxlen=window)
+        self._max_lag = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._contexts: "weakref.WeakKeyDictionary[asyncio.Task, contextvars.Context]" = weakref.WeakKeyDictionary()
+        self._previous_factory = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._beat = 0.0
+        self._captured_beat: Optional[float] = None
+        self._open_stall: Optional[LoopStall] = None
+
+        for q in LAG_QUANTILES:
+            LOOP_LAG_QUANTILE.set_function(lambda q=q: self.quantile(q) or 0.0, str(q))
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat is not None
+
+    def start(self):
+        """Start monitoring the running loop; call from the loop thread"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._previous_factory = self._loop.get_task_factory()
+        self._loop.set_task_factory(self._task_factory)
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat = self._loop.create_task(self._run_heartbeat(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(
+            "Loop monitor started (heartbeat %s ms, stall threshold %s ms)",
+            self.interval * 1000, self.threshold * 1000
+        )
+
+    async def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._heartbeat.cancel()
+        await asyncio.gather(self._heartbeat, return_exceptions=True)
+        self._heartbeat = None
+        self._watchdog.join()
+        self._watchdog = None
+        self._loop.set_task_factory(self._previous_factory)
+
+    def _task_factory(self, loop, coro, context=None):
+        # Same context a plain Task would copy, kept where the watchdog can read it
+        if context is None:
+            context = contextvars.copy_context()
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, context=context)
+        else:
+            task = asyncio.Task(coro, loop=loop, context=context)
+        self._contexts[task] = context
+        return task
+
+    async def _run_heartbeat(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - started - self.interval, 0.0)
+            with self._lock:
+                self._beat = now
+                stall, self._open_stall = self._open_stall, None
+            if stall is not None:
+                stall.lag_ms = round(lag * 1000, 1)
+            self._lags.append(lag)
+            self._max_lag = max(self._max_lag, lag)
+            LOOP_LAG_SECONDS.observe(lag)
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            with self._lock:
+                beat = self._beat
+                blocked = time.monotonic() - beat - self.interval
+                # One capture per stall, however long it lasts
+                if blocked < self.threshold or self._captured_beat == beat:
+                    continue
+                self._captured_beat = beat
+            stall = self._capture(blocked)
+            with self._lock:
+                if self._beat == beat:
+                    self._open_stall = stall
+
+    def _capture(self, blocked: float) -> LoopStall:
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = _format_stack(frame, self.stack_limit) if frame is not None else []
+        del frame
+
+        task = asyncio.current_task(self._loop)
+        context = self._contexts.get(task) if task is not None else None
+        request_id, agent, call = None, None, None
+        if context is not None:
+            request_id = context.get(request_id_var)
+            agent, call = context.get(activity_var, (None, None))
+
+        stall = LoopStall(
+            round(blocked * 1000, 1), request_id, agent, call,
+            task.get_name() if task is not None else None, stack
+        )
+        self.stalls.append(stall)
+        LOOP_STALLS.inc(agent or "none", call or "none")
+        logger.warning(
+            "Event loop blocked for %.0f ms+ (request %s, agent %s, call %s) at %s",
+            blocked * 1000, request_id, agent, call, stack[-1] if stack else "unknown"
+        )
+        return stall
+
+    def quantile(self, q: float) -> Optional[float]:
+        lags = sorted(self._lags)
+        if not lags:
+            return None
+        return lags[min(int(q * len(lags)), len(lags) - 1)]
+
+    def snapshot(self, recent: int = 10) -> Dict[str, Any]:
+        stalls = list(self.stalls)
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "samples": len(self._lags),
+            "lag_ms": {
+                f"p{int(q * 100)}": round((self.quantile(q) or 0.0) * 1000, 2) for q in LAG_QUANTILES
+            },
+            "max_lag_ms": round(self._max_lag * 1000, 1),
+            "stalls": len(stalls),
+            "recent_stalls": [stall.to_dict() for stall in stalls[max(len(stalls) - recent, 0):][::-1]]
+        }
+
+
+# Singleton instance
+_loop_monitor = None
+
+
+def get_loop_monitor() -> LoopMonitor:
+    """Get or create loop monitor singleton"""
+    global _loop_monitor
+    if _loop_monitor is None:
+        from core.config import settings
+        _loop_monitor = LoopMonitor(
+            settings.LOOP_MONITOR_INTERVAL_MS,
+            settings.LOOP_STALL_THRESHOLD_MS,
+            settings.LOOP_MONITOR_MAX_STALLS
+        )
+    return _loop_monitor
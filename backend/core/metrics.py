@@ -0,0 +1,299 @@
+"""
+Metrics
+In-process counters, gauges and histograms exported in Prometheus text format
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+class _Shards:
+    """
+    Per-thread value maps, merged only when metrics are collected
+
+    Each thread writes to its own dict, so recording never takes a lock; the
+    lock is only held to register a new thread's shard or to list the shards.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: List[dict] = []
+
+    def local(self) -> dict:
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = self._local.values = {}
+            with self._lock:
+                self._all.append(shard)
+        return shard
+
+    def items(self):
+        with self._lock:
+            shards = list(self._all)
+        for shard in shards:
+            # list() copies under the GIL, so concurrent inserts cannot break iteration
+            yield from list(shard.items())
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._shards = _Shards()
+
+    def _check(self, labels: LabelValues):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        shard = self._shards.local()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        merged: Dict[LabelValues, float] = {}
+        for labels, value in self._shards.items():
+            merged[labels] = merged.get(labels, 0.0) + value
+        return merged
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that goes up and down (in-flight work, queue depth)"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._callbacks: Dict[LabelValues, Callable[[], float]] = {}
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set_function(self, function: Callable[[], float], *labels: str):
+        """Report the callback's value at collection time instead of a stored one"""
+        self._check(labels)
+        self._callbacks[labels] = function
+
+    def values(self) -> Dict[LabelValues, float]:
+        merged = super().values()
+        for labels, function in self._callbacks.items():
+            merged[labels] = float(function())
+        return merged
+
+
+class Histogram(_Metric):
+    """Bucketed distribution with sum and count"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        shard = self._shards.local()
+        state = shard.get(labels)
+        if state is None:
+            # [per-bucket counts (last is +Inf)..., sum, count]
+            state = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def values(self) -> Dict[LabelValues, List[float]]:
+        merged: Dict[LabelValues, List[float]] = {}
+        for labels, state in self._shards.items():
+            total = merged.get(labels)
+            if total is None:
+                merged[labels] = list(state)
+            else:
+                for i, value in enumerate(state):
+                    total[i] += value
+        return merged
+
+    def stats(self, group_by: Optional[Sequence[str]] = None) -> Dict[LabelValues, Dict[str, Optional[float]]]:
+        """
+        Count, sum, mean and bucket-interpolated percentiles per label set
+
+        Args:
+            group_by: Label names to keep; series differing only in the other
+                labels are merged (e.g. ("agent",) across statuses)
+        """
+        values = self.values()
+        if group_by is not None:
+            positions = [self.labelnames.index(name) for name in group_by]
+            grouped: Dict[LabelValues, List[float]] = {}
+            for labels, state in values.items():
+                key = tuple(labels[i] for i in positions)
+                total = grouped.get(key)
+                grouped[key] = list(state) if total is None else [a + b for a, b in zip(total, state)]
+            values = grouped
+        return {labels: self._stats(state) for labels, state in values.items()}
+
+    def _stats(self, state: List[float]) -> Dict[str, Optional[float]]:
+        count, total = state[-1], state[-2]
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else None,
+            "p50": self._quantile(state, 0.5),
+            "p95": self._quantile(state, 0.95),
+            "p99": self._quantile(state, 0.99)
+        }
+
+    def _quantile(self, state: List[float], q: float) -> Optional[float]:
+        count = state[-1]
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for i, bucket_count in enumerate(state[:-2]):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, state in sorted(self.values().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), state[:-2]):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{label_text} {state[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Agents
+AGENT_EXECUTIONS = REGISTRY.counter(
+    "agent_executions_total", "Agent executions by outcome", ("agent", "status")
+)
+AGENT_EXECUTION_SECONDS = REGISTRY.histogram(
+    "agent_execution_seconds", "Agent execution time", ("agent", "status")
+)
+AGENT_SUBCALL_SECONDS = REGISTRY.histogram(
+    "agent_subcall_seconds", "Time spent in each agent data-collection step", ("agent", "call", "status")
+)
+AGENT_PLAN_DECISIONS = REGISTRY.counter(
+    "agent_plan_decisions_total", "Whether an agent was run, reused from cache, or skipped or cancelled for the deadline", ("agent", "decision")
+)
+AGENT_CONFIDENCE = REGISTRY.histogram(
+    "agent_confidence_score", "Confidence score of successful agent outputs", ("agent",), SCORE_BUCKETS
+)
+
+# LLM
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "llm_request_seconds", "LLM completion latency", ("provider", "outcome")
+)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "Tokens reported by the LLM provider", ("provider", "kind")
+)
+
+# Caches
+CACHE_LOOKUPS = REGISTRY.counter(
+    "cache_lookups_total", "Cache lookups by result", ("cache", "result")
+)
+
+# HTTP
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "Requests currently being served"
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_seconds", "Request latency by route", ("method", "route", "status")
+)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.inc(cache, "hit" if hit else "miss")
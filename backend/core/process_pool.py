@@ -0,0 +1,251 @@
+"""
+Process Pool
+Offloads CPU-bound pure functions from the event loop, batching small items to amortize IPC
+"""
+
+import os
+import time
+import signal
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+POOL_TASKS = REGISTRY.counter(
+    "process_pool_tasks_total", "Chunks executed in the process pool", ("function", "outcome")
+)
+POOL_ITEMS = REGISTRY.counter(
+    "process_pool_items_total", "Work items executed in the process pool", ("function",)
+)
+POOL_QUEUE_SECONDS = REGISTRY.histogram(
+    "process_pool_queue_seconds", "Time chunks waited for a free pool process", ("function",)
+)
+POOL_RUN_SECONDS = REGISTRY.histogram(
+    "process_pool_run_seconds", "Time chunks spent executing in a pool process", ("function",)
+)
+POOL_IN_FLIGHT = REGISTRY.gauge(
+    "process_pool_chunks_in_flight", "Chunks submitted to the pool and not yet finished"
+)
+
+
+def _name(func: Callable) -> str:
+    return f"{func.__module__}.{getattr(func, '__qualname__', func.__name__)}"
+
+
+def _worker_init():
+    # Ctrl-C and shutdown signals are the parent's to handle
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _apply_chunk(func: Callable, chunk: Sequence[tuple]) -> Tuple[List[Any], float]:
+    """Runs in the pool: one call per argument tuple, with the time spent"""
+    start = time.perf_counter()
+    results = [func(*args) for args in chunk]
+    return results, time.perf_counter() - start
+
+
+class _PendingBatch:
+    __slots__ = ("items", "futures", "timer")
+
+    def __init__(self):
+        self.items: List[tuple] = []
+        self.futures: List[asyncio.Future] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class ProcessPool:
+    """
+    Managed ProcessPoolExecutor for pure, picklable, module-level functions
+
+    Processes are started with forkserver (spawn where unavailable), never
+    forked from the threaded server process. With a size of 0 everything runs
+    inline on the calling thread, which keeps behaviour identical but blocking.
+    map() and run_sized() also run inline below `min_items` work items, where
+    pickling and a round trip cost more than the work itself.
+    """
+
+    def __init__(self, size: int, max_batch: int = 64, batch_window_ms: float = 2.0, min_items: int = 200):
+        self.size = size
+        self.max_batch = max_batch
+        self.min_items = min_items
+        self.batch_window = batch_window_ms / 1000
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._batches: Dict[Callable, _PendingBatch] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def start(self):
+        if not self.enabled or self._executor is not None:
+            return
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._executor = ProcessPoolExecutor(self.size, mp_context=context, initializer=_worker_init)
+        logger.info("Process pool started with %s processes", self.size)
+
+    def shutdown(self):
+        for batch in self._batches.values():
+            if batch.timer is not None:
+                batch.timer.cancel()
+            for future in batch.futures:
+                if not future.done():
+                    future.cancel()
+        self._batches.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def prestart(self):
+        """Start every process now so the first requests do not pay for it"""
+        if self.enabled:
+            await asyncio.gather(*(self.run(os.getpid) for _ in range(self.size)))
+
+    async def _submit(self, func: Callable, chunk: List[tuple], retry: bool = True) -> List[Any]:
+        if not self.enabled:
+            return [func(*args) for args in chunk]
+        self.start()
+
+        name = _name(func)
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        submitted = time.perf_counter()
+        POOL_IN_FLIGHT.inc()
+        try:
+            results, run_seconds = await loop.run_in_executor(executor, _apply_chunk, func, chunk)
+        except BrokenProcessPool:
+            # A process died (OOM, signal). Replace the pool once - concurrent
+            # chunks see the same failure - and retry this chunk in the new one;
+            # never inline, where the same crash would take the server down
+            POOL_TASKS.inc(name, "broken")
+            if self._executor is executor:
+                logger.error("Process pool broken while running %s - restarting it", name)
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if not retry:
+                raise
+            return await self._submit(func, chunk, retry=False)
+        except Exception:
+            POOL_TASKS.inc(name, "error")
+            raise
+        finally:
+            POOL_IN_FLIGHT.dec()
+
+        POOL_TASKS.inc(name, "success")
+        POOL_ITEMS.inc(name, amount=len(chunk))
+        POOL_RUN_SECONDS.observe(run_seconds, name)
+        POOL_QUEUE_SECONDS.observe(max(time.perf_counter() - submitted - run_seconds, 0.0), name)
+        return results
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """Run one call in the pool"""
+        return (await self._submit(func, [args]))[0]
+
+    async def run_sized(self, items: int, func: Callable, *args: Any) -> Any:
+        """Run one call over `items` work items: in the pool if that many are worth shipping, else inline"""
+        if items < self.min_items:
+            return func(*args)
+        return await self.run(func, *args)
+
+    async def map(self, func: Callable, items: Sequence[Any], chunk_size: Optional[int] = None) -> List[Any]:
+        """
+        func(item) for every item, in order
+
+        Items are split into at most one chunk per process (and no more than
+        max_batch per chunk), so a list of small items costs a few round trips
+        rather than one per item.
+        """
+        if not items:
+            return []
+        if len(items) < self.min_items:
+            return [func(item) for item in items]
+        if chunk_size is None:
+            per_process = -(-len(items) // max(self.size, 1))
+            chunk_size = max(1, min(per_process, self.max_batch))
+        chunks = [[(item,) for item in items[i:i + chunk_size]] for i in range(0, len(items), chunk_size)]
+        results = await asyncio.gather(*(self._submit(func, chunk) for chunk in chunks))
+        return [value for chunk in results for value in chunk]
+
+    async def run_batched(self, func: Callable, *args: Any) -> Any:
+        """
+        Run one small call, sharing a chunk with concurrent calls to the same function
+
+        Calls arriving within the batch window (or until max_batch is reached)
+        travel to the pool together.
+        """
+        if not self.enabled:
+            return func(*args)
+
+        loop = asyncio.get_running_loop()
+        batch = self._batches.get(func)
+        if batch is None:
+            batch = self._batches[func] = _PendingBatch()
+            batch.timer = loop.call_later(self.batch_window, self._flush, func)
+
+        future = loop.create_future()
+        batch.items.append(args)
+        batch.futures.append(future)
+        if len(batch.items) >= self.max_batch:
+            self._flush(func)
+        return await future
+
+    def _flush(self, func: Callable):
+        batch = self._batches.pop(func, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        asyncio.ensure_future(self._dispatch(func, batch))
+
+    async def _dispatch(self, func: Callable, batch: _PendingBatch):
+        try:
+            results = await self._submit(func, batch.items)
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in zip(batch.futures, results):
+            if not future.done():
+                future.set_result(result)
+
+
+# Singleton instance
+_process_pool = None
+
+
+def default_pool_size(workers: int) -> int:
+    """
+    Cores left per server worker, keeping one for the worker's own event loop
+
+    0 (run inline) when a worker has a core or less to itself, as with
+    WORKERS=0; pool processes there would only compete with the workers.
+    """
+    cores = os.cpu_count() or 1
+    # WORKERS=0 runs one server worker per core (see gunicorn.conf.py)
+    workers = workers if workers > 0 else cores
+    return max(0, cores // workers - 1)
+
+
+def get_process_pool() -> ProcessPool:
+    """Get or create process pool singleton"""
+    global _process_pool
+    if _process_pool is None:
+        from core.config import settings
+        size = settings.PROCESS_POOL_SIZE
+        if size is None:
+            size = default_pool_size(settings.WORKERS)
+        _process_pool = ProcessPool(
+            size,
+            settings.PROCESS_POOL_MAX_BATCH,
+            settings.PROCESS_POOL_BATCH_WINDOW_MS,
+            settings.PROCESS_POOL_MIN_ITEMS
+        )
+    return _process_pool
@@ -0,0 +1,326 @@
+"""
+Profiling
+Sampling profiler for single requests and low-rate continuous profiling
+"""
+
+import os
+import sys
+import html
+import time
+import uuid
+import zlib
+import threading
+import logging
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Samples whose innermost frame is here are the event loop waiting for I/O
+_IDLE_FILES = ("selectors.py",)
+
+# The sampler thread can only look at the loop thread when the loop releases
+# the GIL, which pure-Python work does every switch interval (5 ms by default).
+# Fast samplers shorten it while they run so short CPU bursts are not missed.
+_switch_lock = threading.Lock()
+_switch_users = 0
+_default_switch_interval = sys.getswitchinterval()
+
+
+def _shorten_switch_interval(sample_interval: float):
+    global _switch_users, _default_switch_interval
+    target = sample_interval / 4
+    with _switch_lock:
+        if _switch_users == 0:
+            _default_switch_interval = sys.getswitchinterval()
+        _switch_users += 1
+        if target < sys.getswitchinterval():
+            sys.setswitchinterval(target)
+
+
+def _restore_switch_interval():
+    global _switch_users
+    with _switch_lock:
+        _switch_users -= 1
+        if _switch_users == 0:
+            sys.setswitchinterval(_default_switch_interval)
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _fold(frame, max_depth: int = 128) -> Optional[str]:
+    """Root-first "a;b;c" stack for a frame, or None for an idle event loop"""
+    if os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+        return None
+    labels: List[str] = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class StackSampler:
+    """
+    Samples one thread's stack from a background thread at a fixed interval
+
+    Only wall-clock samples of the target thread are taken; idle event-loop
+    samples are counted separately so they do not drown out real work.
+    """
+
+    def __init__(self, thread_id: int, interval_seconds: float):
+        self.thread_id = thread_id
+        self.interval = interval_seconds
+        self.stacks: Counter = Counter()
+        self.idle_samples = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._shortened = False
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        if self.interval < _default_switch_interval * 4:
+            self._shortened = True
+            _shorten_switch_interval(self.interval)
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._shortened:
+            self._shortened = False
+            _restore_switch_interval()
+        self.stopped_at = time.perf_counter()
+
+    def reset(self):
+        with self._lock:
+            self.stacks = Counter()
+            self.idle_samples = 0
+            self.started_at = time.perf_counter()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = _fold(frame)
+            del frame
+            with self._lock:
+                if stack is None:
+                    self.idle_samples += 1
+                else:
+                    self.stacks[stack] += 1
+
+    def profile(self, top_n: int = 25) -> "Profile":
+        with self._lock:
+            stacks = Counter(self.stacks)
+            idle = self.idle_samples
+        end = self.stopped_at or time.perf_counter()
+        duration = end - (self.started_at or end)
+        return Profile(stacks, idle, duration, self.interval, top_n)
+
+
+class Profile:
+    """Aggregated stacks with folded, top-N and flamegraph views"""
+
+    def __init__(self, stacks: Counter, idle_samples: int, duration_seconds: float,
+                 interval_seconds: float, top_n: int = 25):
+        self.id = uuid.uuid4().hex[:12]
+        self.created_at = datetime.now().isoformat()
+        self.stacks = stacks
+        self.idle_samples = idle_samples
+        self.duration_seconds = duration_seconds
+        self.interval_seconds = interval_seconds
+        self.top_n = top_n
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def folded(self) -> str:
+        """Brendan Gregg folded format, accepted by flamegraph.pl and speedscope"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def top(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Functions by self samples, with inclusive samples alongside"""
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+
+        total = self.samples or 1
+        return [
+            {
+                "function": function,
+                "self_samples": count,
+                "self_percent": round(100 * count / total, 1),
+                "total_samples": inclusive[function],
+                "total_percent": round(100 * inclusive[function] / total, 1)
+            }
+            for function, count in own.most_common(n or self.top_n)
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "created_at": self.created_at,
+            "duration_ms": round(self.duration_seconds * 1000, 1),
+            "interval_ms": round(self.interval_seconds * 1000, 2),
+            "samples": self.samples,
+            "idle_samples": self.idle_samples,
+            "top": self.top()
+        }
+
+    def flamegraph_svg(self, width: int = 1200, row_height: int = 16) -> str:
+        """Self-contained SVG flamegraph (root at the bottom, hover for details)"""
+        tree: Dict[str, Any] = {"count": 0, "children": OrderedDict()}
+        for stack, count in sorted(self.stacks.items()):
+            node = tree
+            node["count"] += count
+            for frame in stack.split(";"):
+                node = node["children"].setdefault(frame, {"count": 0, "children": OrderedDict()})
+                node["count"] += count
+
+        def depth(node) -> int:
+            return 1 + max((depth(child) for child in node["children"].values()), default=0)
+
+        total = tree["count"] or 1
+        rows = depth(tree)
+        height = rows * row_height + 30
+        scale = (width - 20) / total
+        rects: List[str] = []
+
+        def draw(name: str, node, x: float, level: int):
+            w = node["count"] * scale
+            if w < 0.5:
+                return
+            y = height - (level + 1) * row_height - 10
+            hue = zlib.crc32(name.encode()) % 60
+            label = html.escape(name)
+            percent = 100 * node["count"] / total
+            if len(name) * 7 < w:
+                text = label
+            elif w > 30:
+                text = html.escape(name[:int(w / 7) - 2]) + ".."
+            else:
+                text = ""
+            rects.append(
+                f'<g><title>{label} ({node["count"]} samples, {percent:.1f}%)</title>'
+                f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row_height - 1}" '
+                f'fill="hsl({hue},85%,60%)" rx="2"/>'
+                f'<text x="{x + 3:.1f}" y="{y + row_height - 4}">{text}</text></g>'
+            )
+            child_x = x
+            for child_name, child in node["children"].items():
+                draw(child_name, child, child_x, level + 1)
+                child_x += child["count"] * scale
+
+        draw("all", tree, 10.0, 0)
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'font-family="monospace" font-size="11">'
+            f'<text x="10" y="14">{self.samples} samples, {self.idle_samples} idle, '
+            f'{self.duration_seconds * 1000:.0f} ms</text>'
+            + "".join(rects) +
+            "</svg>"
+        )
+
+
+class RequestProfiler:
+    """
+    Profiles the event loop thread while a block runs
+
+    Every coroutine shares the loop thread, so concurrent requests show up in
+    the samples too; profile on a quiet replica for clean attribution.
+    """
+
+    def __init__(self, interval_seconds: float = 0.005, top_n: int = 25):
+        self.interval = interval_seconds
+        self.top_n = top_n
+        self.profile: Optional[Profile] = None
+        self._sampler: Optional[StackSampler] = None
+
+    def __enter__(self):
+        self._sampler = StackSampler(threading.get_ident(), self.interval)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._sampler.stop()
+        self.profile = self._sampler.profile(self.top_n)
+        get_profile_store().add(self.profile)
+        return False
+
+
+class ProfileStore:
+    """
+    Most recent request profiles, oldest evicted first
+
+    Profiles live in this process only; with several workers a profile is
+    served by the worker that recorded it (responses carry its worker_pid).
+    """
+
+    def __init__(self, max_profiles: int = 20):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+
+    def add(self, profile: Profile):
+        self._profiles[profile.id] = profile
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [
+            {"id": p.id, "created_at": p.created_at, "samples": p.samples,
+             "duration_ms": round(p.duration_seconds * 1000, 1)}
+            for p in reversed(self._profiles.values())
+        ]
+
+
+# Singleton instances
+_profile_store = None
+_continuous_sampler: Optional[StackSampler] = None
+
+
+def get_profile_store() -> ProfileStore:
+    """Get or create profile store singleton"""
+    global _profile_store
+    if _profile_store is None:
+        from core.config import settings
+        _profile_store = ProfileStore(settings.PROFILING_MAX_STORED)
+    return _profile_store
+
+
+def start_continuous_profiling(hz: float):
+    """Sample the calling (event loop) thread at a low rate for the life of the process"""
+    global _continuous_sampler
+    if _continuous_sampler is None and hz > 0:
+        _continuous_sampler = StackSampler(threading.get_ident(), 1.0 / hz)
+        _continuous_sampler.start()
+        logger.info("Continuous profiling at %s Hz", hz)
+
+
+def stop_continuous_profiling():
+    global _continuous_sampler
+    if _continuous_sampler is not None:
+        _continuous_sampler.stop()
+        _continuous_sampler = None
+
+
+def get_continuous_sampler() -> Optional[StackSampler]:
+    return _continuous_sampler
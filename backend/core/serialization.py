@@ -0,0 +1,68 @@
+"""
+Serialization
+Fast JSON encoding to bytes and response envelopes spliced around pre-encoded payloads
+"""
+
+import json
+from typing import Any, Iterable
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _default(obj: Any) -> Any:
+    """Types neither encoder handles natively: numpy scalars, dates under the stdlib encoder, sets"""
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    if hasattr(obj, "item"):
+        return obj.item()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj: Any) -> bytes:
+        """Compact UTF-8 JSON"""
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+    loads = orjson.loads
+
+else:
+    _encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(obj: Any) -> bytes:
+        """Compact UTF-8 JSON"""
+        return _encoder.encode(obj).encode("utf-8")
+
+    loads = json.loads
+
+
+def json_array(items: Iterable[bytes]) -> bytes:
+    """Join already-encoded JSON values into an array"""
+    return b"[" + b",".join(items) + b"]"
+
+
+def json_object(**fields: Any) -> bytes:
+    """
+    Encode an object whose bytes values are already-encoded JSON
+
+    Pre-encoded values are spliced in as-is, so a large cached payload is
+    copied once and never decoded or walked again.
+    """
+    parts = []
+    for key, value in fields.items():
+        encoded = value if isinstance(value, bytes) else dumps(value)
+        parts.append(dumps(key) + b":" + encoded)
+    return b"{" + b",".join(parts) + b"}"
+
+
+def envelope(data: bytes, **fields: Any) -> bytes:
+    """The API's {"success": true, "data": ...} envelope around an encoded payload"""
+    return json_object(success=True, data=data, **fields)
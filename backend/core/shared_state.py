@@ -0,0 +1,378 @@
+"""
+Shared State
+Key-value storage and invalidation messages shared by all worker processes
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from core.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+
+# Identifies this process in invalidation messages so it can skip its own
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+InvalidationHandler = Callable[[str], Awaitable[None]]
+ResyncHandler = Callable[[], Awaitable[None]]
+# Current value (None when absent) -> new value; may be called more than once
+Updater = Callable[[Optional[bytes]], bytes]
+
+
+class SharedState(ABC):
+    """
+    Namespaced key-value store with publish/subscribe invalidation
+
+    Values are bytes (usually pre-encoded JSON). Workers keep their own caches
+    of what they read and drop or reload an entry when another worker
+    publishes an invalidation for it, or reload everything when they may
+    have missed some.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self._handlers: Dict[str, List[InvalidationHandler]] = {}
+        self._resync_handlers: List[ResyncHandler] = []
+
+    async def start(self):
+        """Open connections and begin delivering invalidations"""
+
+    async def close(self):
+        """Stop delivering invalidations and close connections"""
+
+    @abstractmethod
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, namespace: str, key: str, value: bytes):
+        ...
+
+    @abstractmethod
+    async def update(self, namespace: str, key: str, updater: Updater) -> bytes:
+        """
+        Atomically replace a value with `updater(current)` and return it
+
+        For read-modify-write of shared values (appending to a history, bumping
+        a version), where a get followed by a set would lose another worker's
+        concurrent write. `updater` must be pure: it may run in a thread and be
+        retried.
+        """
+
+    @abstractmethod
+    async def delete(self, namespace: str, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def items(self, namespace: str) -> Dict[str, bytes]:
+        ...
+
+    async def publish(self, topic: str, key: str):
+        """Tell the other workers that `key` under `topic` changed"""
+
+    def subscribe(self, topic: str, handler: InvalidationHandler):
+        """Call `handler(key)` when another worker publishes on `topic`"""
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def on_resync(self, handler: ResyncHandler):
+        """Call `handler()` when invalidations may have been missed and every cached value is suspect"""
+        self._resync_handlers.append(handler)
+
+    async def _resync(self):
+        for handler in self._resync_handlers:
+            try:
+                await handler()
+            except Exception as e:
+                logger.error("Shared state resync handler failed: %s", e)
+
+    async def _dispatch(self, message: bytes):
+        try:
+            event = loads(message)
+        except ValueError:
+            logger.warning("Ignoring malformed invalidation message")
+            return
+        if event.get("origin") == WORKER_ID:
+            return
+        for handler in self._handlers.get(event.get("topic"), ()):
+            try:
+                await handler(event.get("key"))
+            except Exception as e:
+                logger.error("Invalidation handler for %s failed: %s", event.get("topic"), e)
+
+    @staticmethod
+    def _message(topic: str, key: str) -> bytes:
+        return dumps({"origin": WORKER_ID, "topic": topic, "key": key})
+
+
+class MemoryState(SharedState):
+    """Single-process state; there are no other workers to notify"""
+
+    name = "memory"
+
+    def __init__(self):
+        super().__init__()
+        self._data: Dict[str, Dict[str, bytes]] = {}
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        return self._data.get(namespace, {}).get(key)
+
+    async def set(self, namespace: str, key: str, value: bytes):
+        self._data.setdefault(namespace, {})[key] = value
+
+    async def update(self, namespace: str, key: str, updater: Updater) -> bytes:
+        values = self._data.setdefault(namespace, {})
+        values[key] = value = updater(values.get(key))
+        return value
+
+    async def delete(self, namespace: str, key: str) -> bool:
+        return self._data.get(namespace, {}).pop(key, None) is not None
+
+    async def items(self, namespace: str) -> Dict[str, bytes]:
+        return dict(self._data.get(namespace, {}))
+
+
+class SQLiteState(SharedState):
+    """
+    Local stand-in for Redis when all workers run on one host
+
+    A WAL-mode SQLite file holds the values; invalidations are rows in an
+    events table that every worker polls. Queries run in a thread so the event
+    loop never waits on the file lock.
+    """
+
+    name = "sqlite"
+
+    # Events older than this are pruned; a worker that finds it missed some
+    # (stalled longer than this) resyncs every cached value instead
+    EVENT_RETENTION_SECONDS = 60.0
+
+    def __init__(self, path: str, poll_interval: float = 0.2):
+        super().__init__()
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._last_event = 0
+        self._poller: Optional[asyncio.Task] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """The open connection, created on first use; call with the lock held"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False,
+                                         isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv (namespace TEXT, key TEXT, value BLOB, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "created REAL, message BLOB)"
+            )
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    async def _run(self, sql: str, params: tuple = ()) -> List[tuple]:
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    def _update(self, namespace: str, key: str, updater: Updater) -> bytes:
+        # The thread lock keeps this process's other queries out of the
+        # transaction; BEGIN IMMEDIATE takes the file's write lock up front, so
+        # no other worker writes between the read and the write
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT value FROM kv WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+                value = updater(bytes(row[0]) if row else None)
+                conn.execute(
+                    "INSERT OR REPLACE INTO kv (namespace, key, value) VALUES (?, ?, ?)", (namespace, key, value)
+                )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return value
+
+    async def start(self):
+        rows = await self._run("SELECT COALESCE(MAX(id), 0) FROM events")
+        self._last_event = rows[0][0]
+        self._poller = asyncio.create_task(self._poll())
+
+    async def close(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        rows = await self._run("SELECT value FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+        return bytes(rows[0][0]) if rows else None
+
+    async def set(self, namespace: str, key: str, value: bytes):
+        await self._run(
+            "INSERT OR REPLACE INTO kv (namespace, key, value) VALUES (?, ?, ?)", (namespace, key, value)
+        )
+
+    async def update(self, namespace: str, key: str, updater: Updater) -> bytes:
+        return await asyncio.to_thread(self._update, namespace, key, updater)
+
+    async def delete(self, namespace: str, key: str) -> bool:
+        existing = await self.get(namespace, key)
+        await self._run("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+        return existing is not None
+
+    async def items(self, namespace: str) -> Dict[str, bytes]:
+        rows = await self._run("SELECT key, value FROM kv WHERE namespace = ?", (namespace,))
+        return {key: bytes(value) for key, value in rows}
+
+    async def publish(self, topic: str, key: str):
+        now = time.time()
+        await self._run("INSERT INTO events (created, message) VALUES (?, ?)", (now, self._message(topic, key)))
+        await self._run("DELETE FROM events WHERE created < ?", (now - self.EVENT_RETENTION_SECONDS,))
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                rows = await self._run(
+                    "SELECT id, message FROM events WHERE id > ? ORDER BY id", (self._last_event,)
+                )
+            except sqlite3.Error as e:
+                logger.warning("Polling invalidations failed: %s", e)
+                continue
+            # Event ids are consecutive, so a gap means events were pruned before this worker saw them
+            if rows and rows[0][0] > self._last_event + 1:
+                logger.warning("Missed %s invalidations - reloading shared state", rows[0][0] - self._last_event - 1)
+                self._last_event = rows[-1][0]
+                await self._resync()
+                continue
+            for event_id, message in rows:
+                self._last_event = event_id
+                await self._dispatch(bytes(message))
+
+
+class RedisState(SharedState):
+    """Redis hashes per namespace and a pub/sub channel for invalidations"""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "ai-sales-insight"):
+        super().__init__()
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url)
+        self._prefix = prefix
+        self._channel = f"{prefix}:invalidate"
+        self._listener: Optional[asyncio.Task] = None
+
+    def _hash(self, namespace: str) -> str:
+        return f"{self._prefix}:{namespace}"
+
+    async def start(self):
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self._channel)
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        await self._client.aclose()
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        return await self._client.hget(self._hash(namespace), key)
+
+    async def set(self, namespace: str, key: str, value: bytes):
+        await self._client.hset(self._hash(namespace), key, value)
+
+    async def update(self, namespace: str, key: str, updater: Updater) -> bytes:
+        from redis.exceptions import WatchError
+
+        name = self._hash(namespace)
+        async with self._client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # Optimistic: the MULTI fails if the hash changed after WATCH, and is retried
+                    await pipe.watch(name)
+                    value = updater(await pipe.hget(name, key))
+                    pipe.multi()
+                    pipe.hset(name, key, value)
+                    await pipe.execute()
+                    return value
+                except WatchError:
+                    continue
+
+    async def delete(self, namespace: str, key: str) -> bool:
+        return bool(await self._client.hdel(self._hash(namespace), key))
+
+    async def items(self, namespace: str) -> Dict[str, bytes]:
+        values = await self._client.hgetall(self._hash(namespace))
+        return {key.decode(): value for key, value in values.items()}
+
+    async def publish(self, topic: str, key: str):
+        await self._client.publish(self._channel, self._message(topic, key))
+
+    async def _listen(self, pubsub):
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    await self._dispatch(message["data"])
+        finally:
+            await pubsub.aclose()
+
+
+def create_shared_state(url: str) -> SharedState:
+    """
+    Backend for a SHARED_STATE_URL
+
+    "memory://" keeps state in the process, "sqlite:///path" shares it between
+    workers on one host and "redis://..." across hosts.
+    """
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            return RedisState(url)
+        except ImportError:
+            logger.warning("redis package not installed - falling back to the SQLite shared state")
+            url = "sqlite:///data/shared_state.db"
+    if url.startswith("sqlite:///"):
+        return SQLiteState(url[len("sqlite:///"):])
+    return MemoryState()
+
+
+# Singleton instance
+_shared_state = None
+
+
+def get_shared_state() -> SharedState:
+    """Get or create shared state singleton"""
+    global _shared_state
+    if _shared_state is None:
+        from core.config import settings
+        url = settings.SHARED_STATE_URL
+        if not url:
+            # Several workers need a store they can all see; one needs nothing
+            url = "sqlite:///data/shared_state.db" if settings.WORKERS > 1 else "memory://"
+        _shared_state = create_shared_state(url)
+        logger.info("Shared state backend: %s", _shared_state.name)
+    return _shared_state
@@ -0,0 +1,137 @@
+"""
+Startup
+Import and time-to-ready measurements, and the warmup run before the app reports ready
+"""
+
+import asyncio
+import importlib
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+# Modules kept out of the import path of the app but needed by some endpoint;
+# warmup imports them so the first such request does not pay for it
+DEFERRED_IMPORTS = ("services.financial_analytics_service",)
+
+
+class StartupClock:
+    """
+    Timestamps of the startup phases, all on the perf_counter clock
+
+    `imports_started` is taken by main.py before anything else is imported, so
+    import time covers FastAPI, pydantic and the routers.
+    """
+
+    def __init__(self):
+        self.imports_started: Optional[float] = None
+        self.imports_finished: Optional[float] = None
+        self.lifespan_started: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self.warmup: Dict[str, Any] = {"enabled": False}
+
+    def mark(self, phase: str, at: Optional[float] = None):
+        setattr(self, phase, time.perf_counter() if at is None else at)
+
+    def _between(self, start: Optional[float], end: Optional[float]) -> Optional[float]:
+        if start is None or end is None:
+            return None
+        return end - start
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+
+    @property
+    def import_seconds(self) -> Optional[float]:
+        return self._between(self.imports_started, self.imports_finished)
+
+    @property
+    def time_to_ready_seconds(self) -> Optional[float]:
+        return self._between(self.imports_started, self.ready_at)
+
+    @property
+    def uptime_seconds(self) -> Optional[float]:
+        return self._between(self.ready_at, time.perf_counter())
+
+    def snapshot(self) -> Dict[str, Any]:
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return None if seconds is None else round(seconds * 1000, 1)
+
+        return {
+            "ready": self.ready,
+            "import_ms": ms(self.import_seconds),
+            "lifespan_ms": ms(self._between(self.lifespan_started, self.ready_at)),
+            "time_to_ready_ms": ms(self.time_to_ready_seconds),
+            "uptime_seconds": None if self.uptime_seconds is None else round(self.uptime_seconds),
+            "warmup": self.warmup
+        }
+
+
+STARTUP = StartupClock()
+
+REGISTRY.gauge("startup_import_seconds", "Time spent importing the application").set_function(
+    lambda: STARTUP.import_seconds or 0.0
+)
+REGISTRY.gauge("startup_time_to_ready_seconds", "Time from first import until the app was ready").set_function(
+    lambda: STARTUP.time_to_ready_seconds or 0.0
+)
+
+
+async def _timed(results: Dict[str, Any], name: str, coro):
+    start = time.perf_counter()
+    try:
+        await coro
+        results[name] = {"status": "ok"}
+    except Exception as e:
+        logger.warning("Warmup step %s failed: %s", name, e)
+        results[name] = {"status": "error", "error": str(e)}
+    results[name]["ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+
+async def _import_deferred():
+    for module in DEFERRED_IMPORTS:
+        await asyncio.to_thread(importlib.import_module, module)
+
+
+async def warmup(orchestrator, companies: Iterable[str], timeout_seconds: float) -> Dict[str, Any]:
+    """
+    Prepare the process for its first requests
+
+    Creates the LLM client (importing its SDK), imports deferred modules, maps
+    the stored price histories, loads the embedding model and vector index and
+    runs a quick brief per company to seed its sentiment series. Steps run concurrently; whatever has not finished within
+    the timeout is abandoned so a slow upstream cannot hold up readiness.
+    """
+    results: Dict[str, Any] = {}
+    steps = [
+        _timed(results, "llm_client", orchestrator.insight_synthesizer.llm_service.warmup()),
+        _timed(results, "deferred_imports", _import_deferred()),
+        _timed(results, "price_history", asyncio.to_thread(orchestrator.financial_agent.market_data.store.preload))
+    ]
+    if orchestrator.insight_synthesizer.vector_index is not None:
+        steps.append(_timed(results, "vector_index", orchestrator.insight_synthesizer.vector_index.warmup()))
+    steps.extend(
+        _timed(results, f"quick_brief:{company}", orchestrator.quick_brief(company))
+        for company in companies
+    )
+
+    start = time.perf_counter()
+    tasks = [asyncio.ensure_future(step) for step in steps]
+    _, pending = await asyncio.wait(tasks, timeout=timeout_seconds)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+        logger.warning("Warmup timed out after %ss with %s steps unfinished", timeout_seconds, len(pending))
+
+    return {
+        "enabled": True,
+        "ms": round((time.perf_counter() - start) * 1000, 1),
+        "timed_out": len(pending),
+        "steps": results
+    }
@@ -0,0 +1,288 @@
+"""
+Tracing
+Lightweight spans propagated through contextvars and exported as OTLP JSON
+"""
+
+import os
+import json
+import queue
+import random
+import threading
+import time
+import functools
+import logging
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# OTLP span kinds
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+_STATUS_OK = 1
+_STATUS_ERROR = 2
+
+
+class _NoopSpan:
+    """Stand-in when tracing is off or the trace was not sampled; every call is a no-op"""
+
+    __slots__ = ()
+
+    def update_name(self, name: str):
+        pass
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+# Active span of the current task; NOOP_SPAN marks an unsampled trace so its
+# descendants skip span creation too
+_current: ContextVar[Optional[Any]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    __slots__ = (
+        "name", "kind", "trace_id", "span_id", "parent_id", "attributes",
+        "start_ns", "end_ns", "status", "status_message", "_started", "_token"
+    )
+
+    def __init__(self, name: str, kind: int, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.status = _STATUS_OK
+        self.status_message = ""
+        self.start_ns = 0
+        self.end_ns = 0
+        self._started = 0
+        self._token = None
+
+    def update_name(self, name: str):
+        self.name = name
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        # Duration from the monotonic clock; wall clock only anchors the start
+        self._started = time.perf_counter_ns()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._started)
+        _current.reset(self._token)
+        if exc is not None:
+            self.status = _STATUS_ERROR
+            self.status_message = f"{exc_type.__name__}: {exc}"
+        if _exporter is not None:
+            _exporter.submit(self)
+        return False
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": self.status, "message": self.status_message} if self.status_message
+            else {"code": self.status}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _UnsampledTrace:
+    """Marks the context as unsampled so nested spans are skipped cheaply"""
+
+    __slots__ = ("_token",)
+
+    def __enter__(self):
+        self._token = _current.set(NOOP_SPAN)
+        return NOOP_SPAN
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        return False
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class _FileExporter:
+    """
+    Writes finished spans to a file, one OTLP ExportTraceServiceRequest per line
+
+    Spans are handed to a background thread through a queue so request handlers
+    never block on file I/O.
+    """
+
+    def __init__(self, path: str, service_name: str, batch_size: int = 512, flush_interval: float = 1.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.SimpleQueue[Optional[Span]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, span: Span):
+        self._queue.put(span)
+
+    def shutdown(self, timeout: float = 5.0):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        running = True
+        while running:
+            batch: List[Span] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    span = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+                except queue.Empty:
+                    break
+                if span is None:
+                    running = False
+                    break
+                batch.append(span)
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Span]):
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "ai-sales-insight"},
+                    "spans": [span.to_otlp() for span in batch]
+                }]
+            }]
+        }
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(request, separators=(",", ":")) + "\n")
+        except OSError as e:
+            logger.error("Failed to export %s spans: %s", len(batch), e)
+
+
+_enabled = False
+_sample_rate = 1.0
+_exporter: Optional[_FileExporter] = None
+_config: Optional[tuple] = None
+
+
+def setup_tracing(enabled: bool, sample_rate: float = 1.0, export_path: str = "logs/traces.jsonl",
+                  service_name: str = "ai-sales-insight"):
+    """Configure tracing; when disabled, start_span returns a shared no-op span"""
+    global _enabled, _sample_rate, _exporter, _config
+    shutdown_tracing()
+    _config = (enabled, sample_rate, export_path, service_name)
+    _enabled = enabled and sample_rate > 0
+    _sample_rate = min(max(sample_rate, 0.0), 1.0)
+    if _enabled:
+        _exporter = _FileExporter(export_path, service_name)
+        logger.info("Tracing enabled (sample rate %s, exporting to %s)", _sample_rate, export_path)
+
+
+def shutdown_tracing():
+    """Flush pending spans and stop the exporter thread"""
+    global _exporter, _enabled
+    _enabled = False
+    if _exporter is not None:
+        _exporter.shutdown()
+        _exporter = None
+
+
+def _restart_after_fork():
+    """The exporter thread does not survive fork (preloaded workers); start a fresh one"""
+    global _exporter
+    if _exporter is not None:
+        # The parent's thread is gone in the child; drop it without joining
+        _exporter = None
+        setup_tracing(*_config)
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def start_span(name: str, kind: int = INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+    """
+    Context manager for a span, child of the current one
+
+    A new trace is sampled at its root; children of an unsampled or disabled
+    trace get the no-op span without allocating anything.
+    """
+    if not _enabled:
+        return NOOP_SPAN
+
+    parent = _current.get()
+    if parent is NOOP_SPAN:
+        return NOOP_SPAN
+    if parent is None:
+        if _sample_rate < 1.0 and random.random() >= _sample_rate:
+            return _UnsampledTrace()
+        return Span(name, kind, f"{random.getrandbits(128):032x}", None, attributes or {})
+    return Span(name, kind, parent.trace_id, parent.span_id, attributes or {})
+
+
+def current_span():
+    """The active span, or the no-op span when there is none"""
+    return _current.get() or NOOP_SPAN
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current.get()
+    return getattr(span, "trace_id", None)
+
+
+def traced(name: str, kind: int = INTERNAL, **attributes: Any):
+    """Decorator running an async function inside a span"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not _enabled:
+                return await func(*args, **kwargs)
+            with start_span(name, kind, dict(attributes)):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,26 @@
+"""
+Gunicorn configuration
+Multi-worker deployment: gunicorn main:app -c gunicorn.conf.py
+"""
+
+import multiprocessing
+import os
+
+from core.config import settings
+
+# WORKERS=0 sizes the pool to one worker per CPU core
+if settings.WORKERS < 1:
+    settings.WORKERS = multiprocessing.cpu_count()
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = settings.WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master; workers fork with the code already loaded
+# and run the lifespan (shared state, orchestrator, warmup) themselves
+preload_app = True
+
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
@@ -3,34 +3,98 @@ AI Sales Insight - FastAPI Backend
 Main application entry point
 """
 
-from fastapi import FastAPI, HTTPException
+import time
+
+# Taken before any other import so import time includes FastAPI and the routers
+_imports_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from contextlib import asynccontextmanager
 import logging
+import uuid
 
 from core.config import settings
-from core.logging_config import setup_logging
+from core.logging_config import setup_logging, shutdown_logging, request_id_var
+from core.metrics import REGISTRY, PROMETHEUS_CONTENT_TYPE, HTTP_REQUESTS_IN_FLIGHT, HTTP_REQUEST_SECONDS
+from core.tracing import setup_tracing, shutdown_tracing, start_span, SERVER
+from core.profiling import start_continuous_profiling, stop_continuous_profiling
+from core.startup import STARTUP, warmup
+from core.shared_state import get_shared_state
+from core.process_pool import get_process_pool
+from core.loop_monitor import get_loop_monitor
+from agents.orchestrator import AgentOrchestrator
+from services.insight_store import get_insight_store
+from services.quick_brief_service import get_quick_brief_service
+from services.prefetch import get_prefetch_manager
+from services.market_data_service import get_market_data_service
 from api.v1 import router as api_router
 
+STARTUP.mark("imports_started", _imports_started)
+STARTUP.mark("imports_finished")
+
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+setup_tracing(settings.TRACING_ENABLED, settings.TRACING_SAMPLE_RATE, settings.TRACING_EXPORT_PATH)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     logger.info("[STARTUP] Starting AI Sales Insight API")
-    logger.info(f"Environment: {settings.APP_ENV}")
+    logger.info("Environment: %s", settings.APP_ENV)
+    
+    STARTUP.mark("lifespan_started")
+    
+    # Lifespan runs on the event loop thread, which is the thread sampled
+    start_continuous_profiling(settings.PROFILING_CONTINUOUS_HZ)
+    if settings.LOOP_MONITOR_ENABLED:
+        get_loop_monitor().start()
+    
+    # Runs in each worker after the fork, so connections and tasks are per process
+    shared_state = get_shared_state()
+    await shared_state.start()
+    await get_insight_store().attach(shared_state)
+    await get_quick_brief_service().attach(shared_state)
+    
+    # CPU-bound analysis runs in this worker's own pool, started before traffic
+    await get_process_pool().prestart()
+    
+    # One orchestrator (and so one set of agents and services) per process,
+    # handed to endpoints through api.deps.get_orchestrator
+    app.state.orchestrator = AgentOrchestrator()
+    
+    if settings.STARTUP_WARMUP:
+        STARTUP.warmup = await warmup(
+            app.state.orchestrator,
+            settings.STARTUP_WARMUP_COMPANIES,
+            settings.STARTUP_WARMUP_TIMEOUT_SECONDS
+        )
     
-    # Initialize services here
-    # await init_database()
-    # await init_vector_store()
+    # Keeps the price history behind the financial agent current
+    get_market_data_service().start_refresh(settings.MARKET_DATA_REFRESH_INTERVAL_MINUTES * 60)
+    
+    STARTUP.mark("ready_at")
+    startup = STARTUP.snapshot()
+    logger.info(
+        "[STARTUP] Ready in %s ms (imports %s ms, lifespan %s ms)",
+        startup["time_to_ready_ms"], startup["import_ms"], startup["lifespan_ms"]
+    )
     
     yield
     
     logger.info("[SHUTDOWN] Shutting down AI Sales Insight API")
-    # Cleanup here
+    stop_continuous_profiling()
+    await get_prefetch_manager().close()
+    await get_market_data_service().close()
+    await get_loop_monitor().stop()
+    await get_shared_state().close()
+    get_process_pool().shutdown()
+    shutdown_tracing()
+    shutdown_logging()
 
 
 # Create FastAPI app
@@ -52,6 +116,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Track in-flight requests and per-route latency, and open the root trace span"""
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    with start_span(f"{request.method} {request.url.path}", SERVER) as span:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # Route templates keep label cardinality bounded ("/companies/{company_name}")
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, request.method, route, str(status))
+            span.update_name(f"{request.method} {route}")
+            span.set_attributes({
+                "http.method": request.method,
+                "http.route": route,
+                "http.status_code": status
+            })
+
+
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    """Tag logs for this request with an id (taken from X-Request-ID when supplied)"""
+    request_id = (request.headers.get("X-Request-ID") or uuid.uuid4().hex)[:128]
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
@@ -67,19 +169,29 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (503 until startup and warmup have finished)"""
+    if not STARTUP.ready:
+        raise HTTPException(status_code=503, detail="Starting up")
     return {
         "status": "healthy",
         "environment": settings.APP_ENV,
-        "timestamp": "2025-12-19T00:00:00Z"
+        "timestamp": "2025-12-19T00:00:00Z",
+        "startup": STARTUP.snapshot()
     }
 
 
 if __name__ == "__main__":
     import uvicorn
     
+    # For several workers with preloaded code use: gunicorn main:app -c gunicorn.conf.py
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
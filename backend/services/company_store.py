@@ -0,0 +1,58 @@
+"""
+Company Store
+Tracked companies kept in shared state so every worker sees the same list
+"""
+
+import logging
+from typing import Dict, Any, List, Optional
+
+from core.serialization import dumps, loads
+from core.shared_state import SharedState, get_shared_state
+from services.insight_store import company_key
+
+logger = logging.getLogger(__name__)
+
+
+class CompanyStore:
+    """
+    Company records as encoded JSON, one entry per company key
+
+    Reads always go to shared state (a dict lookup in memory, a local SQLite
+    read or one Redis round trip), so there is no per-worker copy to go stale.
+    """
+
+    NAMESPACE = "companies"
+
+    def __init__(self, shared_state: SharedState):
+        self.shared = shared_state
+
+    async def list_encoded(self) -> List[bytes]:
+        """Encoded records in insertion-independent name order"""
+        items = await self.shared.items(self.NAMESPACE)
+        return [items[key] for key in sorted(items)]
+
+    async def list(self) -> List[Dict[str, Any]]:
+        return [loads(value) for value in await self.list_encoded()]
+
+    async def get(self, company_name: str) -> Optional[Dict[str, Any]]:
+        value = await self.shared.get(self.NAMESPACE, company_key(company_name))
+        return loads(value) if value is not None else None
+
+    async def put(self, company: Dict[str, Any]):
+        """Insert or replace the record for company["name"]"""
+        await self.shared.set(self.NAMESPACE, company_key(company["name"]), dumps(company))
+
+    async def delete(self, company_name: str) -> bool:
+        return await self.shared.delete(self.NAMESPACE, company_key(company_name))
+
+
+# Singleton instance
+_company_store = None
+
+
+def get_company_store() -> CompanyStore:
+    """Get or create company store singleton"""
+    global _company_store
+    if _company_store is None:
+        _company_store = CompanyStore(get_shared_state())
+    return _company_store
@@ -4,13 +4,70 @@ Integrates with external APIs for real company data
 """
 
 import os
+import math
+import time
+import asyncio
 import aiohttp
 import logging
-from typing import Dict, Any, List, Optional
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, AsyncIterator
 from datetime import datetime, timedelta
 
+from services.rate_limiter import get_rate_limiter, lane_for, RateLimitExceeded
+from services.latency_stats import get_latency_stats, SOURCE
+from services.resilience import get_resilient_caller, check_response, LIVE, FALLBACK
+from core.tracing import traced, current_span, CLIENT
+from core.process_pool import get_process_pool
+
 logger = logging.getLogger(__name__)
 
+NEWSAPI_URL = "https://newsapi.org/v2/everything"
+NEWSAPI_MAX_PAGE_SIZE = 100
+
+
+def score_sentiment(text: str) -> float:
+    """
+    Simple sentiment analysis
+    In production: Use TextBlob, VADER, or LLM-based analysis
+    
+    Pure and module-level so batches can be scored in the process pool.
+    
+    Returns:
+        Sentiment score between -1 (negative) and 1 (positive)
+    """
+    positive_words = ['growth', 'success', 'innovation', 'partnership', 'expansion', 'award', 'achievement']
+    negative_words = ['decline', 'loss', 'lawsuit', 'controversy', 'layoff', 'scandal', 'fail']
+    
+    text_lower = text.lower()
+    
+    positive_count = sum(1 for word in positive_words if word in text_lower)
+    negative_count = sum(1 for word in negative_words if word in text_lower)
+    
+    if positive_count + negative_count == 0:
+        return 0.0
+    
+    return (positive_count - negative_count) / (positive_count + negative_count)
+
+
+@dataclass
+class NewsQuotaUsage:
+    """NewsAPI quota spent by a single request"""
+    requests: int = 0
+    articles: int = 0
+    total_available: int = 0
+    stopped_early: bool = False
+    elapsed_ms: int = 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "articles": self.articles,
+            "total_available": self.total_available,
+            "stopped_early": self.stopped_early,
+            "elapsed_ms": self.elapsed_ms
+        }
+
 
 class DataSourcesService:
     """Service for fetching data from external APIs"""
@@ -21,10 +78,27 @@ class DataSourcesService:
         self.clearbit_key = os.getenv("CLEARBIT_API_KEY")  # For company enrichment
         self.alphavantage_key = os.getenv("ALPHAVANTAGE_API_KEY")  # For financial data
         
+        self.rate_limiter = get_rate_limiter()
+        self.latency = get_latency_stats()
+        self.resilience = get_resilient_caller()
+        
+        from core.config import settings
+        from services.news_coalescer import NewsQueryCoalescer
+        self.news_coalescer = NewsQueryCoalescer(
+            self,
+            window_ms=settings.NEWS_COALESCE_WINDOW_MS,
+            max_query_length=settings.NEWS_COALESCE_MAX_QUERY_LENGTH,
+            max_batch=settings.NEWS_COALESCE_MAX_BATCH,
+            min_matches=settings.NEWS_COALESCE_MIN_MATCHES
+        )
+        
+    @traced("datasource.newsapi.search", CLIENT, provider="newsapi")
     async def search_company_news(
         self,
         company_name: str,
-        days_back: int = 30
+        days_back: int = 30,
+        page_size: int = 20,
+        priority: str = "medium"
     ) -> List[Dict[str, Any]]:
         """
         Search for company news using NewsAPI
@@ -32,53 +106,250 @@ class DataSourcesService:
         Args:
             company_name: Name of the company
             days_back: Number of days to look back
+            page_size: Number of articles to request (NewsAPI max 100)
+            priority: Request priority; "low" is paced in the batch lane
             
         Returns:
-            List of news articles
+            List of news articles, each with its provenance
         """
         if not self.newsapi_key:
             logger.warning("NewsAPI key not configured")
             return self._get_mock_news(company_name)
         
+        if not await self._acquire("newsapi", priority):
+            return self._get_mock_news(company_name)
+        
+        from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+        params = {
+            "q": company_name,
+            "from": from_date,
+            "sortBy": "relevancy",
+            "language": "en",
+            "apiKey": self.newsapi_key,
+            "pageSize": min(page_size, NEWSAPI_MAX_PAGE_SIZE)
+        }
+        
+        async def attempt():
+            async with self._session("newsapi") as session:
+                async with session.get(NEWSAPI_URL, params=params) as response:
+                    self._check("newsapi", response)
+                    return await response.json()
+        
         try:
-            from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+            data, provenance = await self.resilience.call("newsapi", attempt, lane_for(priority))
+            # Scored outside the session so the upstream's timing is the HTTP call alone
+            return await self._normalize_articles(data.get("articles", []), provenance)
+                        
+        except Exception as e:
+            logger.error("Error fetching news: %s", e)
+            return self._get_mock_news(company_name)
+    
+    async def search_company_news_coalesced(
+        self,
+        company_name: str,
+        days_back: int = 30,
+        language: str = "en",
+        aliases: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for company news, sharing one NewsAPI request with concurrent lookups
+        
+        Intended for batch and refresh workloads: lookups arriving within the
+        coalescing window are merged into OR queries and demultiplexed by name.
+        
+        Args:
+            company_name: Name of the company
+            days_back: Number of days to look back
+            language: Article language
+            aliases: Other names the company appears under in articles
             
-            url = "https://newsapi.org/v2/everything"
-            params = {
-                "q": company_name,
-                "from": from_date,
-                "sortBy": "relevancy",
-                "language": "en",
-                "apiKey": self.newsapi_key,
-                "pageSize": 20
-            }
+        Returns:
+            List of news articles mentioning the company
+        """
+        if not self.newsapi_key:
+            logger.warning("NewsAPI key not configured")
+            return self._get_mock_news(company_name)
+        
+        current_span().set_attribute("newsapi.coalesced", True)
+        return await self.news_coalescer.search(company_name, days_back, language, aliases or ())
+    
+    async def stream_company_news(
+        self,
+        company_name: str,
+        days_back: int = 30,
+        max_articles: int = 200,
+        time_budget_seconds: float = 5.0,
+        page_size: int = 50,
+        max_concurrency: int = 3,
+        usage: Optional[NewsQuotaUsage] = None,
+        priority: str = "medium"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream company news from NewsAPI page by page
+        
+        The first page is fetched alone to learn the result count; the rest are
+        fetched with at most max_concurrency pages in flight and yielded as each
+        page arrives. Consumers stop early simply by leaving the loop (wrap the
+        generator in contextlib.aclosing so pending pages are cancelled promptly).
+        
+        Args:
+            company_name: Name of the company
+            days_back: Number of days to look back
+            max_articles: Article budget across all pages
+            time_budget_seconds: Wall-clock budget; pages still in flight are dropped
+            page_size: Articles per page (NewsAPI max 100)
+            max_concurrency: Pages fetched concurrently
+            usage: Optional quota tracker updated as pages are fetched
+            priority: Request priority; "low" is paced in the batch lane
             
+        Yields:
+            Normalized news articles
+        """
+        usage = usage if usage is not None else NewsQuotaUsage()
+        
+        if not self.newsapi_key:
+            logger.warning("NewsAPI key not configured")
+            for article in self._get_mock_news(company_name):
+                yield article
+            return
+        
+        start = time.monotonic()
+        deadline = start + time_budget_seconds
+        page_size = min(page_size, NEWSAPI_MAX_PAGE_SIZE)
+        from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+        base_params = {
+            "q": company_name,
+            "from": from_date,
+            "sortBy": "relevancy",
+            "language": "en",
+            "apiKey": self.newsapi_key,
+            "pageSize": page_size
+        }
+        lane = lane_for(priority)
+        pending: set = set()
+        yielded = 0
+        
+        try:
             async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        articles = data.get("articles", [])
-                        
-                        return [{
-                            "title": article.get("title"),
-                            "description": article.get("description"),
-                            "url": article.get("url"),
-                            "source": article.get("source", {}).get("name"),
-                            "published_at": article.get("publishedAt"),
-                            "sentiment": self._analyze_sentiment(article.get("title", "") + " " + article.get("description", ""))
-                        } for article in articles]
-                    else:
-                        logger.error(f"NewsAPI error: {response.status}")
-                        return self._get_mock_news(company_name)
-                        
+                first = await self.fetch_news_page(session, base_params, 1, usage, lane)
+                if first is None:
+                    for article in self._get_mock_news(company_name):
+                        yield article
+                    return
+                
+                total, articles = first
+                usage.total_available = total
+                last_page = math.ceil(min(total, max_articles) / page_size)
+                
+                for article in articles[:max_articles]:
+                    yielded += 1
+                    yield article
+                
+                next_page = 2
+                while next_page <= last_page or pending:
+                    while next_page <= last_page and len(pending) < max_concurrency:
+                        pending.add(asyncio.create_task(
+                            self.fetch_news_page(session, base_params, next_page, usage, lane)
+                        ))
+                        next_page += 1
+                    
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        usage.stopped_early = True
+                        break
+                    
+                    done, pending = await asyncio.wait(
+                        pending,
+                        timeout=remaining,
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        page = task.result()
+                        if page is None:
+                            # Quota or plan limit hit: stop scheduling further pages
+                            last_page = next_page - 1
+                            continue
+                        for article in page[1]:
+                            if yielded >= max_articles:
+                                break
+                            yielded += 1
+                            yield article
+        except GeneratorExit:
+            usage.stopped_early = True
+            raise
+        finally:
+            for task in pending:
+                task.cancel()
+            usage.elapsed_ms = int((time.monotonic() - start) * 1000)
+    
+    @traced("datasource.newsapi.page", CLIENT, provider="newsapi")
+    async def fetch_news_page(
+        self,
+        session: aiohttp.ClientSession,
+        base_params: Dict[str, Any],
+        page: int,
+        usage: NewsQuotaUsage,
+        lane: str = "interactive"
+    ) -> Optional[tuple]:
+        """
+        Fetch one NewsAPI page; returns (total_results, articles) or None on error
+        
+        Public for callers that build their own query, such as the coalescer.
+        """
+        current_span().set_attribute("newsapi.page", page)
+        try:
+            await self.rate_limiter.acquire("newsapi", lane)
+        except RateLimitExceeded as e:
+            logger.warning(str(e))
+            return None
+        
+        async def attempt():
+            usage.requests += 1
+            # Pages share the caller's session but each attempt is timed and bounded on its own
+            async with self.latency.timed(SOURCE, "newsapi") as timeout:
+                async with session.get(
+                    NEWSAPI_URL, params={**base_params, "page": page}, timeout=aiohttp.ClientTimeout(total=timeout)
+                ) as response:
+                    self._check("newsapi", response)
+                    return await response.json()
+        
+        try:
+            data, provenance = await self.resilience.call("newsapi", attempt, lane)
         except Exception as e:
-            logger.error(f"Error fetching news: {e}")
-            return self._get_mock_news(company_name)
+            logger.error("Error fetching news page %s: %s", page, e)
+            return None
+        
+        articles = await self._normalize_articles(data.get("articles", []), provenance)
+        usage.articles += len(articles)
+        return data.get("totalResults", 0), articles
+    
+    async def _normalize_articles(self, articles: List[Dict[str, Any]], provenance: str = LIVE) -> List[Dict[str, Any]]:
+        """Normalize a page of raw articles, scoring their sentiment (in the process pool for large pages)"""
+        texts = [(article.get("title") or "") + " " + (article.get("description") or "") for article in articles]
+        sentiments = await get_process_pool().map(score_sentiment, texts)
+        return [
+            self._normalize_article(article, sentiment, provenance)
+            for article, sentiment in zip(articles, sentiments)
+        ]
+    
+    def _normalize_article(self, article: Dict[str, Any], sentiment: float, provenance: str = LIVE) -> Dict[str, Any]:
+        """Convert a raw NewsAPI article into the service's article shape"""
+        return {
+            "title": article.get("title"),
+            "description": article.get("description"),
+            "url": article.get("url"),
+            "source": (article.get("source") or {}).get("name"),
+            "published_at": article.get("publishedAt"),
+            "sentiment": sentiment,
+            "provenance": provenance
+        }
     
+    @traced("datasource.serper.search", CLIENT, provider="serper")
     async def search_web(
         self,
         query: str,
-        num_results: int = 10
+        num_results: int = 10,
+        priority: str = "medium"
     ) -> List[Dict[str, Any]]:
         """
         Perform web search using Serper API (Google Search)
@@ -86,152 +357,179 @@ class DataSourcesService:
         Args:
             query: Search query
             num_results: Number of results to return
+            priority: Request priority; "low" is paced in the batch lane
             
         Returns:
-            List of search results
+            List of search results, each with its provenance
         """
         if not self.serper_key:
             logger.warning("Serper API key not configured")
             return []
         
-        try:
-            url = "https://google.serper.dev/search"
-            headers = {
-                "X-API-KEY": self.serper_key,
-                "Content-Type": "application/json"
-            }
-            payload = {
-                "q": query,
-                "num": num_results
-            }
-            
-            async with aiohttp.ClientSession() as session:
+        if not await self._acquire("serper", priority):
+            return []
+        
+        url = "https://google.serper.dev/search"
+        headers = {
+            "X-API-KEY": self.serper_key,
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "q": query,
+            "num": num_results
+        }
+        
+        async def attempt():
+            async with self._session("serper") as session:
                 async with session.post(url, json=payload, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        results = data.get("organic", [])
-                        
-                        return [{
-                            "title": result.get("title"),
-                            "snippet": result.get("snippet"),
-                            "url": result.get("link"),
-                            "position": result.get("position")
-                        } for result in results]
-                    else:
-                        logger.error(f"Serper API error: {response.status}")
-                        return []
-                        
+                    self._check("serper", response)
+                    return await response.json()
+        
+        try:
+            data, provenance = await self.resilience.call("serper", attempt, lane_for(priority))
         except Exception as e:
-            logger.error(f"Error performing web search: {e}")
+            logger.error("Error performing web search: %s", e)
             return []
+        
+        return [{
+            "title": result.get("title"),
+            "snippet": result.get("snippet"),
+            "url": result.get("link"),
+            "position": result.get("position"),
+            "provenance": provenance
+        } for result in data.get("organic", [])]
     
+    @traced("datasource.clearbit.enrich", CLIENT, provider="clearbit")
     async def enrich_company_data(
         self,
-        company_domain: str
+        company_domain: str,
+        priority: str = "medium"
     ) -> Optional[Dict[str, Any]]:
         """
         Enrich company data using Clearbit API
         
         Args:
             company_domain: Company domain (e.g., "microsoft.com")
+            priority: Request priority; "low" is paced in the batch lane
             
         Returns:
-            Enriched company data
+            Enriched company data with its provenance
         """
         if not self.clearbit_key:
             logger.warning("Clearbit API key not configured")
             return None
         
-        try:
-            url = f"https://company.clearbit.com/v2/companies/find"
-            headers = {"Authorization": f"Bearer {self.clearbit_key}"}
-            params = {"domain": company_domain}
-            
-            async with aiohttp.ClientSession() as session:
+        if not await self._acquire("clearbit", priority):
+            return None
+        
+        url = f"https://company.clearbit.com/v2/companies/find"
+        headers = {"Authorization": f"Bearer {self.clearbit_key}"}
+        params = {"domain": company_domain}
+        
+        async def attempt():
+            async with self._session("clearbit") as session:
                 async with session.get(url, headers=headers, params=params) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        logger.error(f"Clearbit API error: {response.status}")
-                        return None
-                        
+                    self._check("clearbit", response)
+                    return await response.json()
+        
+        try:
+            data, provenance = await self.resilience.call("clearbit", attempt, lane_for(priority))
         except Exception as e:
-            logger.error(f"Error enriching company data: {e}")
+            logger.error("Error enriching company data: %s", e)
             return None
+        return {**data, "provenance": provenance}
     
+    @traced("datasource.alphavantage.quote", CLIENT, provider="alphavantage")
     async def get_stock_data(
         self,
-        symbol: str
+        symbol: str,
+        priority: str = "medium"
     ) -> Optional[Dict[str, Any]]:
         """
         Get stock data using Alpha Vantage API
         
         Args:
             symbol: Stock ticker symbol
+            priority: Request priority; "low" is paced in the batch lane
             
         Returns:
-            Stock data
+            Stock data with its provenance
         """
         if not self.alphavantage_key:
             logger.warning("Alpha Vantage API key not configured")
             return None
         
+        if not await self._acquire("alphavantage", priority):
+            return None
+        
+        url = "https://www.alphavantage.co/query"
+        params = {
+            "function": "GLOBAL_QUOTE",
+            "symbol": symbol,
+            "apikey": self.alphavantage_key
+        }
+        
+        async def attempt():
+            async with self._session("alphavantage") as session:
+                async with session.get(url, params=params) as response:
+                    self._check("alphavantage", response)
+                    return await response.json()
+        
         try:
-            url = "https://www.alphavantage.co/query"
-            params = {
-                "function": "GLOBAL_QUOTE",
-                "symbol": symbol,
-                "apikey": self.alphavantage_key
-            }
+            data, provenance = await self.resilience.call("alphavantage", attempt, lane_for(priority))
+            quote = data.get("Global Quote", {})
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        quote = data.get("Global Quote", {})
-                        
-                        if quote:
-                            return {
-                                "symbol": symbol,
-                                "price": float(quote.get("05. price", 0)),
-                                "change": float(quote.get("09. change", 0)),
-                                "change_percent": quote.get("10. change percent", "0%"),
-                                "volume": int(quote.get("06. volume", 0)),
-                                "latest_trading_day": quote.get("07. latest trading day")
-                            }
-                        return None
-                    else:
-                        logger.error(f"Alpha Vantage API error: {response.status}")
-                        return None
+            if quote:
+                return {
+                    "symbol": symbol,
+                    "price": float(quote.get("05. price", 0)),
+                    "change": float(quote.get("09. change", 0)),
+                    "change_percent": quote.get("10. change percent", "0%"),
+                    "volume": int(quote.get("06. volume", 0)),
+                    "latest_trading_day": quote.get("07. latest trading day"),
+                    "provenance": provenance
+                }
+            return None
                         
         except Exception as e:
-            logger.error(f"Error fetching stock data: {e}")
+            logger.error("Error fetching stock data: %s", e)
             return None
     
-    def _analyze_sentiment(self, text: str) -> float:
+    @asynccontextmanager
+    async def _session(self, provider: str) -> AsyncIterator[aiohttp.ClientSession]:
         """
-        Simple sentiment analysis
-        In production: Use TextBlob, VADER, or LLM-based analysis
+        Client session for one call to a provider, timed into its latency stats
         
-        Returns:
-            Sentiment score between -1 (negative) and 1 (positive)
+        The session's total timeout adapts to the provider's recent latency and
+        the request's remaining deadline (see LatencyStats.timeout).
         """
-        positive_words = ['growth', 'success', 'innovation', 'partnership', 'expansion', 'award', 'achievement']
-        negative_words = ['decline', 'loss', 'lawsuit', 'controversy', 'layoff', 'scandal', 'fail']
-        
-        text_lower = text.lower()
-        
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
-        
-        if positive_count + negative_count == 0:
-            return 0.0
-        
-        return (positive_count - negative_count) / (positive_count + negative_count)
+        async with self.latency.timed(SOURCE, provider) as timeout:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+                yield session
+    
+    def _check(self, provider: str, response: aiohttp.ClientResponse):
+        """Record the response with tracing and the rate limiter; raises UpstreamError unless it is a 200"""
+        current_span().set_attribute("http.status_code", response.status)
+        self.rate_limiter.observe(provider, response.status, response.headers)
+        check_response(provider, response)
+    
+    async def _acquire(self, provider: str, priority: str) -> bool:
+        """Wait for a rate-limit slot; False when the provider is over budget"""
+        try:
+            await self.rate_limiter.acquire(provider, lane_for(priority))
+            return True
+        except RateLimitExceeded as e:
+            logger.warning(str(e))
+            return False
+    
+    def _analyze_sentiment(self, text: str) -> float:
+        """Sentiment of one text on the event loop; see score_sentiment"""
+        return score_sentiment(text)
     
     def _get_mock_news(self, company_name: str) -> List[Dict[str, Any]]:
         """Generate mock news data for demo"""
-        return [
+        current_span().set_attribute("fallback", "mock_news")
+        articles = [
             {
                 "title": f"{company_name} Announces Major Product Launch",
                 "description": f"{company_name} unveiled its latest product innovation at the annual conference",
@@ -257,6 +555,9 @@ class DataSourcesService:
                 "sentiment": 0.9
             }
         ]
+        for article in articles:
+            article["provenance"] = FALLBACK
+        return articles
 
 
 # Singleton instance
@@ -0,0 +1,113 @@
+"""
+Financial Analytics Service
+Portfolio-wide financial metrics computed as column operations over stored agent outputs
+"""
+
+import re
+import logging
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+# Matches "$65M (estimated)", "₹12,000 Cr", "$3.5M/month", "240K"
+_MONEY_PATTERN = r"(\d[\d,]*(?:\.\d+)?)\s*(K|M|B|Cr|L)?\b"
+_UNIT_MULTIPLIERS = {"K": 1e3, "M": 1e6, "B": 1e9, "CR": 1e7, "L": 1e5}
+
+PERCENTILE_COLUMNS = ["revenue_growth", "headcount_growth", "total_funding", "revenue_current"]
+
+
+def _as_text(column: pd.Series) -> pd.Series:
+    return column.fillna("").astype(str)
+
+
+def _parse_money(column: pd.Series) -> pd.Series:
+    """Vectorized money string -> float (currency symbols ignored)"""
+    parts = _as_text(column).str.extract(_MONEY_PATTERN, flags=re.IGNORECASE)
+    values = pd.to_numeric(_as_text(parts[0]).str.replace(",", "", regex=False), errors="coerce")
+    multipliers = _as_text(parts[1]).str.upper().map(_UNIT_MULTIPLIERS).fillna(1.0).astype("float64")
+    return values * multipliers
+
+
+def _parse_number(column: pd.Series) -> pd.Series:
+    """Vectorized int/str -> float"""
+    return pd.to_numeric(_as_text(column).str.replace(",", "", regex=False), errors="coerce")
+
+
+def compute_financial_analytics(
+    rows: List[Dict[str, Any]],
+    industries: Optional[Dict[str, str]] = None,
+    now: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Growth, funding recency, burn proxies and peer percentiles for a book of companies
+
+    Args:
+        rows: Flat financial rows from InsightStore.financial_rows
+        industries: Optional company name -> industry for peer grouping
+        now: Reference time for funding recency
+
+    Returns:
+        Dict with per-company records and portfolio medians
+    """
+    if not rows:
+        return {"companies": [], "summary": {"company_count": 0}}
+
+    raw = pd.DataFrame.from_records(rows)
+    df = pd.DataFrame({"company_name": raw["company_name"]})
+
+    industries = {k.lower(): v for k, v in (industries or {}).items()}
+    df["industry"] = raw["company_name"].str.lower().map(industries).fillna("Unknown")
+
+    df["revenue_current"] = _parse_money(raw["revenue_current"])
+    df["revenue_previous"] = _parse_money(raw["revenue_previous"])
+    df["total_funding"] = _parse_money(raw["total_funding"])
+    df["last_round_amount"] = _parse_money(raw["last_round_amount"])
+    df["arr"] = _parse_money(raw["arr"])
+    employees_current = _parse_number(raw["employees_current"])
+    employees_previous = _parse_number(raw["employees_previous"])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["revenue_growth"] = df["revenue_current"] / df["revenue_previous"] - 1.0
+        df["headcount_growth"] = employees_current / employees_previous - 1.0
+
+        burn = _parse_money(raw["burn_rate"])
+        is_monthly = _as_text(raw["burn_rate"]).str.contains("month", case=False)
+        monthly_burn = burn.where(is_monthly, burn / 12.0)
+        net_new_revenue = df["revenue_current"] - df["revenue_previous"]
+
+        df["monthly_burn"] = monthly_burn
+        # Burn multiple: cash burned per dollar of net new revenue (lower is better)
+        df["burn_multiple"] = (monthly_burn * 12.0 / net_new_revenue).where(net_new_revenue > 0)
+        df["runway_months_proxy"] = df["last_round_amount"] / monthly_burn
+
+    reference = pd.Timestamp(now or datetime.now())
+    last_round_date = pd.to_datetime(raw["last_round_date"], errors="coerce")
+    df["last_round"] = raw["last_round"]
+    df["funding_recency_days"] = (reference - last_round_date).dt.days
+
+    df = df.replace([np.inf, -np.inf], np.nan)
+
+    for column in PERCENTILE_COLUMNS:
+        df[f"{column}_percentile"] = df.groupby("industry")[column].rank(pct=True)
+        df[f"{column}_portfolio_percentile"] = df[column].rank(pct=True)
+
+    numeric = df.select_dtypes("number").columns
+    df[numeric] = df[numeric].round(4)
+
+    summary_columns = ["revenue_growth", "headcount_growth", "funding_recency_days", "burn_multiple"]
+    medians = df[summary_columns].median()
+
+    records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    return {
+        "companies": records,
+        "summary": {
+            "company_count": len(df),
+            "medians": {k: (None if pd.isna(v) else round(float(v), 4)) for k, v in medians.items()},
+            "industries": df["industry"].value_counts().to_dict()
+        }
+    }
@@ -0,0 +1,183 @@
+"""
+Insight Store
+Keeps generated insights per company for history, caching and portfolio analytics
+"""
+
+import time
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional, Deque, NamedTuple
+
+from core.serialization import dumps, loads, json_array, json_object
+
+logger = logging.getLogger(__name__)
+
+
+def company_key(company_name: str) -> str:
+    """Case- and whitespace-insensitive key for a company"""
+    return " ".join(company_name.lower().split())
+
+
+class StoredInsight(NamedTuple):
+    result: Dict[str, Any]
+    # JSON of `result`, encoded once at save time and served as-is afterwards
+    encoded: bytes
+    saved_at: float  # time.time(), comparable across workers
+
+
+class InsightStore:
+    """
+    Per-company insight history (replace with database in production)
+
+    Reads are served from this process's copy. Once attached to shared state,
+    every save or clear is written through and announced, and the other
+    workers reload that company's history, so all copies stay coherent. A
+    save prepends to the shared history atomically, so concurrent saves from
+    different workers are all kept.
+    """
+
+    NAMESPACE = "insights"
+
+    def __init__(self, history_limit: int = 20):
+        self.history_limit = history_limit
+        self._history: Dict[str, Deque[StoredInsight]] = {}
+        # Flat per-company view of the latest FinancialAgent output, kept at
+        # write time so portfolio analytics can build columns without walking results
+        self._financial_rows: Dict[str, Dict[str, Any]] = {}
+        self._shared = None
+
+    async def attach(self, shared_state):
+        """Load the shared histories and follow other workers' changes"""
+        self._shared = shared_state
+        await self._reload_all()
+        shared_state.subscribe(self.NAMESPACE, self._reload)
+        shared_state.on_resync(self._reload_all)
+
+    def _record(self, key: str, entry: StoredInsight):
+        history = self._history.setdefault(key, deque(maxlen=self.history_limit))
+        history.appendleft(entry)
+
+        financial = (entry.result.get("agent_outputs") or {}).get("financial")
+        if financial and financial.get("status") == "success":
+            self._financial_rows[key] = flatten_financial_output(entry.result["company_name"], financial)
+
+    def _load(self, key: str, value: bytes):
+        """Replace a company's history with the shared copy (stored newest first)"""
+        self._history.pop(key, None)
+        self._financial_rows.pop(key, None)
+        for item in reversed(loads(value)):
+            result = item["result"]
+            self._record(key, StoredInsight(result, dumps(result), item["saved_at"]))
+
+    async def _reload_all(self):
+        values = await self._shared.items(self.NAMESPACE)
+        self._history.clear()
+        self._financial_rows.clear()
+        for key, value in values.items():
+            self._load(key, value)
+
+    async def _reload(self, key: str):
+        value = await self._shared.get(self.NAMESPACE, key)
+        if value is None:
+            self._history.pop(key, None)
+            self._financial_rows.pop(key, None)
+        else:
+            self._load(key, value)
+
+    async def save(self, result: Dict[str, Any]):
+        """Record a successful gather_insights result"""
+        key = company_key(result["company_name"])
+        entry = StoredInsight(result, dumps(result), time.time())
+        if self._shared is None:
+            self._record(key, entry)
+            return
+
+        def prepend(current: Optional[bytes]) -> bytes:
+            older = loads(current)[:self.history_limit - 1] if current else []
+            return json_array([
+                json_object(saved_at=entry.saved_at, result=entry.encoded),
+                *(dumps(item) for item in older)
+            ])
+
+        # Other workers' concurrent saves are in the returned history too
+        self._load(key, await self._shared.update(self.NAMESPACE, key, prepend))
+        # Keep this result object (and its encoding) rather than the decoded copy
+        self._history[key][0] = entry
+        await self._shared.publish(self.NAMESPACE, key)
+
+    def latest_entry(self, company_name: str, max_age_seconds: Optional[float] = None) -> Optional[StoredInsight]:
+        """Most recent stored insight, if any (and no older than max_age_seconds)"""
+        history = self._history.get(company_key(company_name))
+        if not history:
+            return None
+        entry = history[0]
+        if max_age_seconds is not None and time.time() - entry.saved_at > max_age_seconds:
+            return None
+        return entry
+
+    def latest(self, company_name: str) -> Optional[Dict[str, Any]]:
+        entry = self.latest_entry(company_name)
+        return entry.result if entry else None
+
+    def history_entries(self, company_name: str, limit: int = 10) -> List[StoredInsight]:
+        history = self._history.get(company_key(company_name)) or ()
+        return list(history)[:limit]
+
+    def history(self, company_name: str, limit: int = 10) -> List[Dict[str, Any]]:
+        return [entry.result for entry in self.history_entries(company_name, limit)]
+
+    async def clear(self, company_name: str) -> bool:
+        key = company_key(company_name)
+        self._financial_rows.pop(key, None)
+        cleared = self._history.pop(key, None) is not None
+
+        if self._shared is not None:
+            cleared = await self._shared.delete(self.NAMESPACE, key) or cleared
+            await self._shared.publish(self.NAMESPACE, key)
+        return cleared
+
+    def financial_rows(self, company_names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Flattened financial rows, optionally restricted to the given companies"""
+        if company_names is None:
+            return list(self._financial_rows.values())
+        rows = (self._financial_rows.get(company_key(name)) for name in company_names)
+        return [row for row in rows if row is not None]
+
+
+def flatten_financial_output(company_name: str, output: Dict[str, Any]) -> Dict[str, Any]:
+    """Raw (unparsed) financial fields of one FinancialAgent output as a flat row"""
+    data = output.get("data") or {}
+    funding = data.get("funding_info") or {}
+    last_round = funding.get("last_funding_round") or {}
+    metrics = data.get("financial_metrics") or {}
+    revenue = metrics.get("revenue") or {}
+    employees = metrics.get("employees") or {}
+    stock = data.get("stock_data") or {}
+
+    return {
+        "company_name": company_name,
+        "total_funding": funding.get("total_funding"),
+        "last_round": last_round.get("round"),
+        "last_round_amount": last_round.get("amount"),
+        "last_round_date": last_round.get("date"),
+        "revenue_current": revenue.get("current_year"),
+        "revenue_previous": revenue.get("previous_year"),
+        "employees_current": employees.get("current"),
+        "employees_previous": employees.get("previous_year"),
+        "burn_rate": metrics.get("burn_rate"),
+        "arr": metrics.get("arr"),
+        "stock_change_percent": stock.get("change_percent"),
+        "collected_at": data.get("last_updated")
+    }
+
+
+# Singleton instance
+_insight_store = None
+
+
+def get_insight_store() -> InsightStore:
+    """Get or create insight store singleton"""
+    global _insight_store
+    if _insight_store is None:
+        _insight_store = InsightStore()
+    return _insight_store
@@ -0,0 +1,198 @@
+"""
+Latency Stats
+Exponentially weighted latency and success statistics for agents and upstream sources
+"""
+
+import math
+import time
+import asyncio
+import contextvars
+import logging
+from contextlib import asynccontextmanager
+from statistics import NormalDist
+from typing import Any, Dict, Optional, Tuple
+
+from core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+LATENCY_EWMA = REGISTRY.gauge(
+    "latency_ewma_seconds", "Exponentially weighted mean latency", ("kind", "name")
+)
+LATENCY_P99_ESTIMATE = REGISTRY.gauge(
+    "latency_p99_estimate_seconds", "Estimated p99 latency from the weighted mean and variance", ("kind", "name")
+)
+SOURCE_TIMEOUTS = REGISTRY.counter(
+    "source_timeouts_total", "Upstream calls abandoned at their adaptive timeout", ("source",)
+)
+
+# What is being measured
+AGENT = "agent"
+SOURCE = "source"
+
+# Absolute time.monotonic() the current request must finish by, set by the orchestrator
+deadline_var: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left before the current request's deadline, None without one"""
+    deadline = deadline_var.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class EwmaStats:
+    """Weighted mean and variance of latency plus a weighted success rate"""
+
+    __slots__ = ("alpha", "mean", "variance", "success_rate", "samples", "updated")
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.mean = 0.0
+        self.variance = 0.0
+        self.success_rate = 1.0
+        self.samples = 0
+        self.updated = 0.0
+
+    def record(self, seconds: float, success: bool):
+        if self.samples == 0:
+            self.mean = seconds
+            self.success_rate = 1.0 if success else 0.0
+        else:
+            # Incremental EWMA variance (West 1979)
+            delta = seconds - self.mean
+            increment = self.alpha * delta
+            self.mean += increment
+            self.variance = (1 - self.alpha) * (self.variance + delta * increment)
+            self.success_rate += self.alpha * ((1.0 if success else 0.0) - self.success_rate)
+        self.samples += 1
+        self.updated = time.monotonic()
+
+    def quantile(self, q: float) -> float:
+        """Latency percentile, treating latency as roughly normal around its mean"""
+        return self.mean + NormalDist().inv_cdf(q) * math.sqrt(self.variance)
+
+    @property
+    def p99(self) -> float:
+        return self.quantile(0.99)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mean_ms": round(self.mean * 1000, 1),
+            "p99_estimate_ms": round(self.p99 * 1000, 1),
+            "success_rate": round(self.success_rate, 3),
+            "samples": self.samples
+        }
+
+
+class LatencyStats:
+    """
+    Per-agent and per-source latency tracking for scheduling and timeouts
+
+    Estimates are only trusted after `min_samples` observations and for
+    `max_age` seconds after the last one; otherwise expected() returns None and
+    timeout() the ceiling, so a cold process behaves exactly as it did without
+    the stats, and an agent skipped for being slow is tried again once its
+    estimate has gone stale. Each worker learns on its own.
+    """
+
+    def __init__(self, alpha: float = 0.2, min_samples: int = 5, timeout_multiplier: float = 2.0,
+                 min_timeout: float = 1.0, max_timeout: float = 30.0, max_age: float = 600.0):
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.max_age = max_age
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._stats: Dict[Tuple[str, str], EwmaStats] = {}
+
+    def record(self, kind: str, name: str, seconds: float, success: bool = True):
+        stats = self._stats.get((kind, name))
+        if stats is None:
+            stats = self._stats[(kind, name)] = EwmaStats(self.alpha)
+            LATENCY_EWMA.set_function(lambda: stats.mean, kind, name)
+            LATENCY_P99_ESTIMATE.set_function(lambda: stats.p99, kind, name)
+        stats.record(seconds, success)
+
+    def get(self, kind: str, name: str) -> Optional[EwmaStats]:
+        """Stats once there are enough, recent enough samples to act on"""
+        stats = self._stats.get((kind, name))
+        if stats is None or stats.samples < self.min_samples or time.monotonic() - stats.updated > self.max_age:
+            return None
+        return stats
+
+    def expected(self, kind: str, name: str) -> Optional[float]:
+        stats = self.get(kind, name)
+        return stats.mean if stats is not None else None
+
+    def quantile(self, kind: str, name: str, q: float) -> Optional[float]:
+        stats = self.get(kind, name)
+        return stats.quantile(q) if stats is not None else None
+
+    def timeout(self, kind: str, name: str) -> float:
+        """
+        Seconds to allow one call: a multiple of its p99 estimate, within bounds
+
+        Also capped by what is left of the current request's deadline, but
+        never below min_timeout so a late call still gets a real attempt.
+        """
+        stats = self.get(kind, name)
+        timeout = self.max_timeout
+        if stats is not None:
+            timeout = min(max(stats.p99 * self.timeout_multiplier, self.min_timeout), self.max_timeout)
+        remaining = remaining_budget()
+        if remaining is not None:
+            timeout = min(timeout, max(remaining, self.min_timeout))
+        return timeout
+
+    @asynccontextmanager
+    async def timed(self, kind: str, name: str):
+        """
+        Time the block into the stats, yielding the timeout it should use
+
+        Exceptions count as failures (a timeout records the time waited);
+        cancellation records nothing, since it says nothing about the upstream.
+        """
+        start = time.perf_counter()
+        success = False
+        try:
+            yield self.timeout(kind, name)
+            success = True
+        except asyncio.TimeoutError:
+            if kind == SOURCE:
+                SOURCE_TIMEOUTS.inc(name)
+            raise
+        except asyncio.CancelledError:
+            start = None
+            raise
+        finally:
+            if start is not None:
+                self.record(kind, name, time.perf_counter() - start, success)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        snapshot: Dict[str, Dict[str, Any]] = {AGENT: {}, SOURCE: {}}
+        for (kind, name), stats in self._stats.items():
+            snapshot.setdefault(kind, {})[name] = stats.to_dict()
+            if kind == SOURCE:
+                snapshot[kind][name]["timeout_s"] = round(self.timeout(kind, name), 2)
+        return snapshot
+
+
+# Singleton instance
+_latency_stats = None
+
+
+def get_latency_stats() -> LatencyStats:
+    """Get or create latency stats singleton"""
+    global _latency_stats
+    if _latency_stats is None:
+        from core.config import settings
+        _latency_stats = LatencyStats(
+            settings.LATENCY_EWMA_ALPHA,
+            settings.LATENCY_MIN_SAMPLES,
+            settings.SOURCE_TIMEOUT_P99_MULTIPLIER,
+            settings.SOURCE_TIMEOUT_MIN_SECONDS,
+            settings.SOURCE_TIMEOUT_MAX_SECONDS,
+            settings.LATENCY_STATS_MAX_AGE_SECONDS
+        )
+    return _latency_stats
@@ -4,19 +4,53 @@ Provides unified interface for OpenAI, Anthropic, and local models
 """
 
 import os
+import re
+import json
+import time
+import asyncio
+import importlib.util
 from typing import Optional, Dict, Any, AsyncGenerator
 import logging
 from enum import Enum
 
+from core.metrics import LLM_REQUEST_SECONDS, LLM_TOKENS
+from core.tracing import traced, current_span, CLIENT
+from core.process_pool import get_process_pool
+
 logger = logging.getLogger(__name__)
 
 
+# Responses at least this long are parsed off the event loop
+STRUCTURED_OUTPUT_OFFLOAD_CHARS = 256 * 1024
+
+
+def parse_structured_output(response: str) -> Dict[str, Any]:
+    """JSON from a completion, falling back to a fenced code block, then the raw text"""
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        # Try to extract JSON from markdown code blocks
+        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group(1))
+
+        logger.warning("Failed to parse structured output, returning raw response")
+        return {"raw_response": response}
+
+
 class LLMProvider(Enum):
     OPENAI = "openai"
     ANTHROPIC = "anthropic"
     OLLAMA = "ollama"
 
 
+# SDK module each provider's client comes from (Ollama is plain HTTP)
+_SDK_MODULES = {
+    LLMProvider.OPENAI: "openai",
+    LLMProvider.ANTHROPIC: "anthropic"
+}
+
+
 class LLMService:
     """Service for interacting with various LLM providers"""
     
@@ -27,10 +61,30 @@ class LLMService:
         
         # Determine which provider to use
         self.provider = self._determine_provider()
-        self.client = None
-        
-        if self.provider:
-            self._initialize_client()
+        # The SDK is imported when the client is first needed, not at startup
+        self._client = None
+        self._client_initialized = False
+    
+    @property
+    def client(self):
+        """Provider SDK client, created (and its SDK imported) on first access"""
+        if not self._client_initialized:
+            self._client_initialized = True
+            if self.provider:
+                self._initialize_client()
+        return self._client
+    
+    @property
+    def available(self) -> bool:
+        """Whether an SDK client exists or can be created, checked without importing the SDK"""
+        if self._client_initialized:
+            return self._client is not None
+        module = _SDK_MODULES.get(self.provider)
+        return module is not None and importlib.util.find_spec(module) is not None
+    
+    async def warmup(self):
+        """Create the client off the event loop so the first request skips the SDK import"""
+        await asyncio.to_thread(lambda: self.client)
     
     def _determine_provider(self) -> Optional[LLMProvider]:
         """Determine which LLM provider to use based on available API keys"""
@@ -49,12 +103,12 @@ class LLMService:
         try:
             if self.provider == LLMProvider.OPENAI:
                 from openai import AsyncOpenAI
-                self.client = AsyncOpenAI(api_key=self.openai_api_key)
+                self._client = AsyncOpenAI(api_key=self.openai_api_key)
                 logger.info("OpenAI client initialized")
                 
             elif self.provider == LLMProvider.ANTHROPIC:
                 from anthropic import AsyncAnthropic
-                self.client = AsyncAnthropic(api_key=self.anthropic_api_key)
+                self._client = AsyncAnthropic(api_key=self.anthropic_api_key)
                 logger.info("Anthropic client initialized")
                 
             elif self.provider == LLMProvider.OLLAMA:
@@ -62,9 +116,10 @@ class LLMService:
                 logger.info("Ollama client will use HTTP requests")
                 
         except ImportError as e:
-            logger.warning(f"Failed to import LLM client: {e}. Install with: pip install openai anthropic")
-            self.client = None
+            logger.warning("Failed to import LLM client: %s. Install with: pip install openai anthropic", e)
+            self._client = None
     
+    @traced("llm.completion", CLIENT)
     async def generate_completion(
         self,
         prompt: str,
@@ -86,23 +141,48 @@ class LLMService:
         Returns:
             Generated text response
         """
+        span = current_span()
         if not self.client:
             logger.warning("No LLM client available, using fallback")
+            span.set_attribute("llm.outcome", "fallback")
             return await self._fallback_generation(prompt)
         
+        provider = self.provider.value if self.provider else "none"
+        span.set_attributes({"llm.provider": provider, "llm.max_tokens": max_tokens})
+        start = time.perf_counter()
         try:
             if self.provider == LLMProvider.OPENAI:
-                return await self._generate_openai(prompt, system_prompt, temperature, max_tokens, stream)
+                result = await self._generate_openai(prompt, system_prompt, temperature, max_tokens, stream)
             elif self.provider == LLMProvider.ANTHROPIC:
-                return await self._generate_anthropic(prompt, system_prompt, temperature, max_tokens, stream)
+                result = await self._generate_anthropic(prompt, system_prompt, temperature, max_tokens, stream)
             elif self.provider == LLMProvider.OLLAMA:
-                return await self._generate_ollama(prompt, system_prompt, temperature, max_tokens, stream)
+                result = await self._generate_ollama(prompt, system_prompt, temperature, max_tokens, stream)
+            else:
+                result = None
         except Exception as e:
-            logger.error(f"Error generating completion: {e}")
+            LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, provider, "error")
+            span.set_attributes({"llm.outcome": "error", "error": str(e)})
+            logger.error("Error generating completion: %s", e)
             return await self._fallback_generation(prompt)
         
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, provider, "success")
+        span.set_attribute("llm.outcome", "success")
+        if result is not None:
+            return result
         return await self._fallback_generation(prompt)
     
+    def _record_tokens(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+        """Add provider-reported token usage to the token counters"""
+        provider = self.provider.value if self.provider else "none"
+        current_span().set_attributes({
+            "llm.prompt_tokens": prompt_tokens or 0,
+            "llm.completion_tokens": completion_tokens or 0
+        })
+        if prompt_tokens:
+            LLM_TOKENS.inc(provider, "prompt", amount=prompt_tokens)
+        if completion_tokens:
+            LLM_TOKENS.inc(provider, "completion", amount=completion_tokens)
+    
     async def _generate_openai(
         self,
         prompt: str,
@@ -130,6 +210,8 @@ class LLMService:
             stream=False  # Force non-streaming for simplicity
         )
         
+        if response.usage:
+            self._record_tokens(response.usage.prompt_tokens, response.usage.completion_tokens)
         return response.choices[0].message.content or ""
     
     async def _generate_anthropic(
@@ -159,6 +241,9 @@ class LLMService:
             stream=False  # Force non-streaming
         )
         
+        usage = getattr(response, "usage", None)
+        if usage:
+            self._record_tokens(usage.input_tokens, usage.output_tokens)
         return response.content[0].text
     
     async def _generate_ollama(
@@ -188,6 +273,7 @@ class LLMService:
         async with aiohttp.ClientSession() as session:
             async with session.post(url, json=payload) as response:
                 result = await response.json()
+                self._record_tokens(result.get("prompt_eval_count"), result.get("eval_count"))
                 return result.get("response", "")
     
     async def _fallback_generation(self, prompt: str) -> str:
@@ -223,19 +309,10 @@ class LLMService:
             temperature=0.3  # Lower temperature for structured output
         )
         
-        # Parse JSON response
-        import json
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            # Try to extract JSON from markdown code blocks
-            import re
-            json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(1))
-            
-            logger.warning("Failed to parse structured output, returning raw response")
-            return {"raw_response": response}
+        # Large responses are parsed in the process pool so they do not stall the loop
+        if len(response) >= STRUCTURED_OUTPUT_OFFLOAD_CHARS:
+            return await get_process_pool().run(parse_structured_output, response)
+        return parse_structured_output(response)
 
 
 # Singleton instance
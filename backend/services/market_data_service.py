@@ -0,0 +1,454 @@
+"""
+Market Data Service
+Bulk stock quotes and a memory-mapped daily price history store
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import warnings
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+from datetime import date, datetime
+
+import aiohttp
+import numpy as np
+
+from services.rate_limiter import get_rate_limiter, BATCH
+
+logger = logging.getLogger(__name__)
+
+ALPHAVANTAGE_URL = "https://www.alphavantage.co/query"
+BULK_QUOTE_LIMIT = 100  # symbols per REALTIME_BULK_QUOTES call
+TRADING_DAYS_PER_YEAR = 252
+
+# 16 bytes per trading day: ~4KB per symbol-year
+PRICE_DTYPE = np.dtype([("day", "<i4"), ("close", "<f4"), ("volume", "<i8")])
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _to_day(value: str) -> int:
+    """ISO date -> days since epoch"""
+    return (date.fromisoformat(value[:10]) - _EPOCH).days
+
+
+def _from_day(day: int) -> str:
+    return date.fromordinal(_EPOCH.toordinal() + int(day)).isoformat()
+
+
+class PriceHistoryStore:
+    """
+    Daily close/volume history, one .npy file per symbol
+
+    Files are opened with mmap_mode="r", so the OS page cache holds the data and
+    a portfolio read touches only the trailing year of each file. Writers
+    replace whole files, so a map is reopened when its file's inode or mtime
+    changes (another worker refreshed it); the old map stays valid until then.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root = Path(root_dir)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._maps: Dict[str, np.ndarray] = {}
+        self._stamps: Dict[str, Tuple[int, int]] = {}
+        # Upserts run in worker threads; merges of one file must not interleave
+        self._write_lock = threading.Lock()
+
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{symbol.upper().replace('/', '_')}.npy"
+
+    def has(self, symbol: str) -> bool:
+        return symbol.upper() in self._maps or self._path(symbol).exists()
+
+    def load(self, symbol: str) -> Optional[np.ndarray]:
+        """Memory-mapped history for a symbol, sorted by day"""
+        key = symbol.upper()
+        try:
+            stat = self._path(key).stat()
+        except FileNotFoundError:
+            self._maps.pop(key, None)
+            return None
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        history = self._maps.get(key)
+        if history is None or self._stamps.get(key) != stamp:
+            history = np.load(self._path(key), mmap_mode="r")
+            self._maps[key] = history
+            self._stamps[key] = stamp
+        return history
+
+    def modified_at(self, symbol: str) -> Optional[float]:
+        """Epoch seconds of the last write to a symbol's file"""
+        try:
+            return self._path(symbol).stat().st_mtime
+        except FileNotFoundError:
+            return None
+    
+    def preload(self) -> int:
+        """Map every stored symbol up front; returns the number of symbols"""
+        for path in self.root.glob("*.npy"):
+            if not path.stem.endswith(".tmp"):
+                self.load(path.stem)
+        return len(self._maps)
+
+    def upsert(self, symbol: str, rows: np.ndarray):
+        """
+        Merge rows into a symbol's history; newer rows win on duplicate days
+
+        Blocking file I/O - call it through asyncio.to_thread from the loop.
+        """
+        key = symbol.upper()
+        with self._write_lock:
+            existing = self.load(key)
+            if existing is not None:
+                # Copy out of the mmap and drop it so the file can be replaced (Windows)
+                existing = np.array(existing)
+                self._maps.pop(key, None)
+            merged = rows if existing is None else np.concatenate([rows, existing])
+
+            # Stable unique on day keeps the first occurrence, i.e. the incoming row
+            _, first = np.unique(merged["day"], return_index=True)
+            merged = merged[first]
+
+            # Per-process temp name so workers writing the same symbol never share one
+            path = self._path(key)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp.npy")
+            np.save(tmp, merged)
+            os.replace(tmp, path)
+
+    def window(self, symbols: List[str], days: int) -> np.ndarray:
+        """
+        Trailing closes as a (symbols x days) matrix, NaN-padded on the left
+
+        Rows are aligned on each symbol's last `days` trading sessions, which is
+        exact for symbols on the same exchange calendar.
+        """
+        matrix = np.full((len(symbols), days), np.nan, dtype=np.float64)
+        for i, symbol in enumerate(symbols):
+            history = self.load(symbol)
+            if history is None or len(history) == 0:
+                continue
+            closes = history["close"][-days:]
+            matrix[i, days - len(closes):] = closes
+        return matrix
+
+    def last_day(self, symbol: str) -> Optional[str]:
+        history = self.load(symbol)
+        if history is None or len(history) == 0:
+            return None
+        return _from_day(history["day"][-1])
+
+
+def compute_portfolio_stats(closes: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized price statistics over a (symbols x days) close matrix
+
+    Returns:
+        Column arrays aligned with the matrix rows; NaN where history is too short
+    """
+    n_days = closes.shape[1]
+    last = closes[:, -1]
+
+    def trailing_return(k: int) -> np.ndarray:
+        if n_days <= k:
+            return np.full(closes.shape[0], np.nan)
+        return last / closes[:, -1 - k] - 1.0
+
+    # All-NaN rows (unknown symbols) legitimately produce NaN; silence the warnings
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        log_returns = np.diff(np.log(closes), axis=1)
+        year = closes[:, -TRADING_DAYS_PER_YEAR:]
+        high = np.max(np.where(np.isnan(year), -np.inf, year), axis=1)
+        low = np.min(np.where(np.isnan(year), np.inf, year), axis=1)
+        high[np.isinf(high)] = np.nan
+        low[np.isinf(low)] = np.nan
+
+        stats = {
+            "last_close": last,
+            "return_1d": trailing_return(1),
+            "return_1m": trailing_return(21),
+            "return_3m": trailing_return(63),
+            "return_1y": trailing_return(TRADING_DAYS_PER_YEAR),
+            "volatility_30d": np.nanstd(log_returns[:, -30:], axis=1, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR),
+            "volatility_1y": np.nanstd(log_returns, axis=1, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR),
+            "week_52_high": high,
+            "week_52_low": low,
+            "range_position": (last - low) / (high - low)
+        }
+    return stats
+
+
+class MarketDataService:
+    """
+    Bulk quote fetching and portfolio analytics backed by PriceHistoryStore
+
+    The store is filled by refresh_tracked(), run on an interval by
+    start_refresh() and on demand from the admin API. Analytics whose last
+    session is more than `max_age_days` old are flagged stale.
+    """
+
+    def __init__(self, store: PriceHistoryStore, max_concurrency: int = 5, max_age_days: int = 4):
+        self.store = store
+        self.alphavantage_key = os.getenv("ALPHAVANTAGE_API_KEY")
+        self.max_concurrency = max_concurrency
+        self.max_age_days = max_age_days
+        self.rate_limiter = get_rate_limiter()
+        self._bulk_supported = True
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._last_refresh: Optional[Dict[str, Any]] = None
+
+    async def get_quotes(self, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Latest quotes for many symbols, recorded into the history store
+
+        Uses REALTIME_BULK_QUOTES (100 symbols per call) and drops to concurrent
+        GLOBAL_QUOTE calls if the API key is not entitled to the bulk endpoint.
+        """
+        symbols = sorted({s.upper() for s in symbols})
+        if not symbols or not self.alphavantage_key:
+            if not self.alphavantage_key:
+                logger.warning("Alpha Vantage API key not configured")
+            return {}
+
+        quotes: Dict[str, Dict[str, Any]] = {}
+        async with aiohttp.ClientSession() as session:
+            if self._bulk_supported:
+                for start in range(0, len(symbols), BULK_QUOTE_LIMIT):
+                    chunk = symbols[start:start + BULK_QUOTE_LIMIT]
+                    result = await self._fetch_bulk(session, chunk)
+                    if result is None:
+                        self._bulk_supported = False
+                        break
+                    quotes.update(result)
+
+            missing = [s for s in symbols if s not in quotes]
+            if missing:
+                quotes.update(await self._fetch_individual(missing))
+
+        await asyncio.to_thread(self._record_quotes, quotes)
+        return quotes
+
+    async def refresh_history(self, symbols: Iterable[str]):
+        """Backfill daily history (full on first sight, last 100 sessions after)"""
+        if not self.alphavantage_key:
+            logger.warning("Alpha Vantage API key not configured")
+            return
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with aiohttp.ClientSession() as session:
+            async def refresh(symbol: str):
+                async with semaphore:
+                    params = {
+                        "function": "TIME_SERIES_DAILY",
+                        "symbol": symbol,
+                        "outputsize": "compact" if self.store.has(symbol) else "full",
+                        "apikey": self.alphavantage_key
+                    }
+                    try:
+                        await self.rate_limiter.acquire("alphavantage", BATCH)
+                        async with session.get(ALPHAVANTAGE_URL, params=params) as response:
+                            self.rate_limiter.observe("alphavantage", response.status, response.headers)
+                            if response.status != 200:
+                                logger.error("Alpha Vantage history error for %s: %s", symbol, response.status)
+                                return
+                            data = await response.json()
+                    except Exception as e:
+                        logger.error("Error fetching history for %s: %s", symbol, e)
+                        return
+
+                    series = data.get("Time Series (Daily)") or {}
+                    if series:
+                        # A full backfill is ~5000 rows; parse and write off the loop
+                        await asyncio.to_thread(self._store_series, symbol, series)
+
+            await asyncio.gather(*(refresh(s.upper()) for s in symbols))
+
+    async def refresh_tracked(self, min_age_seconds: float = 0) -> Dict[str, Any]:
+        """
+        Refresh history and quotes for every tracked company with a known ticker
+
+        Symbols whose file was written less than `min_age_seconds` ago are
+        skipped, so workers on the same interval do not all refetch them.
+        """
+        from services.company_store import get_company_store
+        from services.symbol_index import get_symbol_index
+
+        start_time = time.perf_counter()
+        symbol_index = get_symbol_index()
+        companies = [c for c in await get_company_store().list() if c.get("tracked")]
+        symbols = set()
+        unresolved = []
+        for company in companies:
+            symbol = symbol_index.best(company["name"]) if symbol_index else None
+            if symbol:
+                symbols.add(symbol.upper())
+            else:
+                unresolved.append(company["name"])
+
+        now = time.time()
+        due = sorted(
+            s for s in symbols
+            if (self.store.modified_at(s) or 0) <= now - min_age_seconds
+        )
+        if due:
+            await self.refresh_history(due)
+            await self.get_quotes(due)
+
+        self._last_refresh = {
+            "finished_at": datetime.now().isoformat(),
+            "tracked": len(companies),
+            "refreshed": due,
+            "skipped_recent": len(symbols) - len(due),
+            "unresolved": unresolved,
+            "duration_ms": round((time.perf_counter() - start_time) * 1000, 2)
+        }
+        logger.info(
+            "Market data refresh: %s symbols refreshed, %s recent, %s companies without a ticker",
+            len(due), len(symbols) - len(due), len(unresolved)
+        )
+        return self._last_refresh
+
+    def start_refresh(self, interval_seconds: float):
+        """Run refresh_tracked() every `interval_seconds` until close()"""
+        if self._refresh_task is None and interval_seconds > 0:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(interval_seconds), name="market-data-refresh")
+
+    async def _refresh_loop(self, interval_seconds: float):
+        while True:
+            try:
+                # Half the interval: another worker's refresh this round counts as done
+                await self.refresh_tracked(min_age_seconds=interval_seconds / 2)
+            except Exception as e:
+                logger.error("Market data refresh failed: %s", e)
+            await asyncio.sleep(interval_seconds)
+
+    async def close(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "periodic_refresh": self._refresh_task is not None,
+            "max_age_days": self.max_age_days,
+            "last_refresh": self._last_refresh
+        }
+
+    def portfolio_analytics(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns, volatility and 52-week range for every symbol from stored history
+
+        No network calls: one matrix read and a few array ops for the whole book.
+        Each entry carries `as_of` (its last session) and `stale`, set when that
+        is more than max_age_days ago.
+        """
+        today = _to_day(date.today().isoformat())
+        symbols = [s.upper() for s in symbols]
+        closes = self.store.window(symbols, TRADING_DAYS_PER_YEAR + 1)
+        stats = compute_portfolio_stats(closes)
+
+        result: Dict[str, Dict[str, Any]] = {}
+        for i, symbol in enumerate(symbols):
+            if np.isnan(stats["last_close"][i]):
+                continue
+            result[symbol] = {
+                name: (None if np.isnan(column[i]) else round(float(column[i]), 4))
+                for name, column in stats.items()
+            }
+            as_of = self.store.last_day(symbol)
+            result[symbol]["as_of"] = as_of
+            result[symbol]["stale"] = today - _to_day(as_of) > self.max_age_days
+        return result
+
+    async def _fetch_bulk(
+        self,
+        session: aiohttp.ClientSession,
+        symbols: List[str]
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        """One bulk quote call; None means the endpoint is not available for this key"""
+        params = {
+            "function": "REALTIME_BULK_QUOTES",
+            "symbol": ",".join(symbols),
+            "apikey": self.alphavantage_key
+        }
+        try:
+            await self.rate_limiter.acquire("alphavantage", BATCH)
+            async with session.get(ALPHAVANTAGE_URL, params=params) as response:
+                self.rate_limiter.observe("alphavantage", response.status, response.headers)
+                if response.status != 200:
+                    logger.error("Alpha Vantage bulk quote error: %s", response.status)
+                    return {}
+                data = await response.json()
+        except Exception as e:
+            logger.error("Error fetching bulk quotes: %s", e)
+            return {}
+
+        rows = data.get("data")
+        if not isinstance(rows, list):
+            # Free keys get an "Information" message instead of data
+            logger.info("Alpha Vantage bulk quotes unavailable, using per-symbol quotes")
+            return None
+
+        quotes = {}
+        for row in rows:
+            symbol = (row.get("symbol") or "").upper()
+            if not symbol:
+                continue
+            quotes[symbol] = {
+                "symbol": symbol,
+                "price": float(row.get("close") or 0),
+                "change": float(row.get("change") or 0),
+                "change_percent": f"{row.get('change_percent') or 0}%",
+                "volume": int(float(row.get("volume") or 0)),
+                "latest_trading_day": (row.get("timestamp") or "")[:10] or None
+            }
+        return quotes
+
+    async def _fetch_individual(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Per-symbol GLOBAL_QUOTE calls with bounded concurrency"""
+        from services.data_sources_service import get_data_sources_service
+
+        data_sources = get_data_sources_service()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(symbol: str):
+            async with semaphore:
+                return await data_sources.get_stock_data(symbol, priority="low")
+
+        results = await asyncio.gather(*(fetch(s) for s in symbols))
+        return {s: q for s, q in zip(symbols, results) if q}
+
+    def _store_series(self, symbol: str, series: Dict[str, Dict[str, str]]):
+        """TIME_SERIES_DAILY bars -> rows, merged into the store (runs in a thread)"""
+        rows = np.empty(len(series), dtype=PRICE_DTYPE)
+        for i, (day, bar) in enumerate(series.items()):
+            rows[i] = (_to_day(day), float(bar.get("4. close", 0)), int(float(bar.get("5. volume", 0))))
+        self.store.upsert(symbol, rows)
+
+    def _record_quotes(self, quotes: Dict[str, Dict[str, Any]]):
+        """Append each quote as the close for its trading day (runs in a thread)"""
+        for symbol, quote in quotes.items():
+            trading_day = quote.get("latest_trading_day") or datetime.now().date().isoformat()
+            row = np.array([(_to_day(trading_day), quote["price"], quote["volume"])], dtype=PRICE_DTYPE)
+            self.store.upsert(symbol, row)
+
+
+# Singleton instance
+_market_data_service = None
+
+
+def get_market_data_service() -> MarketDataService:
+    """Get or create market data service singleton"""
+    global _market_data_service
+    if _market_data_service is None:
+        from core.config import settings
+        _market_data_service = MarketDataService(
+            PriceHistoryStore(settings.MARKET_DATA_DIR),
+            max_age_days=settings.MARKET_DATA_MAX_AGE_DAYS
+        )
+    return _market_data_service
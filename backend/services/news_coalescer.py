@@ -0,0 +1,249 @@
+"""
+News Query Coalescer
+Merges concurrent per-company NewsAPI lookups into boolean OR queries
+"""
+
+import re
+import asyncio
+import logging
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
+from datetime import datetime, timedelta
+
+import aiohttp
+
+from services.news_ranking_service import core_company_name
+from services.rate_limiter import BATCH
+
+if TYPE_CHECKING:
+    from services.data_sources_service import DataSourcesService
+
+logger = logging.getLogger(__name__)
+
+# (language, from_date) - only lookups with the same key can share a query
+BatchKey = Tuple[str, str]
+
+
+class _PendingLookup:
+    """A company lookup waiting for its batch to be flushed"""
+
+    __slots__ = ("company_name", "days_back", "aliases", "futures")
+
+    def __init__(self, company_name: str, days_back: int):
+        self.company_name = company_name
+        self.days_back = days_back
+        # Union of every waiter's aliases; more names only widen the match
+        self.aliases: Set[str] = set()
+        self.futures: List[asyncio.Future] = []
+
+
+class NewsQueryCoalescer:
+    """
+    Buffers news lookups for a short window and issues one OR query per batch
+
+    Lookups that share a language and date window are packed into queries such as
+    "Acme" OR "Globex" up to NewsAPI's query length limit. Returned articles are
+    demultiplexed back to each company by name and alias matching. The shared
+    page holds only the most relevant articles across the whole group, so a
+    company with fewer than `min_matches` in it (crowded out by busier names)
+    is searched individually, as is every company of a failed batch - callers
+    never see worse results than without coalescing.
+    """
+
+    def __init__(
+        self,
+        data_sources: "DataSourcesService",
+        window_ms: int = 50,
+        max_query_length: int = 500,
+        max_batch: int = 10,
+        min_matches: int = 3
+    ):
+        self.data_sources = data_sources
+        self.window_seconds = window_ms / 1000
+        self.max_query_length = max_query_length
+        self.max_batch = max_batch
+        self.min_matches = min_matches
+
+        self._pending: Dict[BatchKey, Dict[str, _PendingLookup]] = {}
+        self._timers: Dict[BatchKey, asyncio.TimerHandle] = {}
+        # Running flushes; the loop only keeps weak references to tasks
+        self._flushes: Set[asyncio.Task] = set()
+
+        self.stats = {"lookups": 0, "requests": 0, "fallbacks": 0}
+
+    async def search(
+        self,
+        company_name: str,
+        days_back: int = 30,
+        language: str = "en",
+        aliases: Iterable[str] = ()
+    ) -> List[Dict[str, Any]]:
+        """Queue a company news lookup and wait for its batch"""
+        loop = asyncio.get_running_loop()
+        from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+        key = (language, from_date)
+
+        batch = self._pending.setdefault(key, {})
+        lookup = batch.get(company_name.lower())
+        if lookup is None:
+            lookup = batch[company_name.lower()] = _PendingLookup(company_name, days_back)
+        lookup.aliases.update(alias for alias in aliases if alias)
+
+        future = loop.create_future()
+        lookup.futures.append(future)
+        self.stats["lookups"] += 1
+
+        if len(batch) >= self.max_batch:
+            self._schedule_flush(key, delay=0)
+        elif key not in self._timers:
+            self._schedule_flush(key, delay=self.window_seconds)
+
+        return await future
+
+    def _schedule_flush(self, key: BatchKey, delay: float):
+        loop = asyncio.get_running_loop()
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        self._timers[key] = loop.call_later(delay, self._start_flush, key)
+
+    def _start_flush(self, key: BatchKey):
+        task = asyncio.get_running_loop().create_task(self._flush(key))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, key: BatchKey):
+        self._timers.pop(key, None)
+        batch = self._pending.pop(key, None)
+        if not batch:
+            return
+
+        lookups = list(batch.values())
+        language, from_date = key
+        try:
+            groups = self._pack(lookups)
+            await asyncio.gather(*(self._run_group(group, language, from_date) for group in groups))
+        except asyncio.CancelledError:
+            self._fail(lookups, None)
+            raise
+        except Exception as e:
+            # Whatever went wrong, no waiter may be left hanging
+            logger.error("Coalesced news flush failed: %s", e)
+            self._fail(lookups, e)
+
+    @staticmethod
+    def _fail(lookups: List[_PendingLookup], error: Optional[Exception]):
+        """Settle every unresolved future: with the error, or cancelled when there is none"""
+        for lookup in lookups:
+            for future in lookup.futures:
+                if future.done():
+                    continue
+                if error is None:
+                    future.cancel()
+                else:
+                    future.set_exception(error)
+
+    def _pack(self, lookups: List[_PendingLookup]) -> List[List[_PendingLookup]]:
+        """Greedily pack lookups into groups whose OR query fits the length limit"""
+        groups: List[List[_PendingLookup]] = []
+        current: List[_PendingLookup] = []
+        length = 0
+
+        for lookup in lookups:
+            term_length = len(self._quote(lookup.company_name))
+            separator = len(" OR ") if current else 0
+            if current and length + separator + term_length > self.max_query_length:
+                groups.append(current)
+                current, length, separator = [], 0, 0
+            current.append(lookup)
+            length += separator + term_length
+
+        if current:
+            groups.append(current)
+        return groups
+
+    async def _run_group(self, group: List[_PendingLookup], language: str, from_date: str):
+        if len(group) == 1:
+            lookup = group[0]
+            await self._resolve_individually(lookup)
+            return
+
+        query = " OR ".join(self._quote(lookup.company_name) for lookup in group)
+        articles = await self._fetch(query, language, from_date)
+
+        if articles is None:
+            self.stats["fallbacks"] += len(group)
+            await asyncio.gather(*(self._resolve_individually(lookup) for lookup in group))
+            return
+
+        crowded_out = []
+        for lookup in group:
+            matched = self._match(lookup.company_name, lookup.aliases, articles)
+            if len(matched) < self.min_matches:
+                crowded_out.append(lookup)
+            else:
+                self._resolve(lookup, matched)
+
+        logger.info(
+            "Coalesced %s news lookups into one NewsAPI request (%s searched individually)",
+            len(group), len(crowded_out)
+        )
+        if crowded_out:
+            self.stats["fallbacks"] += len(crowded_out)
+            await asyncio.gather(*(self._resolve_individually(lookup) for lookup in crowded_out))
+
+    async def _fetch(self, query: str, language: str, from_date: str) -> Optional[List[Dict[str, Any]]]:
+        """Run one combined query; None signals failure"""
+        from services.data_sources_service import NewsQuotaUsage, NEWSAPI_MAX_PAGE_SIZE
+
+        params = {
+            "q": query,
+            "from": from_date,
+            "sortBy": "relevancy",
+            "language": language,
+            "apiKey": self.data_sources.newsapi_key,
+            "pageSize": NEWSAPI_MAX_PAGE_SIZE
+        }
+        self.stats["requests"] += 1
+        async with aiohttp.ClientSession() as session:
+            page = await self.data_sources.fetch_news_page(session, params, 1, NewsQuotaUsage(), BATCH)
+        return page[1] if page is not None else None
+
+    async def _resolve_individually(self, lookup: _PendingLookup):
+        self.stats["requests"] += 1
+        try:
+            articles = await self.data_sources.search_company_news(
+                lookup.company_name,
+                lookup.days_back,
+                priority="low"
+            )
+        except Exception as e:
+            for future in lookup.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self._resolve(lookup, articles)
+
+    @staticmethod
+    def _resolve(lookup: _PendingLookup, articles: List[Dict[str, Any]]):
+        for future in lookup.futures:
+            if not future.done():
+                # Each waiter gets its own list so callers can mutate freely
+                future.set_result(list(articles))
+
+    @staticmethod
+    def _match(company_name: str, aliases: Iterable[str], articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Articles whose title or description mention the company or one of its aliases"""
+        names = {company_name.lower(), core_company_name(company_name)}
+        names.update(alias.lower() for alias in aliases)
+        pattern = re.compile(
+            "|".join(r"\b" + re.escape(name).replace(r"\ ", r"\W+") + r"\b" for name in names if name),
+            re.IGNORECASE
+        )
+        return [
+            article for article in articles
+            if pattern.search(f"{article.get('title') or ''} {article.get('description') or ''}")
+        ]
+
+    @staticmethod
+    def _quote(company_name: str) -> str:
+        return '"' + company_name.replace('"', "") + '"'
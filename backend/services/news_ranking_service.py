@@ -0,0 +1,234 @@
+"""
+News Ranking Service
+Scores news articles against a company with BM25 and recency decay
+"""
+
+import re
+import logging
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+from datetime import datetime, timezone
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Legal suffixes carry no signal about which company an article is about
+_COMPANY_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited",
+    "llc", "plc", "pvt", "private", "group", "holdings", "sa", "ag", "nv", "gmbh"
+}
+
+_STOPWORDS = {
+    "a", "an", "and", "the", "of", "for", "in", "on", "to", "with", "by", "at", "or", "is"
+}
+
+# Query term weights by origin: the company name dominates, industry terms only break ties
+NAME_WEIGHT = 3.0
+ALIAS_WEIGHT = 2.0
+INDUSTRY_WEIGHT = 0.5
+
+# Fixed IDF for name and alias terms. Every NewsAPI result matches q=<name>,
+# so an in-batch IDF for those terms is near zero and says nothing; how
+# often a name occurs in a given article still does
+ENTITY_IDF = 1.0
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokenizer shared by documents and queries"""
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def core_company_name(company_name: str) -> str:
+    """Company name without trailing legal suffixes ("Acme Corp Ltd" -> "acme")"""
+    tokens = tokenize(company_name)
+    while len(tokens) > 1 and tokens[-1] in _COMPANY_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+class NewsRankingService:
+    """Vectorized BM25 + recency ranking over a batch of articles"""
+
+    def __init__(
+        self,
+        k1: float = 1.2,
+        b: float = 0.75,
+        half_life_days: float = 7.0,
+        recency_weight: float = 0.3,
+        saturation: float = 4.0
+    ):
+        self.k1 = k1
+        self.b = b
+        self.half_life_days = half_life_days
+        self.recency_weight = recency_weight
+        self.saturation = saturation
+
+    def build_query(
+        self,
+        company_name: str,
+        aliases: Optional[Iterable[str]] = None,
+        industry_terms: Optional[Iterable[str]] = None
+    ) -> Dict[str, float]:
+        """
+        Build a weighted query vector from the company name, aliases and industry
+
+        Returns:
+            Mapping of term -> weight (highest origin weight wins)
+        """
+        query: Dict[str, float] = {}
+
+        def add(text: str, weight: float, strip_suffixes: bool):
+            for token in tokenize(text):
+                if token in _STOPWORDS or (strip_suffixes and token in _COMPANY_SUFFIXES):
+                    continue
+                query[token] = max(query.get(token, 0.0), weight)
+
+        add(company_name, NAME_WEIGHT, strip_suffixes=True)
+        for alias in aliases or []:
+            add(alias, ALIAS_WEIGHT, strip_suffixes=True)
+        for term in industry_terms or []:
+            add(term, INDUSTRY_WEIGHT, strip_suffixes=False)
+
+        return query
+
+    def score(
+        self,
+        articles: List[Dict[str, Any]],
+        query: Dict[str, float],
+        phrases: Optional[List[str]] = None,
+        now: Optional[datetime] = None
+    ) -> np.ndarray:
+        """
+        Score a batch of articles in one pass
+
+        Args:
+            articles: Normalized articles (title, description, published_at)
+            query: Weighted query terms from build_query
+            phrases: Exact phrases (name and aliases) that earn a bonus when present
+            now: Reference time for recency decay
+
+        Returns:
+            Array of relevance scores in [0, 1], aligned with articles
+        """
+        n_docs = len(articles)
+        if n_docs == 0 or not query:
+            return np.zeros(n_docs)
+
+        terms = list(query)
+        vocab = {term: j for j, term in enumerate(terms)}
+        n_terms = len(terms)
+        weights = np.fromiter((query[t] for t in terms), dtype=np.float64, count=n_terms)
+
+        # Collect (doc, term) hits as COO coordinates; titles count twice
+        rows: List[int] = []
+        cols: List[int] = []
+        doc_len = np.empty(n_docs, dtype=np.float64)
+        texts: List[str] = []
+        for i, article in enumerate(articles):
+            title = article.get("title") or ""
+            body = article.get("description") or article.get("summary") or ""
+            tokens = tokenize(title) * 2 + tokenize(body)
+            doc_len[i] = len(tokens) or 1
+            texts.append(" ".join(tokens))
+            for token in tokens:
+                j = vocab.get(token)
+                if j is not None:
+                    rows.append(i)
+                    cols.append(j)
+
+        # Densify only the (docs x query terms) block; the full vocabulary is never built
+        flat = np.asarray(rows, dtype=np.int64) * n_terms + np.asarray(cols, dtype=np.int64)
+        tf = np.bincount(flat, minlength=n_docs * n_terms).reshape(n_docs, n_terms).astype(np.float64)
+
+        df = np.count_nonzero(tf, axis=0)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        # In-batch IDF only for topic terms; name and alias terms are weighted ALIAS_WEIGHT and up
+        idf = np.where(weights >= ALIAS_WEIGHT, ENTITY_IDF, idf)
+
+        norm = self.k1 * (1.0 - self.b + self.b * doc_len / doc_len.mean())
+        bm25 = (tf * (self.k1 + 1.0)) / (tf + norm[:, None])
+        raw = bm25 @ (idf * weights)
+
+        if phrases:
+            needles = [" ".join(tokenize(p)) for p in phrases if p]
+            needles = [n for n in needles if " " in n]
+            if needles:
+                bonus = np.fromiter(
+                    (any(n in text for n in needles) for text in texts),
+                    dtype=np.float64,
+                    count=n_docs
+                )
+                raw = raw + bonus * NAME_WEIGHT
+
+        relevance = raw / (raw + self.saturation)
+
+        decay = self._recency_decay(articles, now or datetime.now(timezone.utc))
+        return relevance * ((1.0 - self.recency_weight) + self.recency_weight * decay)
+
+    def rank(
+        self,
+        articles: List[Dict[str, Any]],
+        company_name: str,
+        aliases: Optional[List[str]] = None,
+        industry_terms: Optional[List[str]] = None,
+        top_k: int = 10,
+        now: Optional[datetime] = None
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Rank articles for a company and keep the best top_k
+
+        Returns:
+            List of (score, article) sorted by descending score
+        """
+        if not articles:
+            return []
+
+        query = self.build_query(company_name, aliases, industry_terms)
+        scores = self.score(articles, query, phrases=[company_name, *(aliases or [])], now=now)
+
+        k = min(top_k, len(articles))
+        # argpartition keeps selection O(n) before sorting only the survivors
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [(float(scores[i]), articles[i]) for i in top]
+
+    def _recency_decay(self, articles: List[Dict[str, Any]], now: datetime) -> np.ndarray:
+        """Exponential half-life decay on article age"""
+        ages = np.fromiter(
+            (self._age_days(a.get("published_at") or a.get("published_date"), now) for a in articles),
+            dtype=np.float64,
+            count=len(articles)
+        )
+        return np.exp2(-ages / self.half_life_days)
+
+    @staticmethod
+    def _age_days(published: Optional[str], now: datetime) -> float:
+        """Age of an article in days; unknown dates count as a week old"""
+        if not published:
+            return 7.0
+        try:
+            ts = datetime.fromisoformat(published.replace("Z", "+00:00"))
+        except ValueError:
+            return 7.0
+        if ts.tzinfo is None:
+            ts = ts.astimezone()
+        return max((now - ts).total_seconds() / 86400.0, 0.0)
+
+
+# Singleton instance
+_news_ranking_service = None
+
+
+def get_news_ranking_service() -> NewsRankingService:
+    """Get or create news ranking service singleton"""
+    global _news_ranking_service
+    if _news_ranking_service is None:
+        from core.config import settings
+        _news_ranking_service = NewsRankingService(
+            half_life_days=settings.NEWS_RECENCY_HALF_LIFE_DAYS
+        )
+    return _news_ranking_service
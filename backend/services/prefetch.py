@@ -0,0 +1,228 @@
+"""
+Prefetch
+Speculative low-priority insight runs for companies a rep is likely to open next
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from core.metrics import REGISTRY
+from services.insight_store import StoredInsight, company_key, get_insight_store
+
+logger = logging.getLogger(__name__)
+
+
+PREFETCH_RUNS = REGISTRY.counter(
+    "prefetch_runs_total", "Speculative insight runs by trigger and outcome", ("reason", "outcome")
+)
+PREFETCH_USES = REGISTRY.counter(
+    "prefetch_uses_total", "Interactive requests answered by a prefetch", ("kind",)
+)
+PREFETCH_IN_FLIGHT = REGISTRY.gauge(
+    "prefetch_in_flight", "Prefetches queued or running"
+)
+PREFETCH_HIT_RATE = REGISTRY.gauge(
+    "prefetch_hit_rate", "Share of completed prefetches later used by an interactive request"
+)
+
+# Reasons a prefetch is started; type-ahead is the most speculative
+CREATED = "created"
+TRACKED = "tracked"
+TYPEAHEAD = "typeahead"
+
+
+class _Prefetch:
+    __slots__ = ("company_name", "reason", "timeframe_days", "task", "running")
+
+    def __init__(self, company_name: str, reason: str, timeframe_days: int):
+        self.company_name = company_name
+        self.reason = reason
+        self.timeframe_days = timeframe_days
+        self.task: Optional[asyncio.Task] = None
+        self.running = False
+
+
+class PrefetchManager:
+    """
+    Deduplicated, cancellable, budgeted background insight runs
+
+    A company is skipped when it already has fresh insights or a prefetch in
+    flight. At most `max_concurrent` run at once and `max_per_hour` start per
+    rolling hour; the rest are dropped, not queued indefinitely. A newer
+    type-ahead prefetch replaces an older one that has not started yet.
+
+    Runs use priority "low", so agents take their batched, low-lane paths and
+    never compete with interactive requests for rate-limit slots. Results land
+    in the insight store, where the interactive request finds them.
+    """
+
+    def __init__(self, enabled: bool = True, max_concurrent: int = 2, max_per_hour: int = 60,
+                 timeframe_days: int = 30, fresh_seconds: float = 900):
+        # Prefetched results are only ever served from the insight cache
+        self.enabled = enabled and fresh_seconds > 0
+        self.max_concurrent = max_concurrent
+        self.max_per_hour = max_per_hour
+        self.timeframe_days = timeframe_days
+        self.fresh_seconds = fresh_seconds
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._started: Deque[float] = deque()
+        self._in_flight: Dict[str, _Prefetch] = {}
+        # Completed prefetches not yet used: key -> saved_at of the result
+        self._unused: Dict[str, float] = {}
+        self._completed = 0
+        self._used = 0
+        PREFETCH_IN_FLIGHT.set_function(lambda: len(self._in_flight))
+        PREFETCH_HIT_RATE.set_function(lambda: self.hit_rate)
+
+    @property
+    def hit_rate(self) -> float:
+        return self._used / self._completed if self._completed else 0.0
+
+    def _within_budget(self) -> bool:
+        now = time.monotonic()
+        while self._started and now - self._started[0] > 3600:
+            self._started.popleft()
+        return len(self._started) < self.max_per_hour
+
+    def prefetch(self, orchestrator, company_name: str, reason: str) -> bool:
+        """
+        Start a speculative run for a company unless it would be redundant
+
+        Returns True when a run was started.
+        """
+        if not self.enabled:
+            return False
+        key = company_key(company_name)
+        if key in self._in_flight:
+            PREFETCH_RUNS.inc(reason, "deduplicated")
+            return False
+        if get_insight_store().latest_entry(company_name, self.fresh_seconds) is not None:
+            PREFETCH_RUNS.inc(reason, "fresh")
+            return False
+        if not self._within_budget():
+            PREFETCH_RUNS.inc(reason, "over_budget")
+            return False
+
+        if reason == TYPEAHEAD:
+            # Only the latest type-ahead guess is worth a slot
+            for other in list(self._in_flight.values()):
+                if other.reason == TYPEAHEAD and not other.running:
+                    self.cancel(other.company_name)
+
+        self._started.append(time.monotonic())
+        prefetch = self._in_flight[key] = _Prefetch(company_name, reason, self.timeframe_days)
+        prefetch.task = asyncio.create_task(self._run(orchestrator, key, prefetch))
+        prefetch.task.add_done_callback(lambda task: self._finished(key, prefetch, task))
+        logger.info("Prefetching insights for %s (%s)", company_name, reason)
+        return True
+
+    async def _run(self, orchestrator, key: str, prefetch: _Prefetch) -> str:
+        try:
+            async with self._slots:
+                prefetch.running = True
+                result = await orchestrator.gather_insights(
+                    company_name=prefetch.company_name,
+                    timeframe_days=prefetch.timeframe_days,
+                    priority="low"
+                )
+        except Exception as e:
+            logger.error("Prefetch for %s failed: %s", prefetch.company_name, e)
+            return "failed"
+        if result.get("status") != "success":
+            return "failed"
+
+        self._completed += 1
+        entry = get_insight_store().latest_entry(prefetch.company_name)
+        if entry is not None and entry.result is result:
+            self._unused[key] = entry.saved_at
+        return "completed"
+
+    def _finished(self, key: str, prefetch: _Prefetch, task: asyncio.Task):
+        # A done callback also sees tasks cancelled before their first step
+        PREFETCH_RUNS.inc(prefetch.reason, "cancelled" if task.cancelled() else task.result())
+        if self._in_flight.get(key) is prefetch:
+            del self._in_flight[key]
+
+    def cancel(self, company_name: str) -> bool:
+        prefetch = self._in_flight.pop(company_key(company_name), None)
+        if prefetch is None:
+            return False
+        prefetch.task.cancel()
+        return True
+
+    async def join(self, company_name: str, timeframe_days: int) -> bool:
+        """
+        Let an interactive request take over a prefetch for the same data
+
+        A running prefetch is awaited (its result is then in the store); one
+        still waiting for a slot is cancelled so the interactive request does
+        the work itself at full priority. Returns True if a run was awaited.
+        """
+        prefetch = self._in_flight.get(company_key(company_name))
+        if prefetch is None or prefetch.timeframe_days != timeframe_days:
+            return False
+        if not prefetch.running:
+            self.cancel(company_name)
+            return False
+        try:
+            await asyncio.shield(prefetch.task)
+        except asyncio.CancelledError:
+            # Only this request being cancelled propagates; a cancelled prefetch is just no help
+            if not prefetch.task.cancelled():
+                raise
+            return False
+        PREFETCH_USES.inc("joined")
+        return True
+
+    def record_use(self, company_name: str, entry: StoredInsight):
+        """Count a cache hit served from a prefetched result (once per prefetch)"""
+        key = company_key(company_name)
+        if self._unused.get(key) == entry.saved_at:
+            del self._unused[key]
+            self._used += 1
+            PREFETCH_USES.inc("hit")
+
+    async def close(self):
+        tasks = [prefetch.task for prefetch in self._in_flight.values()]
+        self._in_flight.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": [
+                {"company_name": p.company_name, "reason": p.reason, "running": p.running}
+                for p in self._in_flight.values()
+            ],
+            "started_last_hour": len(self._started),
+            "max_per_hour": self.max_per_hour,
+            "max_concurrent": self.max_concurrent,
+            "completed": self._completed,
+            "used": self._used,
+            "unused": len(self._unused),
+            "hit_rate": round(self.hit_rate, 3)
+        }
+
+
+# Singleton instance
+_prefetch_manager = None
+
+
+def get_prefetch_manager() -> PrefetchManager:
+    """Get or create prefetch manager singleton"""
+    global _prefetch_manager
+    if _prefetch_manager is None:
+        from core.config import settings
+        _prefetch_manager = PrefetchManager(
+            settings.PREFETCH_ENABLED,
+            settings.PREFETCH_MAX_CONCURRENT,
+            settings.PREFETCH_MAX_PER_HOUR,
+            settings.PREFETCH_TIMEFRAME_DAYS,
+            settings.CACHE_TTL_HOURS * 3600 if settings.ENABLE_CACHING else 0
+        )
+    return _prefetch_manager
@@ -0,0 +1,218 @@
+"""
+Quick Brief Service
+Answers quick briefs from cache within a small budget and upgrades them in the background
+"""
+
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Set
+
+from core.serialization import dumps, loads, json_object
+from services.insight_store import company_key, get_insight_store
+
+logger = logging.getLogger(__name__)
+
+
+# Where a brief came from, best first
+LIVE = "live"              # produced by the refresh this request waited for
+CACHED = "cached"          # an earlier quick brief
+HISTORICAL = "historical"  # research and news from the last full insights
+PENDING = "pending"        # nothing yet; the upgrade will carry the first brief
+
+BriefRunner = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+class BriefVersion(NamedTuple):
+    version: int  # 0 for briefs that were never stored (historical, pending)
+    tier: str
+    saved_at: float
+    encoded: bytes  # JSON of the brief itself
+
+    def envelope_data(self, upgrading: bool) -> bytes:
+        return json_object(
+            version=self.version, tier=self.tier, saved_at=self.saved_at,
+            upgrading=upgrading, brief=self.encoded
+        )
+
+
+class QuickBriefService:
+    """
+    Tiered quick briefs with one background refresh per company
+
+    A request waits at most `budget_seconds` for a refresh; past that it gets
+    the stored brief, else one assembled from the last full insights, else a
+    pending placeholder. The refresh keeps running, and when it lands the new
+    version is written to shared state and pushed to every watcher in every
+    worker.
+    """
+
+    NAMESPACE = "quick_briefs"
+
+    def __init__(self, budget_seconds: float = 0.1, fresh_seconds: float = 300.0):
+        self.budget = budget_seconds
+        self.fresh_seconds = fresh_seconds
+        self._briefs: Dict[str, BriefVersion] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._watchers: Dict[str, Set[asyncio.Queue]] = {}
+        self._shared = None
+
+    async def attach(self, shared_state):
+        """Load the stored briefs and follow other workers' upgrades"""
+        self._shared = shared_state
+        await self._reload_all()
+        shared_state.subscribe(self.NAMESPACE, self._reload)
+        shared_state.on_resync(self._reload_all)
+
+    @staticmethod
+    def _decode(value: bytes) -> BriefVersion:
+        item = loads(value)
+        return BriefVersion(item["version"], CACHED, item["saved_at"], dumps(item["brief"]))
+
+    async def _reload_all(self):
+        self._briefs = {
+            key: self._decode(value) for key, value in (await self._shared.items(self.NAMESPACE)).items()
+        }
+
+    async def _reload(self, key: str):
+        value = await self._shared.get(self.NAMESPACE, key)
+        if value is None:
+            self._briefs.pop(key, None)
+            return
+        self._briefs[key] = entry = self._decode(value)
+        self._notify(key, entry)
+
+    def _notify(self, key: str, entry: BriefVersion):
+        for queue in self._watchers.get(key, ()):
+            queue.put_nowait(entry)
+
+    def stored(self, company_name: str) -> Optional[BriefVersion]:
+        return self._briefs.get(company_key(company_name))
+
+    def upgrading(self, company_name: str) -> bool:
+        return company_key(company_name) in self._refreshing
+
+    def historical(self, company_name: str) -> Optional[BriefVersion]:
+        """A brief made of the research and news outputs of the last full insights"""
+        entry = get_insight_store().latest_entry(company_name)
+        outputs = (entry.result.get("agent_outputs") or {}) if entry else {}
+        if not outputs.get("research") and not outputs.get("news"):
+            return None
+        brief = {
+            "company_name": company_name,
+            "status": "success",
+            "type": "quick_brief",
+            "timestamp": datetime.fromtimestamp(entry.saved_at).isoformat(),
+            "research": outputs.get("research"),
+            "news": outputs.get("news")
+        }
+        return BriefVersion(0, HISTORICAL, entry.saved_at, dumps(brief))
+
+    def _refresh(self, company_name: str, run: BriefRunner) -> asyncio.Task:
+        """The company's in-flight refresh, started if there is none"""
+        key = company_key(company_name)
+        task = self._refreshing.get(key)
+        if task is None:
+            task = self._refreshing[key] = asyncio.create_task(self._run_refresh(key, company_name, run))
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+        return task
+
+    async def _run_refresh(self, key: str, company_name: str, run: BriefRunner) -> Optional[BriefVersion]:
+        try:
+            brief = await run(company_name)
+        except Exception as e:
+            logger.error("Quick brief refresh for %s failed: %s", company_name, e)
+            return None
+        if brief.get("status") != "success":
+            logger.warning("Quick brief refresh for %s failed: %s", company_name, brief.get("error"))
+            return None
+
+        previous = self._briefs.get(key)
+        entry = BriefVersion((previous.version if previous else 0) + 1, LIVE, time.time(), dumps(brief))
+
+        if self._shared is not None:
+            def bump(current: Optional[bytes]) -> bytes:
+                # Numbered after whatever another worker stored since this one loaded
+                version = loads(current)["version"] + 1 if current is not None else 1
+                return json_object(version=version, saved_at=entry.saved_at, brief=entry.encoded)
+
+            stored = await self._shared.update(self.NAMESPACE, key, bump)
+            entry = entry._replace(version=loads(stored)["version"])
+            await self._shared.publish(self.NAMESPACE, key)
+        self._briefs[key] = entry._replace(tier=CACHED)
+        self._notify(key, entry)
+        return entry
+
+    async def brief(self, company_name: str, run: BriefRunner) -> BriefVersion:
+        """
+        The best brief available within the budget
+
+        A stored brief younger than fresh_seconds is returned without a
+        refresh; anything else starts (or joins) one and waits for it only as
+        long as the budget allows.
+        """
+        current = self.stored(company_name)
+        if current is not None and time.time() - current.saved_at < self.fresh_seconds:
+            return current
+
+        refresh = self._refresh(company_name, run)
+        try:
+            entry = await asyncio.wait_for(asyncio.shield(refresh), self.budget)
+            if entry is not None:
+                return entry
+        except asyncio.TimeoutError:
+            pass
+
+        return current or self.historical(company_name) or BriefVersion(
+            0, PENDING, time.time(), dumps({"company_name": company_name, "status": "pending"})
+        )
+
+    async def watch(self, company_name: str, since_version: int, timeout_seconds: float) -> Optional[BriefVersion]:
+        """
+        Wait for a version newer than since_version
+
+        Returns it as soon as any worker stores it (immediately if this worker
+        already has one), or None when the timeout passes first.
+        """
+        key = company_key(company_name)
+        current = self._briefs.get(key)
+        if current is not None and current.version > since_version:
+            return current
+
+        queue: asyncio.Queue = asyncio.Queue()
+        self._watchers.setdefault(key, set()).add(queue)
+        deadline = time.monotonic() + timeout_seconds
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                try:
+                    entry = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    return None
+                if entry.version > since_version:
+                    return entry
+        finally:
+            watchers = self._watchers.get(key)
+            if watchers is not None:
+                watchers.discard(queue)
+                if not watchers:
+                    del self._watchers[key]
+
+
+# Singleton instance
+_quick_brief_service = None
+
+
+def get_quick_brief_service() -> QuickBriefService:
+    """Get or create quick brief service singleton"""
+    global _quick_brief_service
+    if _quick_brief_service is None:
+        from core.config import settings
+        _quick_brief_service = QuickBriefService(
+            settings.QUICK_BRIEF_BUDGET_MS / 1000,
+            settings.QUICK_BRIEF_FRESH_SECONDS
+        )
+    return _quick_brief_service
@@ -0,0 +1,309 @@
+"""
+Rate Limiter
+Per-provider token buckets with daily quotas, priority lanes and queued waiting
+"""
+
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+
+from core.tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+
+# Published free-tier limits; override per provider with RATE_LIMIT_OVERRIDES
+DEFAULT_PROVIDER_LIMITS: Dict[str, Dict[str, Optional[int]]] = {
+    "newsapi": {"per_minute": 30, "per_day": 100},
+    "alphavantage": {"per_minute": 5, "per_day": 25},
+    "serper": {"per_minute": 50, "per_day": None},
+    "clearbit": {"per_minute": 600, "per_day": None},
+    "twitter": {"per_minute": 30, "per_day": None},
+    "linkedin": {"per_minute": 60, "per_day": 500},
+}
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+_LANE_RANK = {INTERACTIVE: 0, BATCH: 1}
+
+
+def lane_for(priority: str) -> str:
+    """Map an agent priority (low/medium/high) to a scheduling lane"""
+    return BATCH if priority == "low" else INTERACTIVE
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request cannot be scheduled within its maximum wait"""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"{provider} rate limit exceeded, retry in {retry_after:.1f}s")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+def _next_utc_midnight(now: datetime) -> datetime:
+    return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class ProviderBucket:
+    """Token bucket for the per-minute rate plus a fixed-window daily quota"""
+
+    def __init__(self, name: str, per_minute: Optional[int], per_day: Optional[int], batch_reserve: float):
+        self.name = name
+        self.capacity = float(per_minute) if per_minute else float("inf")
+        self.refill_per_second = (per_minute / 60.0) if per_minute else float("inf")
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+        self.per_day = per_day
+        self.used_today = 0
+        self.day_resets_at = _next_utc_midnight(datetime.now(timezone.utc))
+        # Share of the daily quota batch work may not touch, kept for interactive requests
+        self.batch_reserve = batch_reserve
+
+        self.blocked_until = 0.0
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self.dispatch_handle: Optional[asyncio.TimerHandle] = None
+
+        self.granted = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.total_wait_seconds = 0.0
+
+    def _refill(self, now: float):
+        if self.refill_per_second != float("inf"):
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def _roll_day(self):
+        now = datetime.now(timezone.utc)
+        if now >= self.day_resets_at:
+            self.used_today = 0
+            self.day_resets_at = _next_utc_midnight(now)
+
+    def daily_remaining(self, lane: str) -> float:
+        if self.per_day is None:
+            return float("inf")
+        self._roll_day()
+        limit = self.per_day * (1.0 - self.batch_reserve) if lane == BATCH else self.per_day
+        return limit - self.used_today
+
+    def wait_time(self, lane: str) -> float:
+        """Seconds until a request in this lane could be granted"""
+        now = time.monotonic()
+        self._refill(now)
+
+        if self.daily_remaining(lane) < 1:
+            return (self.day_resets_at - datetime.now(timezone.utc)).total_seconds()
+
+        wait = max(self.blocked_until - now, 0.0)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.refill_per_second)
+        return wait
+
+    def take(self):
+        self.tokens -= 1
+        self.used_today += 1
+        self.granted += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._refill(time.monotonic())
+        self._roll_day()
+        lanes = {INTERACTIVE: 0, BATCH: 0}
+        for rank, _, _ in self.waiters:
+            lanes[INTERACTIVE if rank == 0 else BATCH] += 1
+        return {
+            "tokens_available": None if self.capacity == float("inf") else round(self.tokens, 2),
+            "per_minute": None if self.capacity == float("inf") else int(self.capacity),
+            "daily_limit": self.per_day,
+            "daily_remaining": None if self.per_day is None else max(self.per_day - self.used_today, 0),
+            "daily_resets_at": self.day_resets_at.isoformat(),
+            "blocked_for_seconds": round(max(self.blocked_until - time.monotonic(), 0.0), 2),
+            "queued": lanes,
+            "granted": self.granted,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+            "average_wait_ms": round(self.total_wait_seconds / self.granted * 1000, 2) if self.granted else 0.0
+        }
+
+
+class RateLimitScheduler:
+    """
+    Paces outbound API calls per provider
+
+    Requests take a token immediately when one is free and nobody of equal or
+    higher priority is queued; otherwise they wait in a priority queue that is
+    drained as tokens refill. Interactive requests always dequeue before batch
+    ones, and batch work cannot spend the reserved tail of a daily quota.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict[str, Optional[int]]]] = None,
+        max_wait_seconds: Optional[Dict[str, float]] = None,
+        batch_reserve: float = 0.2,
+        share: float = 1.0
+    ):
+        """
+        Args:
+            share: Fraction of every provider limit this process may use; with
+                N workers each gets 1/N so together they stay within the quota
+        """
+        self._limits = {
+            provider: {
+                kind: max(1, int(value * share)) if value else value
+                for kind, value in provider_limits.items()
+            }
+            for provider, provider_limits in {**DEFAULT_PROVIDER_LIMITS, **(limits or {})}.items()
+        }
+        self._max_wait = {INTERACTIVE: 2.0, BATCH: 300.0, **(max_wait_seconds or {})}
+        self._batch_reserve = batch_reserve
+        self._buckets: Dict[str, ProviderBucket] = {}
+        self._sequence = itertools.count()
+
+    def _bucket(self, provider: str) -> ProviderBucket:
+        bucket = self._buckets.get(provider)
+        if bucket is None:
+            limits = self._limits.get(provider, {})
+            bucket = ProviderBucket(
+                provider,
+                limits.get("per_minute"),
+                limits.get("per_day"),
+                self._batch_reserve
+            )
+            self._buckets[provider] = bucket
+        return bucket
+
+    async def acquire(self, provider: str, lane: str = INTERACTIVE, max_wait: Optional[float] = None):
+        """
+        Wait for permission to call a provider
+
+        Raises:
+            RateLimitExceeded: If the request cannot be granted within max_wait
+        """
+        bucket = self._bucket(provider)
+        rank = _LANE_RANK.get(lane, 0)
+        max_wait = self._max_wait.get(lane, 2.0) if max_wait is None else max_wait
+
+        wait = bucket.wait_time(lane)
+        ahead = any(waiter_rank <= rank for waiter_rank, _, _ in bucket.waiters)
+        if wait <= 0 and not ahead:
+            bucket.take()
+            return
+
+        if wait > max_wait:
+            bucket.rejected += 1
+            current_span().set_attribute("rate_limit.rejected", True)
+            raise RateLimitExceeded(provider, wait)
+
+        bucket.throttled += 1
+        future = asyncio.get_running_loop().create_future()
+        entry = (rank, next(self._sequence), future)
+        heapq.heappush(bucket.waiters, entry)
+        self._schedule_dispatch(bucket)
+
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=max_wait)
+        except asyncio.TimeoutError:
+            # The dispatcher may have granted the token just as the timeout fired
+            if not future.done() or future.cancelled():
+                self._abandon(bucket, entry)
+                bucket.rejected += 1
+                current_span().set_attribute("rate_limit.rejected", True)
+                raise RateLimitExceeded(provider, bucket.wait_time(lane))
+        except asyncio.CancelledError:
+            self._abandon(bucket, entry)
+            raise
+        waited = time.monotonic() - started
+        bucket.total_wait_seconds += waited
+        current_span().set_attribute("rate_limit.wait_ms", round(waited * 1000, 1))
+
+    def _abandon(self, bucket: ProviderBucket, entry: Tuple[int, int, asyncio.Future]):
+        entry[2].cancel()
+        if entry in bucket.waiters:
+            bucket.waiters.remove(entry)
+            heapq.heapify(bucket.waiters)
+
+    def observe(self, provider: str, status: int, headers: Optional[Any] = None):
+        """
+        Learn from a provider response
+
+        A 429 blocks the provider until Retry-After (or a short default) passes;
+        quota headers, when present, correct the local daily counter.
+        """
+        bucket = self._bucket(provider)
+        headers = headers or {}
+
+        if status == 429:
+            retry_after = headers.get("Retry-After")
+            try:
+                delay = float(retry_after) if retry_after else 60.0
+            except ValueError:
+                delay = 60.0
+            bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + delay)
+            bucket.tokens = min(bucket.tokens, 0.0)
+            logger.warning("%s returned 429, pausing for %.0fs", provider, delay)
+
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is not None and bucket.per_day is not None:
+            try:
+                bucket.used_today = max(bucket.used_today, bucket.per_day - int(remaining))
+            except ValueError:
+                pass
+
+    def _schedule_dispatch(self, bucket: ProviderBucket):
+        # Always recompute: a new queue head may be ready sooner than the old one
+        if bucket.dispatch_handle is not None:
+            bucket.dispatch_handle.cancel()
+            bucket.dispatch_handle = None
+        if not bucket.waiters:
+            return
+        lane = INTERACTIVE if bucket.waiters[0][0] == 0 else BATCH
+        delay = max(bucket.wait_time(lane), 0.0)
+        loop = asyncio.get_running_loop()
+        bucket.dispatch_handle = loop.call_later(delay, self._dispatch, bucket)
+
+    def _dispatch(self, bucket: ProviderBucket):
+        bucket.dispatch_handle = None
+        while bucket.waiters:
+            rank, _, future = bucket.waiters[0]
+            if future.done():
+                heapq.heappop(bucket.waiters)
+                continue
+            if bucket.wait_time(INTERACTIVE if rank == 0 else BATCH) > 0:
+                break
+            heapq.heappop(bucket.waiters)
+            bucket.take()
+            future.set_result(None)
+        if bucket.waiters:
+            self._schedule_dispatch(bucket)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Remaining budget and queue metrics per provider"""
+        return {name: self._bucket(name).snapshot() for name in sorted(self._limits)}
+
+
+# Singleton instance
+_rate_limiter = None
+
+
+def get_rate_limiter() -> RateLimitScheduler:
+    """Get or create rate limit scheduler singleton"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        from core.config import settings
+        _rate_limiter = RateLimitScheduler(
+            limits=settings.RATE_LIMIT_OVERRIDES,
+            max_wait_seconds={
+                INTERACTIVE: settings.RATE_LIMIT_INTERACTIVE_MAX_WAIT_SECONDS,
+                BATCH: settings.RATE_LIMIT_BATCH_MAX_WAIT_SECONDS
+            },
+            batch_reserve=settings.RATE_LIMIT_BATCH_RESERVE,
+            share=1.0 / max(settings.WORKERS, 1)
+        )
+    return _rate_limiter
@@ -0,0 +1,267 @@
+"""
+Resilience
+Hedged requests, jittered retries and a shared retry budget for outbound API calls
+"""
+
+import time
+import random
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional, Sequence, Tuple, TypeVar
+
+import aiohttp
+
+from core.metrics import REGISTRY
+from services.rate_limiter import RateLimitScheduler, RateLimitExceeded, get_rate_limiter, INTERACTIVE
+from services.latency_stats import LatencyStats, get_latency_stats, remaining_budget, SOURCE
+
+logger = logging.getLogger(__name__)
+
+
+UPSTREAM_ATTEMPTS = REGISTRY.counter(
+    "upstream_attempts_total", "Outbound API attempts by kind (first, retry, hedge)", ("source", "kind")
+)
+UPSTREAM_RESULTS = REGISTRY.counter(
+    "upstream_results_total", "Outbound API calls by where their result came from", ("source", "provenance")
+)
+RETRIES_DENIED = REGISTRY.counter(
+    "upstream_retries_denied_total", "Retries and hedges not made because the retry budget was spent", ("source",)
+)
+RETRY_BUDGET_TOKENS = REGISTRY.gauge(
+    "retry_budget_tokens", "Retries and hedges the budget currently allows"
+)
+
+# Where a data source result came from
+LIVE = "live"          # the first attempt
+HEDGED = "hedged"      # a duplicate sent after the first attempt ran slow
+RETRIED = "retried"    # a later attempt after a retryable failure
+FALLBACK = "fallback"  # mock or default data; the upstream gave nothing usable
+
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+T = TypeVar("T")
+
+
+class UpstreamError(Exception):
+    """Raised by an attempt for a non-success HTTP status"""
+
+    def __init__(self, source: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"{source} returned HTTP {status}")
+        self.source = source
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status in RETRYABLE_STATUSES
+
+
+def check_response(source: str, response: aiohttp.ClientResponse):
+    """Raise UpstreamError unless the response is a 200"""
+    if response.status == 200:
+        return
+    retry_after = response.headers.get("Retry-After")
+    try:
+        retry_after = float(retry_after) if retry_after is not None else None
+    except ValueError:
+        # HTTP-date form; the backoff schedule is used instead
+        retry_after = None
+    raise UpstreamError(source, response.status, retry_after)
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, UpstreamError):
+        return error.retryable
+    # Timeouts (including the adaptive ones) and dropped connections
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
+
+class RetryBudget:
+    """
+    Token bucket bounding retries and hedges to a share of first attempts
+
+    Every first attempt deposits `ratio` of a token and every retry or hedge
+    withdraws a whole one, so while an upstream is failing extra traffic
+    stays near `ratio` of normal instead of multiplying it. `min_per_second`
+    keeps a few retries available when traffic is low.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 1.0, capacity: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        RETRY_BUDGET_TOKENS.set_function(lambda: self.available)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.min_per_second)
+        self.updated = now
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+    def deposit(self):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class ResilientCaller:
+    """
+    Runs an upstream attempt with hedging and retries
+
+    An attempt still running past the source's hedge percentile gets a
+    duplicate, and whichever finishes first wins. Retryable failures are
+    retried with full-jitter exponential backoff (or the server's
+    Retry-After). Every retry and hedge needs a retry-budget token and a
+    rate-limit slot (hedges only take one that is free right now), and none
+    is made when the request's deadline would pass first. The caller keeps
+    its own fallback for when everything fails.
+    """
+
+    def __init__(
+        self,
+        budget: RetryBudget,
+        rate_limiter: RateLimitScheduler,
+        latency: LatencyStats,
+        max_attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 2.0,
+        hedge_quantile: float = 0.95,
+        hedge_sources: Sequence[str] = ()
+    ):
+        self.budget = budget
+        self.rate_limiter = rate_limiter
+        self.latency = latency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_quantile = hedge_quantile
+        self.hedge_sources = frozenset(hedge_sources)
+
+    def _backoff(self, retry: int, error: BaseException) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+        if isinstance(error, UpstreamError) and error.retry_after is not None:
+            delay = max(delay, error.retry_after)
+        return delay
+
+    async def _spend(self, source: str, lane: str, max_wait: Optional[float] = None) -> bool:
+        """A retry-budget token and a rate-limit slot for one extra attempt"""
+        if not self.budget.withdraw():
+            RETRIES_DENIED.inc(source)
+            return False
+        try:
+            await self.rate_limiter.acquire(source, lane, max_wait)
+        except RateLimitExceeded:
+            # The budget token is not refunded; extra attempts are meant to be rare
+            return False
+        return True
+
+    async def call(
+        self,
+        source: str,
+        attempt: Callable[[], Awaitable[T]],
+        lane: str = INTERACTIVE
+    ) -> Tuple[T, str]:
+        """
+        Result of the first successful attempt and its provenance
+
+        The first attempt's rate-limit slot is the caller's to acquire.
+
+        Raises:
+            The last attempt's exception once retries are exhausted, denied or
+            the failure is not retryable
+        """
+        self.budget.deposit()
+        UPSTREAM_ATTEMPTS.inc(source, "first")
+        try:
+            value, hedged = await self._hedged(source, attempt, lane)
+        except Exception as e:
+            value = await self._retry(source, attempt, lane, e)
+            provenance = RETRIED
+        else:
+            provenance = HEDGED if hedged else LIVE
+        UPSTREAM_RESULTS.inc(source, provenance)
+        return value, provenance
+
+    async def _retry(self, source: str, attempt: Callable[[], Awaitable[T]], lane: str, error: Exception) -> T:
+        """Retry a failed first attempt; the last error is raised when no retry succeeds"""
+        for retry in range(1, self.max_attempts):
+            if not is_retryable(error):
+                break
+            delay = self._backoff(retry, error)
+            remaining = remaining_budget()
+            if remaining is not None and remaining <= delay:
+                break
+            if not await self._spend(source, lane):
+                break
+            logger.info("Retrying %s in %.2fs after: %s", source, delay, str(error) or type(error).__name__)
+            await asyncio.sleep(delay)
+            UPSTREAM_ATTEMPTS.inc(source, "retry")
+            try:
+                value, _ = await self._hedged(source, attempt, lane)
+                return value
+            except Exception as e:
+                error = e
+        UPSTREAM_RESULTS.inc(source, FALLBACK)
+        raise error
+
+    async def _hedged(self, source: str, attempt: Callable[[], Awaitable[T]], lane: str) -> Tuple[T, bool]:
+        """One attempt, duplicated if it outlives the hedge delay; True when the duplicate won"""
+        delay = self.latency.quantile(SOURCE, source, self.hedge_quantile) if source in self.hedge_sources else None
+        primary = asyncio.ensure_future(attempt())
+        if delay is None:
+            return await primary, False
+
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and await self._spend(source, lane, max_wait=0):
+                UPSTREAM_ATTEMPTS.inc(source, "hedge")
+                tasks.add(asyncio.ensure_future(attempt()))
+
+            error: Optional[BaseException] = None
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result(), task is not primary
+                    error = error or task.exception()
+            raise error
+        finally:
+            # The loser, or both if this call was cancelled
+            for task in tasks:
+                task.cancel()
+
+
+# Singleton instance
+_resilient_caller = None
+
+
+def get_resilient_caller() -> ResilientCaller:
+    """Get or create resilient caller singleton"""
+    global _resilient_caller
+    if _resilient_caller is None:
+        from core.config import settings
+        _resilient_caller = ResilientCaller(
+            RetryBudget(settings.RETRY_BUDGET_RATIO, settings.RETRY_BUDGET_MIN_PER_SECOND),
+            get_rate_limiter(),
+            get_latency_stats(),
+            settings.RETRY_MAX_ATTEMPTS,
+            settings.RETRY_BASE_DELAY_MS / 1000,
+            settings.RETRY_MAX_DELAY_MS / 1000,
+            settings.HEDGE_QUANTILE,
+            settings.HEDGE_SOURCES
+        )
+    return _resilient_caller
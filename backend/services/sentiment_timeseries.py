@@ -0,0 +1,281 @@
+"""
+Sentiment Time Series
+Per-company rolling sentiment aggregates built incrementally from scored mentions
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, Iterable, List, Optional
+
+import numpy as np
+
+from services.insight_store import company_key
+
+logger = logging.getLogger(__name__)
+
+
+# Windows reported with every summary; the buffer holds two of the longest so
+# each window can be compared with the one before it
+STANDARD_WINDOWS_DAYS = (7, 30, 90)
+DEFAULT_CAPACITY_DAYS = 2 * max(STANDARD_WINDOWS_DAYS) + 1
+
+# Same cut-offs NewsAgent uses to label articles
+POSITIVE_THRESHOLD = 0.2
+NEGATIVE_THRESHOLD = -0.2
+
+_COUNT, _SCORE, _POSITIVE, _NEUTRAL, _NEGATIVE = range(5)
+_FIELDS = 5
+
+
+def _day_of(timestamp: Any) -> Optional[int]:
+    """UTC day ordinal of a datetime or ISO-8601 string"""
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(timestamp, datetime):
+        return None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return timestamp.toordinal()
+
+
+def _today() -> int:
+    return datetime.now(timezone.utc).toordinal()
+
+
+class SentimentSeries:
+    """
+    Ring buffer of daily buckets holding cumulative mention totals
+
+    Slot d stores the running totals (count, score sum, positive, neutral,
+    negative) of every mention up to and including day d, so any window ending
+    today is one subtraction of two rows. New mentions land on today and touch a
+    single row; late-arriving ones update the rows from their day onwards.
+    """
+
+    def __init__(self, capacity_days: int = DEFAULT_CAPACITY_DAYS):
+        self.capacity = capacity_days
+        self._cumulative = np.zeros((capacity_days, _FIELDS))
+        self._head: Optional[int] = None
+        # Mention id -> day, so re-fetched articles are not counted twice
+        self._seen: Dict[str, int] = {}
+
+    def seen(self, mention_id: str) -> bool:
+        return mention_id in self._seen
+
+    @property
+    def oldest_day(self) -> Optional[int]:
+        return None if self._head is None else self._head - self.capacity + 1
+
+    def _advance(self, day: int):
+        """Move the head forward, carrying the running totals into the new days"""
+        if self._head is None:
+            self._head = day
+            return
+        if day <= self._head:
+            return
+
+        gap = min(day - self._head, self.capacity)
+        carried = self._cumulative[self._head % self.capacity].copy()
+        self._cumulative[np.arange(day - gap + 1, day + 1) % self.capacity] = carried
+        self._head = day
+
+        oldest = self.oldest_day
+        self._seen = {key: seen_day for key, seen_day in self._seen.items() if seen_day >= oldest}
+
+    def add(self, day: int, score: float, mention_id: Optional[str] = None) -> bool:
+        """
+        Record one scored mention
+
+        Returns:
+            False when the mention was already seen or is older than the buffer
+        """
+        if mention_id is not None and mention_id in self._seen:
+            return False
+
+        self._advance(max(day, self._head if self._head is not None else day))
+        day = min(day, self._head)
+        if day < self.oldest_day:
+            return False
+
+        score = max(-1.0, min(1.0, float(score)))
+        row = np.zeros(_FIELDS)
+        row[_COUNT] = 1.0
+        row[_SCORE] = score
+        if score > POSITIVE_THRESHOLD:
+            row[_POSITIVE] = 1.0
+        elif score > NEGATIVE_THRESHOLD:
+            row[_NEUTRAL] = 1.0
+        else:
+            row[_NEGATIVE] = 1.0
+
+        if day == self._head:
+            self._cumulative[day % self.capacity] += row
+        else:
+            self._cumulative[np.arange(day, self._head + 1) % self.capacity] += row
+
+        if mention_id is not None:
+            self._seen[mention_id] = day
+        return True
+
+    def totals(self, days: int, end_offset: int = 0, today: Optional[int] = None) -> Optional[np.ndarray]:
+        """
+        Totals for the `days` days ending `end_offset` days before today
+
+        Returns:
+            Field vector, or None when the window falls outside the buffer
+        """
+        if self._head is None:
+            return np.zeros(_FIELDS)
+        self._advance(_today() if today is None else today)
+
+        end = self._head - end_offset
+        start = end - days
+        if days < 1 or start < self.oldest_day:
+            return None
+        return self._cumulative[end % self.capacity] - self._cumulative[start % self.capacity]
+
+
+def describe_totals(totals: np.ndarray) -> Dict[str, Any]:
+    """Mention count, mean score, label and percentage breakdown for a window"""
+    count = int(round(totals[_COUNT]))
+    if not count:
+        return {
+            "mentions": 0,
+            "sentiment_score": None,
+            "overall_sentiment": "Unknown",
+            "sentiment_breakdown": {"positive": 0, "neutral": 0, "negative": 0}
+        }
+
+    score = float(totals[_SCORE]) / count
+    if score > POSITIVE_THRESHOLD:
+        label = "Positive"
+    elif score > NEGATIVE_THRESHOLD:
+        label = "Neutral"
+    else:
+        label = "Negative"
+
+    return {
+        "mentions": count,
+        "sentiment_score": round(score, 3),
+        "overall_sentiment": label,
+        "sentiment_breakdown": {
+            "positive": round(100 * float(totals[_POSITIVE]) / count),
+            "neutral": round(100 * float(totals[_NEUTRAL]) / count),
+            "negative": round(100 * float(totals[_NEGATIVE]) / count)
+        }
+    }
+
+
+class SentimentTimeSeriesStore:
+    """In-memory per-company sentiment series (replace with database in production)"""
+
+    def __init__(self, capacity_days: int = DEFAULT_CAPACITY_DAYS):
+        self.capacity_days = capacity_days
+        self._series: Dict[str, SentimentSeries] = {}
+
+    def ingest(
+        self,
+        company_name: str,
+        mentions: Iterable[Dict[str, Any]],
+        scorer: Optional[Callable[[str], float]] = None
+    ) -> int:
+        """
+        Add scored mentions to a company's series
+
+        Args:
+            company_name: Company the mentions are about
+            mentions: Dicts with "timestamp" (datetime or ISO string), an optional
+                stable "id" used for de-duplication, and either a "score" (-1 to 1)
+                or the "text" to score
+            scorer: Scores "text" for mentions without a score; only called for
+                mentions that have not been seen before
+
+        Returns:
+            Number of mentions that were new
+        """
+        key = company_key(company_name)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = SentimentSeries(self.capacity_days)
+
+        today = _today()
+        added = 0
+        for mention in mentions:
+            day = _day_of(mention.get("timestamp"))
+            mention_id = mention.get("id")
+            if day is None or (mention_id is not None and series.seen(mention_id)):
+                continue
+            score = mention.get("score")
+            if score is None and scorer is not None and mention.get("text"):
+                score = scorer(mention["text"])
+            if score is None:
+                continue
+            # Clock skew must not push the head past today
+            if series.add(min(day, today), score, mention_id):
+                added += 1
+        return added
+
+    def unseen(self, company_name: str, mentions: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Mentions whose id has not been ingested yet, i.e. the ones worth scoring"""
+        series = self._series.get(company_key(company_name))
+        if series is None:
+            return list(mentions)
+        return [mention for mention in mentions if mention.get("id") is None or not series.seen(mention["id"])]
+
+    def window(self, company_name: str, days: int) -> Dict[str, Any]:
+        """Aggregate sentiment over the last `days` days"""
+        series = self._series.get(company_key(company_name))
+        totals = series.totals(days) if series is not None else None
+        return describe_totals(totals if totals is not None else np.zeros(_FIELDS))
+
+    def trend(self, company_name: str, days: int) -> Dict[str, Any]:
+        """Change in mean sentiment and mention volume versus the preceding window"""
+        series = self._series.get(company_key(company_name))
+        if series is None:
+            return {"window_days": days, "score_delta": None, "mention_delta": None}
+
+        current = series.totals(days)
+        previous = series.totals(days, end_offset=days)
+        if current is None or previous is None:
+            return {"window_days": days, "score_delta": None, "mention_delta": None}
+
+        score_delta = None
+        if current[_COUNT] and previous[_COUNT]:
+            score_delta = round(
+                float(current[_SCORE] / current[_COUNT] - previous[_SCORE] / previous[_COUNT]), 3
+            )
+        return {
+            "window_days": days,
+            "score_delta": score_delta,
+            "mention_delta": int(round(current[_COUNT] - previous[_COUNT]))
+        }
+
+    def summary(self, company_name: str, timeframe_days: int = 30) -> Dict[str, Any]:
+        """
+        Requested window plus the standard 7/30/90-day windows and their trends
+
+        Every window is answered from the stored buckets; no text is re-scored.
+        """
+        timeframe_days = max(1, min(timeframe_days, self.capacity_days - 1))
+        windows = sorted(set(STANDARD_WINDOWS_DAYS) | {timeframe_days})
+        return {
+            **self.window(company_name, timeframe_days),
+            "timeframe_days": timeframe_days,
+            "windows": {f"{days}d": self.window(company_name, days) for days in windows},
+            "trends": {f"{days}d": self.trend(company_name, days) for days in windows}
+        }
+
+
+# Singleton instance
+_sentiment_store = None
+
+
+def get_sentiment_store() -> SentimentTimeSeriesStore:
+    """Get or create sentiment time series store singleton"""
+    global _sentiment_store
+    if _sentiment_store is None:
+        _sentiment_store = SentimentTimeSeriesStore()
+    return _sentiment_store
@@ -0,0 +1,343 @@
+"""
+Symbol Index
+Offline company name -> ticker resolution from a listings file
+"""
+
+import re
+import csv
+import math
+import mmap
+import struct
+import bisect
+import logging
+import unicodedata
+import zlib
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from services.news_ranking_service import core_company_name
+
+logger = logging.getLogger(__name__)
+
+
+# Index file layout (little-endian), every section a flat array the loader
+# exposes as a memoryview over the mmap - nothing is parsed at startup:
+#   header | record blob | record offsets u32[n+1] | hash slots u32[m]
+#   | trigram keys u32[t] | posting offsets u32[t+1] | postings u32[p]
+#   | trigram counts u32[n]
+_MAGIC = b"SYMIDX01"
+_HEADER = struct.Struct("<8s5I7Q")
+
+# Listing CSV column names seen in exchange downloads (NASDAQ, NYSE, NSE, BSE)
+_SYMBOL_COLUMNS = ("symbol", "ticker", "security id", "act symbol")
+_NAME_COLUMNS = ("name", "company", "company name", "name of company", "security name", "issuer name")
+_EXCHANGE_COLUMNS = ("exchange", "market", "listing exchange")
+
+# Trigrams shared by more names than this are too common to narrow anything down
+_MAX_POSTINGS_SCANNED = 5000
+
+# "S.A." / "N.V." style initials, collapsed so the suffix filter recognises them
+_INITIALS_RE = re.compile(r"\b([A-Za-z])\.")
+
+
+def normalize_company_name(name: str) -> str:
+    """Fold accents, lowercase and drop legal suffixes ("Nestlé S.A." -> "nestle")"""
+    folded = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    folded = _INITIALS_RE.sub(r"\1", folded).replace("&", " and ")
+    return core_company_name(folded)
+
+
+def _trigrams(norm: str) -> set:
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _pack_trigram(trigram: str) -> int:
+    a, b, c = trigram.encode("ascii")
+    return (a << 16) | (b << 8) | c
+
+
+class SymbolIndex:
+    """
+    Ranked ticker candidates for a company name, served from an mmap'd file
+
+    Three lookups share one sorted record table:
+    - exact: open-addressing hash table keyed by crc32 of the normalized name
+    - prefix: records are sorted by normalized name, so every prefix is a
+      contiguous range found by binary search (a flattened trie)
+    - fuzzy: trigram posting lists scored by Jaccard similarity
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, self.size, self._slots, n_trigrams, n_postings, _,
+         blob_at, offsets_at, hash_at, keys_at, post_offsets_at, postings_at, counts_at) = \
+            _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a symbol index")
+
+        view = memoryview(self._mmap)
+        self._blob = view[blob_at:offsets_at]
+        self._offsets = view[offsets_at:hash_at].cast("I")
+        self._hash = view[hash_at:keys_at].cast("I")
+        self._keys = view[keys_at:post_offsets_at].cast("I")
+        self._post_offsets = view[post_offsets_at:postings_at].cast("I")
+        self._postings = view[postings_at:counts_at].cast("I")
+        self._counts = view[counts_at:counts_at + 4 * self.size].cast("I")
+
+    @classmethod
+    def build(cls, listings_path: str, index_path: str) -> int:
+        """
+        Compile a listings CSV into an index file
+
+        Returns:
+            Number of listings indexed
+        """
+        records: List[Tuple[str, str, str, str]] = []
+        with open(listings_path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            columns = {c.strip().lower(): c for c in reader.fieldnames or []}
+            symbol_col = next((columns[c] for c in _SYMBOL_COLUMNS if c in columns), None)
+            name_col = next((columns[c] for c in _NAME_COLUMNS if c in columns), None)
+            exchange_col = next((columns[c] for c in _EXCHANGE_COLUMNS if c in columns), None)
+            if not symbol_col or not name_col:
+                raise ValueError(f"{listings_path} needs symbol and name columns")
+
+            for row in reader:
+                symbol = (row.get(symbol_col) or "").strip().upper()
+                name = (row.get(name_col) or "").strip()
+                norm = normalize_company_name(name)
+                if symbol and norm:
+                    exchange = (row.get(exchange_col) or "").strip() if exchange_col else ""
+                    records.append((norm, symbol, exchange, name.replace("\t", " ")))
+
+        records.sort()
+        n = len(records)
+
+        blob = bytearray()
+        offsets = array("I", [0])
+        for record in records:
+            blob += ("\t".join(record) + "\n").encode("utf-8")
+            offsets.append(len(blob))
+
+        # Hash table holds the first record of each normalized-name group
+        slots = 1 << max(3, (2 * n - 1).bit_length())
+        table = array("I", bytes(4 * slots))
+        for i, record in enumerate(records):
+            if i and records[i - 1][0] == record[0]:
+                continue
+            slot = zlib.crc32(record[0].encode("ascii")) & (slots - 1)
+            while table[slot]:
+                slot = (slot + 1) & (slots - 1)
+            table[slot] = i + 1
+
+        postings_by_key: Dict[int, List[int]] = defaultdict(list)
+        counts = array("I")
+        for i, record in enumerate(records):
+            grams = _trigrams(record[0])
+            counts.append(len(grams))
+            for gram in grams:
+                postings_by_key[_pack_trigram(gram)].append(i)
+
+        keys = array("I", sorted(postings_by_key))
+        post_offsets = array("I", [0])
+        postings = array("I")
+        for key in keys:
+            postings.extend(postings_by_key[key])
+            post_offsets.append(len(postings))
+
+        sections = [bytes(blob), offsets.tobytes(), table.tobytes(), keys.tobytes(),
+                    post_offsets.tobytes(), postings.tobytes(), counts.tobytes()]
+        positions = []
+        cursor = _HEADER.size
+        for section in sections:
+            positions.append(cursor)
+            cursor += len(section)
+
+        header = _HEADER.pack(_MAGIC, n, slots, len(keys), len(postings), 0, *positions)
+        tmp = Path(index_path).with_suffix(".tmp")
+        tmp.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(header)
+            for section in sections:
+                f.write(section)
+        tmp.replace(index_path)
+
+        logger.info("Built symbol index with %s listings at %s", n, index_path)
+        return n
+
+    def resolve(self, company_name: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Ranked ticker candidates for a company name
+
+        Returns:
+            Candidates with symbol, exchange, name, score (0-1) and match type
+        """
+        norm = normalize_company_name(company_name)
+        if not norm or not self.size:
+            return []
+
+        scores: Dict[int, Tuple[float, str]] = {}
+
+        def offer(index: int, score: float, match: str):
+            if score > scores.get(index, (0.0, ""))[0]:
+                scores[index] = (score, match)
+
+        exact = self._exact(norm)
+        if exact is not None:
+            for index in self._group(exact, norm):
+                offer(index, 1.0, "exact")
+
+        for index in self._prefix(norm, limit * 4):
+            candidate = self._norm_at(index)
+            offer(index, 0.8 + 0.15 * len(norm) / len(candidate), "prefix")
+
+        if not scores:
+            # Typo tolerance only when nothing matched exactly or by prefix
+            for index, similarity in self._fuzzy(norm, limit * 4):
+                offer(index, 0.75 * similarity, "fuzzy")
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1][0], self._norm_at(item[0])))
+        results = []
+        for index, (score, match) in ranked[:limit]:
+            _, symbol, exchange, name = self._record(index)
+            results.append({
+                "symbol": symbol,
+                "exchange": exchange or None,
+                "name": name,
+                "score": round(score, 3),
+                "match": match
+            })
+        return results
+
+    def best(self, company_name: str) -> Optional[str]:
+        """
+        The listed symbol for a company, only when its name matches a listing exactly
+
+        Names are compared after normalization (accents, case and legal suffixes),
+        so "Acme Corp." finds "ACME Corporation" but "Acme" does not find "Acme
+        United": a prefix is a type-ahead suggestion, not proof a company is listed.
+        """
+        norm = normalize_company_name(company_name)
+        if not norm or not self.size:
+            return None
+        index = self._exact(norm)
+        if index is None:
+            return None
+        return self._record(index)[1]
+
+    def _record(self, index: int) -> List[str]:
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return bytes(self._blob[start:end - 1]).decode("utf-8").split("\t")
+
+    def _norm_at(self, index: int) -> str:
+        start, end = self._offsets[index], self._offsets[index + 1]
+        raw = bytes(self._blob[start:end])
+        return raw[:raw.index(b"\t")].decode("ascii")
+
+    def _exact(self, norm: str) -> Optional[int]:
+        mask = self._slots - 1
+        slot = zlib.crc32(norm.encode("ascii")) & mask
+        while True:
+            entry = self._hash[slot]
+            if not entry:
+                return None
+            if self._norm_at(entry - 1) == norm:
+                return entry - 1
+            slot = (slot + 1) & mask
+
+    def _group(self, first: int, norm: str) -> List[int]:
+        """All records sharing a normalized name (e.g. dual listings)"""
+        indices = [first]
+        index = first + 1
+        while index < self.size and self._norm_at(index) == norm:
+            indices.append(index)
+            index += 1
+        return indices
+
+    def _prefix(self, norm: str, limit: int) -> List[int]:
+        lo = bisect.bisect_left(range(self.size), norm, key=self._norm_at)
+        hi = bisect.bisect_left(range(lo, self.size), norm + "\x7f", key=self._norm_at) + lo
+        return list(range(lo, min(hi, lo + limit)))
+
+    def _fuzzy(self, norm: str, limit: int, threshold: float = 0.3) -> List[Tuple[int, float]]:
+        grams = _trigrams(norm)
+        lists = []
+        for gram in grams:
+            key = _pack_trigram(gram)
+            position = bisect.bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                start, end = self._post_offsets[position], self._post_offsets[position + 1]
+                lists.append((end - start, start, end))
+        if not lists:
+            return []
+        lists.sort()
+
+        # Jaccard >= threshold implies sharing >= threshold * |query| trigrams, so
+        # every match appears in one of the rarest (len - need + 1) posting lists.
+        # Seed candidates from those, then verify against the rest by binary search
+        # (posting lists are sorted by record index).
+        need = max(1, math.ceil(threshold * len(grams)))
+        seeds = lists[:max(1, len(lists) - need + 1)]
+        candidates = set()
+        for size, start, end in seeds:
+            if size > _MAX_POSTINGS_SCANNED and candidates:
+                break
+            candidates.update(self._postings[start:end])
+
+        similarities = []
+        for index in candidates:
+            shared = 0
+            for _, start, end in lists:
+                position = bisect.bisect_left(self._postings, index, start, end)
+                if position < end and self._postings[position] == index:
+                    shared += 1
+            similarity = shared / (len(grams) + self._counts[index] - shared)
+            if similarity >= threshold:
+                similarities.append((index, similarity))
+
+        similarities.sort(key=lambda item: -item[1])
+        return similarities[:limit]
+
+
+# Singleton instance
+_symbol_index = None
+_symbol_index_loaded = False
+
+
+def get_symbol_index() -> Optional[SymbolIndex]:
+    """Get the symbol index singleton, compiling it from listings if needed"""
+    global _symbol_index, _symbol_index_loaded
+    if not _symbol_index_loaded:
+        from core.config import settings
+
+        _symbol_index_loaded = True
+        index_path = Path(settings.SYMBOL_INDEX_PATH)
+        listings_path = Path(settings.SYMBOL_LISTINGS_PATH)
+        try:
+            if listings_path.exists() and (
+                not index_path.exists() or index_path.stat().st_mtime < listings_path.stat().st_mtime
+            ):
+                SymbolIndex.build(str(listings_path), str(index_path))
+            if index_path.exists():
+                _symbol_index = SymbolIndex(str(index_path))
+            else:
+                logger.info("No symbol listings configured - ticker resolution disabled")
+        except (OSError, ValueError) as e:
+            logger.error("Failed to load symbol index: %s", e)
+    return _symbol_index
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3:
+        print("Usage: python -m services.symbol_index <listings.csv> <output.idx>")
+        sys.exit(1)
+    count = SymbolIndex.build(sys.argv[1], sys.argv[2])
+    print(f"Indexed {count} listings")
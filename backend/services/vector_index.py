@@ -0,0 +1,281 @@
+"""
+Vector Index
+Local embedding index of past agent insights and synthesized briefs for retrieval
+"""
+
+import time
+import asyncio
+import hashlib
+import threading
+import importlib.util
+import logging
+from typing import Dict, Any, List, NamedTuple, Optional, Set
+
+from core.serialization import dumps, loads
+from services.insight_store import company_key
+
+logger = logging.getLogger(__name__)
+
+
+# Both are needed: sentence-transformers embeds on the CPU, chromadb keeps the
+# HNSW index on disk
+_SDK_MODULES = ("chromadb", "sentence_transformers")
+
+# Synthesis output that can be reused as-is for a near-identical situation
+SECTIONS = ("executive_summary", "talking_points", "action_items", "opportunities", "risks")
+
+# Agents most likely to change between runs first: the embedding model only
+# reads the first few hundred tokens of a situation
+_SITUATION_AGENTS = ("news", "financial", "social_media", "research")
+
+# Fields that change on every run (or identify rather than describe) and so
+# would make identical situations look different
+_VOLATILE_FIELDS = frozenset({
+    "last_updated", "timestamp", "date", "published_date", "published_at", "as_of", "collected_at",
+    "id", "url", "linkedin", "email", "phone", "provenance", "news_quota"
+})
+
+_MAX_VALUE_CHARS = 200
+
+
+class RetrievedInsight(NamedTuple):
+    company: str
+    agent: str
+    text: str
+    similarity: float
+
+
+class PriorSynthesis(NamedTuple):
+    company: str
+    similarity: float
+    saved_at: float
+    sections: Dict[str, Any]
+
+
+class Retrieval(NamedTuple):
+    prior: Optional[PriorSynthesis]
+    context: List[RetrievedInsight]
+
+
+def _facts(path: str, value: Any, lines: List[str]):
+    """Flatten collected data into "path: value" lines, skipping volatile fields"""
+    if isinstance(value, dict):
+        for key in sorted(value):
+            if key not in _VOLATILE_FIELDS:
+                _facts(f"{path}.{key}", value[key], lines)
+    elif isinstance(value, list):
+        for item in value:
+            _facts(path, item, lines)
+    elif value is not None and value != "":
+        lines.append(f"{path}: {str(value)[:_MAX_VALUE_CHARS]}")
+
+
+def situation_text(company_name: str, agent_outputs: Dict[str, Any]) -> str:
+    """
+    What the synthesizer is given, as one text: the company and the data every agent collected
+
+    Built from the agents' `data` rather than their insights, which are largely
+    templated and read the same after the underlying data has changed.
+    """
+    lines = [company_name]
+    others = sorted(set(agent_outputs) - set(_SITUATION_AGENTS))
+    for agent in [a for a in _SITUATION_AGENTS if a in agent_outputs] + others:
+        output = agent_outputs[agent] or {}
+        _facts(agent, output.get("data") or {}, lines)
+    return "\n".join(lines)
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class InsightVectorIndex:
+    """
+    Embeddings of past insights and briefs in a persistent chromadb collection
+
+    Each indexed synthesis adds one document per agent insight (retrieved as
+    prior context for the same or similar companies) and one "situation"
+    document embedding everything the synthesizer saw, carrying the sections
+    it produced. Texts from one synthesis are embedded in a single batch, and
+    all model and index work runs in a thread. The model and index load at
+    warmup; until they have, retrieval returns nothing rather than making a
+    request wait for the model.
+
+    The on-disk index belongs to one process; with several workers point
+    VECTOR_INDEX_URL at a chroma server instead.
+    """
+
+    COLLECTION = "insights"
+
+    def __init__(self, path: str, model_name: str, batch_size: int = 32, url: Optional[str] = None):
+        self.path = path
+        self.url = url
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._collection = None
+        self._lock = threading.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+        self._loading: Optional[asyncio.Task] = None
+
+    @property
+    def available(self) -> bool:
+        return all(importlib.util.find_spec(module) is not None for module in _SDK_MODULES)
+
+    def _load(self):
+        with self._lock:
+            if self._collection is not None:
+                return
+            import chromadb
+            from sentence_transformers import SentenceTransformer
+
+            self._model = SentenceTransformer(self.model_name, device="cpu")
+            client_settings = chromadb.config.Settings(anonymized_telemetry=False)
+            if self.url:
+                host, _, port = self.url.split("://", 1)[-1].partition(":")
+                client = chromadb.HttpClient(host=host, port=int(port or 8000), settings=client_settings)
+            else:
+                client = chromadb.PersistentClient(path=self.path, settings=client_settings)
+            self._collection = client.get_or_create_collection(self.COLLECTION, metadata={"hnsw:space": "cosine"})
+            logger.info("Vector index loaded (%s documents, model %s)", self._collection.count(), self.model_name)
+
+    @property
+    def loaded(self) -> bool:
+        return self._collection is not None
+
+    async def warmup(self):
+        """Load the embedding model and open the index ahead of the first synthesis"""
+        if self.available:
+            await asyncio.to_thread(self._load)
+
+    def _load_in_background(self):
+        """Start loading once, for processes that skipped warmup"""
+        if self._loading is None:
+            self._loading = asyncio.create_task(self.warmup())
+            self._loading.add_done_callback(self._log_load_failure)
+
+    def _log_load_failure(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Loading the vector index failed: %s", task.exception())
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        return self._model.encode(
+            texts, batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True
+        ).tolist()
+
+    def _add(self, company_name: str, agent_outputs: Dict[str, Any], synthesis: Dict[str, Any]):
+        self._load()
+        key = company_key(company_name)
+        saved_at = time.time()
+        ids: List[str] = []
+        texts: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+
+        for agent, output in agent_outputs.items():
+            for insight in (output or {}).get("insights") or []:
+                # Content-addressed, so an insight repeated across runs is stored once
+                ids.append(f"insight:{key}:{agent}:{_digest(insight)}")
+                texts.append(insight)
+                metadatas.append({
+                    "kind": "insight", "company": key, "company_name": company_name,
+                    "agent": agent, "saved_at": saved_at
+                })
+
+        situation = situation_text(company_name, agent_outputs)
+        ids.append(f"situation:{key}:{_digest(situation)}")
+        texts.append(situation)
+        metadatas.append({
+            "kind": "situation", "company": key, "company_name": company_name, "saved_at": saved_at,
+            "sections": dumps({section: synthesis.get(section) for section in SECTIONS}).decode("utf-8")
+        })
+
+        self._collection.upsert(ids=ids, embeddings=self._embed(texts), documents=texts, metadatas=metadatas)
+
+    async def add(self, company_name: str, agent_outputs: Dict[str, Any], synthesis: Dict[str, Any]):
+        """Index one synthesis: its agents' insights and the situation it was produced for"""
+        try:
+            await asyncio.to_thread(self._add, company_name, agent_outputs, synthesis)
+        except Exception as e:
+            logger.error("Indexing insights for %s failed: %s", company_name, e)
+
+    def add_in_background(self, company_name: str, agent_outputs: Dict[str, Any], synthesis: Dict[str, Any]):
+        """Index without holding up the response that produced the synthesis"""
+        task = asyncio.create_task(self.add(company_name, agent_outputs, synthesis))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _query(self, embedding: List[float], where: Dict[str, Any], n_results: int) -> List[tuple]:
+        result = self._collection.query(
+            query_embeddings=[embedding], where=where, n_results=min(n_results, self._collection.count()),
+            include=["documents", "metadatas", "distances"]
+        )
+        # Cosine distance; embeddings are normalized so similarity is 1 - distance
+        return [
+            (document, metadata, 1.0 - distance)
+            for document, metadata, distance in zip(
+                result["documents"][0], result["metadatas"][0], result["distances"][0]
+            )
+        ]
+
+    def _retrieve(self, company_name: str, agent_outputs: Dict[str, Any], top_k: int,
+                  max_age_seconds: float) -> Retrieval:
+        self._load()
+        if self._collection.count() == 0:
+            return Retrieval(None, [])
+
+        [embedding] = self._embed([situation_text(company_name, agent_outputs)])
+
+        prior = None
+        matches = self._query(embedding, {"$and": [
+            {"kind": "situation"},
+            {"company": company_key(company_name)},
+            {"saved_at": {"$gte": time.time() - max_age_seconds}}
+        ]}, 1)
+        if matches:
+            _, metadata, similarity = matches[0]
+            prior = PriorSynthesis(metadata["company_name"], similarity, metadata["saved_at"], loads(metadata["sections"]))
+
+        # Nearest insights from any company: this one's history and similar companies rank first
+        context = [
+            RetrievedInsight(metadata["company_name"], metadata["agent"], document, similarity)
+            for document, metadata, similarity in self._query(embedding, {"kind": "insight"}, top_k)
+        ]
+        return Retrieval(prior, context)
+
+    async def retrieve(self, company_name: str, agent_outputs: Dict[str, Any], top_k: int = 8,
+                       max_age_seconds: float = 86400) -> Optional[Retrieval]:
+        """
+        Prior synthesis for the closest situation of this company and related insights
+
+        Returns None when the index is unavailable, still loading or the lookup
+        fails, so synthesis always proceeds from scratch rather than erroring
+        or waiting.
+        """
+        if not self.loaded:
+            self._load_in_background()
+            return None
+        try:
+            return await asyncio.to_thread(self._retrieve, company_name, agent_outputs, top_k, max_age_seconds)
+        except Exception as e:
+            logger.error("Retrieving prior insights for %s failed: %s", company_name, e)
+            return None
+
+
+# Singleton instance
+_vector_index = None
+
+
+def get_vector_index() -> InsightVectorIndex:
+    """Get or create vector index singleton"""
+    global _vector_index
+    if _vector_index is None:
+        from core.config import settings
+        _vector_index = InsightVectorIndex(
+            settings.VECTOR_INDEX_PATH,
+            settings.EMBEDDING_MODEL,
+            settings.EMBEDDING_BATCH_SIZE,
+            settings.VECTOR_INDEX_URL
+        )
+        if settings.VECTOR_INDEX_ENABLED and not _vector_index.available:
+            logger.warning("chromadb or sentence-transformers not installed - insight retrieval disabled")
+    return _vector_index
@@ -1,6 +1,7 @@
 import { BrowserRouter as Router, Routes, Route } from 'react-router-dom'
 import Dashboard from './pages/Dashboard'
 import InsightsPage from './pages/InsightsPage'
+import QuickBriefPage from './pages/QuickBriefPage'
 import Layout from './components/Layout'
 import { ThemeProvider } from './contexts/ThemeContext'
 
@@ -12,6 +13,7 @@ function App() {
           <Routes>
             <Route path="/" element={<Dashboard />} />
             <Route path="/insights/:companyName" element={<InsightsPage />} />
+            <Route path="/quick-brief/:companyName" element={<QuickBriefPage />} />
           </Routes>
         </Layout>
       </Router>
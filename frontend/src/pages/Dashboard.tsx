@@ -17,9 +17,7 @@ export default function Dashboard() {
 
   const generateMutation = useMutation({
     mutationFn: (data: { company_name: string }) => 
-      quickMode 
-        ? insightsApi.generateQuickBrief(data)
-        : insightsApi.generateInsights({ ...data, timeframe_days: 30, priority: 'high' }),
+      insightsApi.generateInsights({ ...data, timeframe_days: 30, priority: 'high' }),
     onSuccess: () => {
       navigate(`/insights/${encodeURIComponent(companyName)}`)
     },
@@ -27,7 +25,11 @@ export default function Dashboard() {
 
   const handleSubmit = (e: React.FormEvent) => {
     e.preventDefault()
-    if (companyName.trim()) {
+    if (!companyName.trim()) return
+    if (quickMode) {
+      // The quick brief page answers within the server's budget and upgrades in place
+      navigate(`/quick-brief/${encodeURIComponent(companyName)}`)
+    } else {
       generateMutation.mutate({ company_name: companyName })
     }
   }
@@ -19,14 +19,21 @@ export default function InsightsPage() {
     risks: true
   })
 
+  // The dashboard has usually just generated these, so read the stored copy
+  // and only run the agents when the company has nothing stored yet
   const { data, isLoading, error } = useQuery({
     queryKey: ['insights', companyName],
-    queryFn: () => insightsApi.generateInsights({
-      company_name: companyName!,
-      timeframe_days: 30,
-      priority: 'high'
+    queryFn: () => insightsApi.getLatest(companyName!).catch((err) => {
+      if (err.response?.status !== 404) throw err
+      return insightsApi.generateInsights({
+        company_name: companyName!,
+        timeframe_days: 30,
+        priority: 'high'
+      })
     }),
     enabled: !!companyName,
+    // Revalidates with If-None-Match, so an unchanged result is an empty 304
+    refetchInterval: 60_000,
   })
 
   const handleCopy = () => {
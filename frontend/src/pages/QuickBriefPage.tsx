@@ -0,0 +1,192 @@
+import { useEffect } from 'react'
+import { useParams, Link } from 'react-router-dom'
+import { useQuery, useQueryClient } from '@tanstack/react-query'
+import {
+  Loader2, Zap, ArrowLeft, Clock, RefreshCw, TrendingUp, Newspaper, AlertTriangle
+} from 'lucide-react'
+import { insightsApi, QuickBrief } from '../services/api'
+
+const TIER_LABELS: Record<QuickBrief['tier'], string> = {
+  live: 'Live',
+  cached: 'Cached',
+  historical: 'From last full insights',
+  pending: 'Pending',
+}
+
+export default function QuickBriefPage() {
+  const { companyName } = useParams<{ companyName: string }>()
+  const queryClient = useQueryClient()
+
+  // Answers within the server's budget with the best brief it has
+  const { data: brief, isLoading, error } = useQuery({
+    queryKey: ['quick-brief', companyName],
+    queryFn: async (): Promise<QuickBrief> =>
+      (await insightsApi.generateQuickBrief({ company_name: companyName! })).data.data,
+    enabled: !!companyName,
+  })
+
+  // While a refresh runs, wait for the next version on the event stream and swap it in
+  useEffect(() => {
+    if (!companyName || !brief?.upgrading) return
+    const setBrief = (next: QuickBrief) => queryClient.setQueryData(['quick-brief', companyName], next)
+    const stopUpgrading = () => setBrief({ ...brief, upgrading: false })
+
+    const source = insightsApi.streamQuickBrief(companyName, brief.version)
+    source.addEventListener('brief', (event) => {
+      source.close()
+      setBrief(JSON.parse((event as MessageEvent).data))
+    })
+    source.addEventListener('timeout', () => {
+      source.close()
+      // Whatever is stored now; a refresh still running reopens the stream
+      insightsApi.getQuickBrief(companyName)
+        .then((response) => setBrief(response.data.data))
+        .catch(stopUpgrading)
+    })
+    source.onerror = () => {
+      source.close()
+      stopUpgrading()
+    }
+    return () => source.close()
+  }, [brief, companyName, queryClient])
+
+  if (isLoading) {
+    return (
+      <div className="flex items-center justify-center min-h-[400px]">
+        <Loader2 className="h-12 w-12 animate-spin text-blue-600" />
+      </div>
+    )
+  }
+
+  if (error || !brief) {
+    return (
+      <div className="bg-red-50 dark:bg-red-900/20 border-2 border-red-200 dark:border-red-800 rounded-2xl p-8 animate-in slide-in-from-top">
+        <AlertTriangle className="h-12 w-12 text-red-600 dark:text-red-400 mx-auto mb-4" />
+        <h2 className="text-2xl font-bold text-red-900 dark:text-red-100 mb-6 text-center">Error Loading Quick Brief</h2>
+        <Link
+          to="/"
+          className="flex items-center justify-center px-6 py-3 bg-red-600 hover:bg-red-700 text-white rounded-lg font-medium mx-auto w-fit transition-colors"
+        >
+          <ArrowLeft className="h-4 w-4 mr-2" />
+          Back to Dashboard
+        </Link>
+      </div>
+    )
+  }
+
+  const { research, news } = brief.brief
+  const headlines: any[] = news?.data?.company_news || []
+
+  return (
+    <div className="space-y-8 animate-in fade-in duration-700">
+      <Link
+        to="/"
+        className="inline-flex items-center text-gray-600 dark:text-gray-400 hover:text-gray-900 dark:hover:text-white transition-colors group"
+      >
+        <ArrowLeft className="h-4 w-4 mr-2 group-hover:-translate-x-1 transition-transform" />
+        Back to Dashboard
+      </Link>
+
+      {/* Header */}
+      <div className="bg-gradient-to-br from-white to-gray-50 dark:from-gray-800 dark:to-gray-900 rounded-2xl shadow-xl p-8 border-2 border-gray-100 dark:border-gray-700">
+        <h1 className="text-4xl font-extrabold text-gray-900 dark:text-white mb-3 flex items-center">
+          <Zap className="h-8 w-8 mr-3 text-yellow-500" />
+          {companyName}
+        </h1>
+        <div className="flex flex-wrap items-center gap-4 text-sm text-gray-600 dark:text-gray-400">
+          <span className="px-3 py-1 text-xs font-semibold rounded-full bg-blue-100 dark:bg-blue-900/30 text-blue-800 dark:text-blue-300">
+            {TIER_LABELS[brief.tier]}
+          </span>
+          {brief.tier !== 'pending' && (
+            <span className="inline-flex items-center">
+              <Clock className="h-4 w-4 mr-1" />
+              {new Date(brief.saved_at * 1000).toLocaleString()}
+            </span>
+          )}
+          {brief.upgrading && (
+            <span className="inline-flex items-center text-blue-600 dark:text-blue-400">
+              <RefreshCw className="h-4 w-4 mr-1 animate-spin" />
+              Updating...
+            </span>
+          )}
+          <Link
+            to={`/insights/${encodeURIComponent(companyName!)}`}
+            className="ml-auto font-medium text-blue-600 dark:text-blue-400 hover:text-blue-700 dark:hover:text-blue-300"
+          >
+            Full insights
+          </Link>
+        </div>
+      </div>
+
+      {brief.tier === 'pending' ? (
+        <div className="flex items-center justify-center min-h-[200px] text-gray-600 dark:text-gray-400">
+          <Loader2 className="h-6 w-6 mr-3 animate-spin text-blue-600" />
+          Gathering the first brief for {companyName}...
+        </div>
+      ) : (
+        <div className="grid md:grid-cols-2 gap-6">
+          <BriefCard
+            title="Company Snapshot"
+            icon={<TrendingUp className="h-6 w-6 text-blue-600" />}
+            insights={research?.insights || []}
+          />
+          <BriefCard
+            title="Recent News"
+            icon={<Newspaper className="h-6 w-6 text-green-600" />}
+            insights={news?.insights || []}
+          >
+            {headlines.length > 0 && (
+              <ul className="mt-4 pt-4 border-t border-gray-100 dark:border-gray-700 space-y-2">
+                {headlines.slice(0, 5).map((article, index) => (
+                  <li key={index} className="text-sm">
+                    <a
+                      href={article.url}
+                      target="_blank"
+                      rel="noreferrer"
+                      className="text-blue-600 dark:text-blue-400 hover:underline"
+                    >
+                      {article.title}
+                    </a>
+                    <span className="ml-2 text-gray-500 dark:text-gray-400">{article.source}</span>
+                  </li>
+                ))}
+              </ul>
+            )}
+          </BriefCard>
+        </div>
+      )}
+    </div>
+  )
+}
+
+function BriefCard({
+  title,
+  icon,
+  insights,
+  children
+}: {
+  title: string;
+  icon: React.ReactNode;
+  insights: string[];
+  children?: React.ReactNode;
+}) {
+  return (
+    <div className="bg-white dark:bg-gray-800 rounded-2xl shadow-lg p-6 border-2 border-gray-100 dark:border-gray-700">
+      <div className="flex items-center mb-4">
+        <div className="p-2 bg-gradient-to-br from-blue-50 to-purple-50 dark:from-blue-900/30 dark:to-purple-900/30 rounded-lg">
+          {icon}
+        </div>
+        <h3 className="text-lg font-bold text-gray-900 dark:text-white ml-3">{title}</h3>
+      </div>
+      <ul className="space-y-3">
+        {insights.map((insight, index) => (
+          <li key={index} className="text-sm text-gray-700 dark:text-gray-300 flex items-start">
+            <span className="mr-3 text-blue-500 font-bold">•</span>
+            <span>{insight}</span>
+          </li>
+        ))}
+      </ul>
+      {children}
+    </div>
+  )
+}
@@ -20,18 +20,47 @@ export interface QuickBriefRequest {
   company_name: string
 }
 
+// `data` of a quick brief response and of the stream's `brief` event
+export interface QuickBrief {
+  version: number
+  tier: 'live' | 'cached' | 'historical' | 'pending'
+  saved_at: number
+  upgrading: boolean
+  brief: {
+    company_name: string
+    status: string
+    timestamp?: string
+    research?: Record<string, any> | null
+    news?: Record<string, any> | null
+  }
+}
+
 export const insightsApi = {
   generateInsights: (data: InsightRequest) =>
     api.post('/insights/generate', data),
   
+  // Returns within the server's budget; when `upgrading`, the better brief
+  // arrives on the event stream at `upgrade_url` (see streamQuickBrief)
   generateQuickBrief: (data: QuickBriefRequest) =>
     api.post('/insights/quick-brief', data),
   
+  getQuickBrief: (companyName: string) =>
+    api.get(`/insights/quick-brief/${encodeURIComponent(companyName)}`),
+  
+  streamQuickBrief: (companyName: string, afterVersion: number = 0) =>
+    new EventSource(
+      `${API_BASE_URL}/insights/quick-brief/${encodeURIComponent(companyName)}/stream?after=${afterVersion}`
+    ),
+  
+  // ETagged: the browser revalidates with If-None-Match and gets a 304 when unchanged
+  getLatest: (companyName: string) =>
+    api.get(`/insights/latest/${encodeURIComponent(companyName)}`),
+  
   getHistory: (companyName: string, limit: number = 10) =>
-    api.get(`/insights/history/${companyName}`, { params: { limit } }),
+    api.get(`/insights/history/${encodeURIComponent(companyName)}`, { params: { limit } }),
   
   clearCache: (companyName: string) =>
-    api.delete(`/insights/cache/${companyName}`),
+    api.delete(`/insights/cache/${encodeURIComponent(companyName)}`),
 }
 
 export const companiesApi = {
@@ -41,6 +70,10 @@ export const companiesApi = {
   getCompany: (companyName: string) =>
     api.get(`/companies/${companyName}`),
   
+  // Type-ahead; a clear single match has its insights prefetched server-side
+  searchCompanies: (query: string, limit: number = 10) =>
+    api.get('/companies/search', { params: { q: query, limit } }),
+  
   createCompany: (data: { name: string; industry?: string; website?: string; tracked?: boolean }) =>
     api.post('/companies/', data),
   